@@ -0,0 +1,30 @@
+import os
+import stat
+import tempfile
+
+
+def diretorio_privado() -> str:
+    """
+    Diretório local da aplicação (cache, limites, réplica, tarefas)
+
+    Fica no diretório temporário do sistema, com nome por usuário e permissão
+    0700: outro usuário do host não consegue criar antes os arquivos que os
+    workers vão abrir nem ler o que eles gravam.
+
+    Raises:
+        RuntimeError: Se o caminho já existir e não for um diretório privado do usuário atual
+    """
+    uid = os.getuid() if hasattr(os, "getuid") else None
+    caminho = os.path.join(tempfile.gettempdir(), f"ponto-{uid}" if uid is not None else "ponto")
+
+    try:
+        os.mkdir(caminho, 0o700)
+    except FileExistsError:
+        pass
+
+    if uid is not None:
+        info = os.lstat(caminho)
+        if not stat.S_ISDIR(info.st_mode) or info.st_uid != uid or info.st_mode & 0o077:
+            raise RuntimeError(f"Diretório local inseguro: {caminho} (esperado diretório 0700 do usuário atual)")
+
+    return caminho
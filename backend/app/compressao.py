@@ -0,0 +1,180 @@
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from typing import Optional
+import zlib
+import logging
+
+try:
+    import brotli
+except ImportError:  # Opcional: sem o pacote, apenas gzip é oferecido
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+# Tipos de conteúdo que vale a pena comprimir (Parquet/Arrow e imagens já são compactos)
+TIPOS_COMPRIMIVEIS = (
+    "application/json",
+    "application/x-ndjson",
+    "application/javascript",
+    "text/",
+)
+
+# Streams que precisam chegar ao cliente evento a evento, sem compressor no caminho
+TIPOS_EXCLUIDOS = ("text/event-stream",)
+
+
+def escolher_codificacao(accept_encoding: str) -> Optional[str]:
+    """
+    Escolher a codificação a partir do cabeçalho Accept-Encoding
+
+    Prefere br (se o pacote brotli estiver instalado) a gzip quando ambos têm
+    o mesmo peso; codificações com q=0 são recusadas.
+
+    Args:
+        accept_encoding: Valor do cabeçalho enviado pelo cliente
+
+    Returns:
+        "br", "gzip" ou None se nenhuma for aceita
+    """
+    pesos = {}
+    for item in accept_encoding.split(","):
+        partes = [parte.strip() for parte in item.split(";")]
+        nome = partes[0].lower()
+        if not nome:
+            continue
+        peso = 1.0
+        for parametro in partes[1:]:
+            if parametro.lower().startswith("q="):
+                try:
+                    peso = float(parametro[2:])
+                except ValueError:
+                    peso = 0.0
+        pesos[nome] = peso
+
+    curinga = pesos.get("*", 0.0)
+    candidatas = ["br", "gzip"] if brotli is not None else ["gzip"]
+    melhor, melhor_peso = None, 0.0
+
+    for nome in candidatas:
+        peso = pesos.get(nome, curinga)
+        if peso > melhor_peso:
+            melhor, melhor_peso = nome, peso
+
+    return melhor
+
+
+class _Compressor:
+    """Compressor incremental com a mesma interface para gzip e brotli"""
+
+    def __init__(self, codificacao: str, nivel_gzip: int, qualidade_brotli: int):
+        self.codificacao = codificacao
+        if codificacao == "br":
+            self._br = brotli.Compressor(quality=qualidade_brotli)
+        else:
+            # wbits 16+ = cabeçalho e rodapé gzip
+            self._gz = zlib.compressobj(nivel_gzip, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def comprimir(self, dados: bytes) -> bytes:
+        """Comprimir um pedaço e liberar o que já pode ser enviado"""
+        if self.codificacao == "br":
+            return self._br.process(dados) + self._br.flush()
+        return self._gz.compress(dados) + self._gz.flush(zlib.Z_SYNC_FLUSH)
+
+    def finalizar(self, dados: bytes = b"") -> bytes:
+        """Comprimir o último pedaço e fechar o fluxo"""
+        if self.codificacao == "br":
+            return self._br.process(dados) + self._br.finish()
+        return self._gz.compress(dados) + self._gz.flush(zlib.Z_FINISH)
+
+
+class MiddlewareCompressao:
+    """
+    Compressão negociada (br/gzip) das respostas
+
+    Respostas completas menores que tamanho_minimo seguem sem compressão.
+    Respostas em streaming (NDJSON, CSV) são comprimidas pedaço a pedaço,
+    com flush a cada pedaço, sem acumular o corpo em memória. Respostas já
+    codificadas, SSE e tipos binários não são alteradas.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        tamanho_minimo: int = 1024,
+        nivel_gzip: int = 6,
+        qualidade_brotli: int = 4
+    ):
+        self.app = app
+        self.tamanho_minimo = tamanho_minimo
+        self.nivel_gzip = nivel_gzip
+        self.qualidade_brotli = qualidade_brotli
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope.get("method") == "HEAD":
+            await self.app(scope, receive, send)
+            return
+
+        codificacao = escolher_codificacao(Headers(scope=scope).get("accept-encoding", ""))
+        if codificacao is None:
+            await self.app(scope, receive, send)
+            return
+
+        inicio: Optional[Message] = None
+        compressor: Optional[_Compressor] = None
+        repassar = False
+
+        async def enviar(mensagem: Message) -> None:
+            nonlocal inicio, compressor, repassar
+
+            if mensagem["type"] == "http.response.start":
+                # Cabeçalhos só são enviados junto com o primeiro pedaço do corpo
+                inicio = mensagem
+                repassar = not self._comprimivel(Headers(raw=mensagem["headers"]), mensagem["status"])
+                if repassar:
+                    await send(mensagem)
+                return
+
+            if mensagem["type"] != "http.response.body" or repassar:
+                await send(mensagem)
+                return
+
+            corpo = mensagem.get("body", b"")
+            mais = mensagem.get("more_body", False)
+
+            if compressor is None:
+                if not mais and len(corpo) < self.tamanho_minimo:
+                    cabecalhos = MutableHeaders(raw=inicio["headers"])
+                    cabecalhos.add_vary_header("Accept-Encoding")
+                    await send(inicio)
+                    await send(mensagem)
+                    repassar = True
+                    return
+
+                compressor = _Compressor(codificacao, self.nivel_gzip, self.qualidade_brotli)
+                cabecalhos = MutableHeaders(raw=inicio["headers"])
+                cabecalhos["Content-Encoding"] = codificacao
+                cabecalhos.add_vary_header("Accept-Encoding")
+                if "content-length" in cabecalhos:
+                    del cabecalhos["content-length"]
+                await send(inicio)
+
+            if mais:
+                dados = compressor.comprimir(corpo)
+                if dados:
+                    await send({"type": "http.response.body", "body": dados, "more_body": True})
+            else:
+                await send({"type": "http.response.body", "body": compressor.finalizar(corpo), "more_body": False})
+
+        await self.app(scope, receive, enviar)
+
+    @staticmethod
+    def _comprimivel(cabecalhos: Headers, status: int) -> bool:
+        """Indica se a resposta pode ser comprimida"""
+        if status < 200 or status in (204, 304) or "content-encoding" in cabecalhos:
+            return False
+
+        tipo = cabecalhos.get("content-type", "").split(";")[0].strip().lower()
+        if not tipo or tipo.startswith(TIPOS_EXCLUIDOS):
+            return False
+
+        return tipo.startswith(TIPOS_COMPRIMIVEIS) or tipo.endswith("+json")
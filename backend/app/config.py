@@ -23,6 +23,103 @@ class Settings(BaseSettings):
     algorithm: str = "HS256"
     access_token_expire_minutes: int = 30
     
+    # Logging (fila + thread de escrita)
+    logs_formato: str = "json"  # "json" ou "texto"
+    logs_tamanho_fila: int = 10000  # Registros pendentes antes de descartar
+    logs_amostragem_sucesso: float = 1.0  # Fração das requisições bem-sucedidas logadas
+    logs_requisicao_lenta_ms: int = 1000  # Requisições mais lentas são sempre logadas
+    
+    # Cache dos serviços: "memoria" (LRU por processo) ou "sqlite" (compartilhado pelos workers do host)
+    cache_backend: str = "memoria"
+    cache_memoria_capacidade: int = 10000  # Entradas no LRU
+    cache_sqlite_caminho: str = ""  # Vazio = arquivo no diretório privado da aplicação (temp/ponto-<uid>, 0700)
+    
+    # Cache de configurações compiladas (segundos)
+    cache_jornada_ttl_segundos: int = 300
+    cache_perfis_ttl_segundos: int = 300  # Validade máxima do ETag da listagem de usuários
+    cache_perfil_usuario_ttl_segundos: int = 60  # Perfil do usuário autenticado
+    cache_locais_ttl_segundos: int = 300  # Índice de locais (geocerca) de cada empresa
+    cache_locais_vazio_ttl_segundos: int = 30  # Índice de empresa sem locais cadastrados
+    
+    # Contadores do painel: intervalo de recontagem no banco (segundos)
+    estatisticas_reconciliacao_segundos: int = 600
+    
+    # Índice de presença: intervalo de recarga por empresa (segundos)
+    presenca_recarga_segundos: int = 300
+    
+    # Feed de eventos (SSE) por empresa
+    eventos_buffer_assinante: int = 100  # Eventos pendentes antes de descartar o assinante
+    eventos_heartbeat_segundos: int = 15
+    eventos_retry_ms: int = 3000
+    
+    # Importação em lote de funcionários
+    importacao_max_linhas: int = 5000
+    importacao_max_linhas_sincronas: int = 200  # Acima disso a importação roda como tarefa em segundo plano
+    importacao_concorrencia: int = 8  # Chamadas simultâneas ao Supabase Auth
+    importacao_lote_perfis: int = 500
+    
+    # Retenção de fotos de ponto
+    fotos_retencao_dias: int = 365
+    fotos_concorrencia: int = 4  # Pastas de funcionários processadas em paralelo
+    fotos_lote_remocao: int = 1000  # Objetos por chamada de remoção no Storage
+    
+    # Remoção de empresas (offboarding)
+    remocao_lote_registros: int = 5000  # Registros de ponto por DELETE
+    remocao_lote_usuarios: int = 200  # Perfis por página na remoção de contas
+    
+    # Aquecimento e prontidão (/ready)
+    aquecimento_max_perfis: int = 2000  # Perfis de funcionários em jornada pré-carregados
+    aquecimento_intervalo_retentativa_segundos: int = 5
+    prontidao_cache_segundos: int = 5  # Validade da última verificação do Supabase
+    prontidao_latencia_maxima_ms: int = 2000  # Acima disso o worker não é considerado pronto
+    
+    # Rate limit (token bucket): "requisições/segundos" por usuário e por empresa (vazio = sem balde)
+    limite_habilitado: bool = True
+    limite_backend: str = "memoria"  # "memoria" ou "sqlite" (compartilhado pelos workers do host)
+    limite_sqlite_caminho: str = ""  # Vazio = arquivo no diretório privado da aplicação
+    limite_ponto_usuario: str = "10/60"
+    limite_ponto_empresa: str = ""  # Sem balde por empresa: o pico do início de turno cresce com o quadro de funcionários
+    limite_leitura_usuario: str = "120/60"
+    limite_leitura_empresa: str = "3000/60"
+    limite_relatorio_usuario: str = "10/60"
+    limite_relatorio_empresa: str = "30/60"
+    
+    # Compressão das respostas (gzip; br se o pacote brotli estiver instalado)
+    compressao_tamanho_minimo: int = 1024  # Bytes; respostas menores seguem sem compressão
+    compressao_nivel_gzip: int = 6
+    compressao_qualidade_brotli: int = 4
+    
+    # Geocerca: lado das células da grade de locais (metros)
+    geocerca_tamanho_celula_metros: int = 1000
+    
+    # Sincronização com o PWA (histórico incremental e lote binário offline)
+    sincronizacao_delta_max_registros: int = 500  # Registros por resposta
+    sincronizacao_sobreposicao_segundos: int = 30  # Janela relida a cada consulta (commits fora de ordem)
+    sincronizacao_lote_max_registros: int = 500  # Quadros por lote binário de registros offline
+    sincronizacao_lote_max_foto_bytes: int = 5 * 1024 * 1024  # Foto de um quadro do lote binário
+    
+    # Análise de anomalias nos registros de ponto
+    anomalias_janela_duplicado_segundos: int = 120  # Mesmo tipo repetido dentro deste intervalo
+    anomalias_velocidade_maxima_kmh: float = 200  # Deslocamento entre registros acima disso é suspeito
+    anomalias_distancia_minima_metros: int = 1000  # Abaixo disso, variação do GPS não é deslocamento
+    anomalias_intervalo_maximo_horas: int = 4  # Intervalo aberto há mais tempo não foi fechado
+    anomalias_jornada_maxima_horas: int = 16  # Jornada aberta há mais tempo ficou sem saída
+    
+    # Réplica local de registros_ponto e perfis para relatórios
+    replica_habilitada: bool = False
+    replica_caminho: str = ""  # Vazio = arquivo no diretório privado da aplicação
+    replica_intervalo_segundos: int = 30  # Intervalo entre sincronizações incrementais
+    replica_sobreposicao_segundos: int = 120  # Janela relida a cada rodada (commits fora de ordem)
+    replica_defasagem_maxima_segundos: int = 300  # Acima disso os relatórios leem do Supabase
+    replica_recarga_completa_horas: int = 24  # Recarga completa (alterações e remoções externas)
+    
+    # Tarefas em segundo plano (exportações e relatórios longos)
+    tarefas_diretorio: str = ""  # Vazio = subdiretório do diretório privado da aplicação
+    tarefas_max_workers: int = 4
+    tarefas_max_por_empresa: int = 2
+    tarefas_max_pendentes_por_empresa: int = 20
+    tarefas_expiracao_horas: int = 24
+    
     @property
     def cors_origins(self) -> List[str]:
         """Parse comma-separated CORS origins"""
@@ -1,10 +1,15 @@
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from supabase import Client
 from app.supabase_client import obter_supabase
 from app.models.schemas import PerfilUsuario
-from app.models.enums import FuncaoUsuario
+from app.models.enums import ClasseLimite, FuncaoUsuario
+from app.config import settings
+from app.services.perfil_service import ServicoPerfis
+from app.services.cache_service import ServicoCache
+from app.services.limite_service import ServicoLimiteTaxa
 from typing import Optional
+import asyncio
 import logging
 
 logger = logging.getLogger(__name__)
@@ -36,16 +41,16 @@ async def obter_usuario_atual(
         
         usuario_id = resposta_usuario.user.id
         
-        # Obter perfil do usuário da tabela perfis
-        resposta_perfil = supabase.table("perfis").select("*").eq("id", usuario_id).single().execute()
+        # Obter perfil do usuário da tabela perfis (cache de curta duração)
+        perfil = await ServicoCache.executar(ServicoPerfis.obter_perfil, supabase, usuario_id)
         
-        if not resposta_perfil.data:
+        if perfil is None:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Perfil de usuário não encontrado"
             )
         
-        return PerfilUsuario(**resposta_perfil.data)
+        return perfil
         
     except Exception as e:
         logger.error(f"Erro de autenticação: {str(e)}")
@@ -129,3 +134,44 @@ async def obter_super_admin(usuario_atual: PerfilUsuario = Depends(obter_usuario
             detail="Acesso de super admin requerido"
         )
     return usuario_atual
+
+
+def limitar(classe: ClasseLimite):
+    """
+    Factory de dependência de rate limit (token bucket por usuário e por empresa)
+    
+    Os cabeçalhos RateLimit-* são guardados em request.state e adicionados à
+    resposta pelo middleware; quando o orçamento acaba, responde 429 com Retry-After.
+    
+    Uso:
+        @router.post("/registrar", dependencies=[Depends(limitar(ClasseLimite.PONTO))])
+    """
+    async def verificador_limite(
+        request: Request,
+        usuario_atual: PerfilUsuario = Depends(obter_usuario_atual)
+    ) -> None:
+        if not settings.limite_habilitado:
+            return
+        
+        if ServicoLimiteTaxa.backend().compartilhado:
+            # BEGIN IMMEDIATE no arquivo compartilhado pode esperar o lock: fora do event loop
+            consumo = await asyncio.to_thread(
+                ServicoLimiteTaxa.consumir, classe, usuario_atual.id, usuario_atual.empresa_id
+            )
+        else:
+            consumo = ServicoLimiteTaxa.consumir(classe, usuario_atual.id, usuario_atual.empresa_id)
+        if consumo is None:
+            return
+        
+        cabecalhos = ServicoLimiteTaxa.cabecalhos(consumo)
+        
+        if not consumo.permitido:
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail=f"Limite de requisições excedido. Tente novamente em {consumo.retry_after_segundos}s",
+                headers=cabecalhos
+            )
+        
+        request.state.limite_taxa = cabecalhos
+    
+    return verificador_limite
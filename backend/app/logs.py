@@ -0,0 +1,103 @@
+from logging.handlers import QueueHandler, QueueListener
+from datetime import datetime, timezone
+from typing import Optional
+import json
+import logging
+import queue
+
+# Atributos padrão de LogRecord; o que não estiver aqui veio de extra=
+ATRIBUTOS_PADRAO = frozenset(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime", "taskName"}
+
+
+class FormatadorJSON(logging.Formatter):
+    """Formata cada registro como uma linha JSON (campos de extra= incluídos)"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        dados = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "nivel": record.levelname,
+            "logger": record.name,
+            "mensagem": record.getMessage()
+        }
+
+        for chave, valor in vars(record).items():
+            if chave not in ATRIBUTOS_PADRAO and not chave.startswith("_"):
+                dados[chave] = valor
+
+        if record.exc_info:
+            dados["excecao"] = self.formatException(record.exc_info)
+
+        return json.dumps(dados, ensure_ascii=False, default=str)
+
+
+class HandlerFila(QueueHandler):
+    """
+    Enfileira registros sem formatá-los
+
+    A formatação (inclusive a interpolação dos argumentos %-style) fica para
+    a thread do QueueListener. Com a fila cheia o registro é descartado em
+    vez de bloquear quem está logando.
+    """
+
+    def __init__(self, fila: queue.Queue):
+        super().__init__(fila)
+        self.descartados = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.descartados += 1
+
+
+_listener: Optional[QueueListener] = None
+
+
+def configurar_logs(nivel: int, formato: str = "json", tamanho_fila: int = 10000) -> None:
+    """
+    Configurar logging da aplicação através de uma fila
+
+    O handler raiz apenas enfileira; uma thread em segundo plano formata e
+    escreve em stderr. Chamadas repetidas não criam um segundo listener.
+
+    Args:
+        nivel: Nível mínimo do logger raiz
+        formato: "json" (uma linha JSON por registro) ou "texto"
+        tamanho_fila: Registros pendentes antes de descartar novos
+    """
+    global _listener
+
+    if _listener is not None:
+        return
+
+    saida = logging.StreamHandler()
+    if formato == "json":
+        saida.setFormatter(FormatadorJSON())
+    else:
+        saida.setFormatter(logging.Formatter("%(asctime)s - %(name)s - %(levelname)s - %(message)s"))
+
+    fila: queue.Queue = queue.Queue(maxsize=max(tamanho_fila, 1))
+
+    raiz = logging.getLogger()
+    for handler in list(raiz.handlers):
+        raiz.removeHandler(handler)
+    raiz.addHandler(HandlerFila(fila))
+    raiz.setLevel(nivel)
+
+    _listener = QueueListener(fila, saida, respect_handler_level=True)
+    _listener.start()
+
+
+def encerrar_logs() -> None:
+    """Parar a thread de logging, escrevendo o que ainda estiver na fila"""
+    global _listener
+
+    if _listener is not None:
+        descartados = sum(getattr(handler, "descartados", 0) for handler in logging.getLogger().handlers)
+        if descartados:
+            logging.getLogger(__name__).warning("Registros de log descartados com a fila cheia: %s", descartados)
+        _listener.stop()
+        _listener = None
@@ -2,14 +2,22 @@ from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 from app.config import settings
-from app.routers import auth, ponto, relatorios, admin
+from app.compressao import MiddlewareCompressao
+from app.logs import configurar_logs, encerrar_logs
+from app.routers import auth, ponto, relatorios, admin, tarefas
+from app.services.tarefa_service import ServicoTarefas
+from app.services.eventos_service import ServicoEventos
+from app.services.prontidao_service import ServicoProntidao
+from app.services.replica_service import ServicoReplica
 import logging
+import random
 import time
 
-# Configurar logging
-logging.basicConfig(
-    level=logging.INFO if settings.debug else logging.WARNING,
-    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+# Configurar logging (formatação e escrita em thread separada)
+configurar_logs(
+    logging.INFO if settings.debug else logging.WARNING,
+    formato=settings.logs_formato,
+    tamanho_fila=settings.logs_tamanho_fila
 )
 
 logger = logging.getLogger(__name__)
@@ -30,31 +38,72 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[
+        "RateLimit-Limit", "RateLimit-Remaining", "RateLimit-Reset", "Retry-After",
+        "X-Fonte-Dados", "X-Defasagem-Segundos"
+    ],
+)
+
+# Compressão negociada das respostas (relatórios e listagens grandes)
+app.add_middleware(
+    MiddlewareCompressao,
+    tamanho_minimo=settings.compressao_tamanho_minimo,
+    nivel_gzip=settings.compressao_nivel_gzip,
+    qualidade_brotli=settings.compressao_qualidade_brotli,
 )
 
 
 # Middleware para logging de requisições
 @app.middleware("http")
 async def log_requests(request: Request, call_next):
-    """Middleware para logar todas as requisições"""
-    inicio = time.time()
+    """Middleware para logar as requisições (bem-sucedidas e rápidas por amostragem)"""
+    inicio = time.perf_counter()
     
     # Processar requisição
     response = await call_next(request)
     
     # Calcular tempo de processamento
-    duracao = time.time() - inicio
+    duracao_ms = (time.perf_counter() - inicio) * 1000
+    
+    # Erros e requisições lentas sempre; as demais conforme a amostragem
+    if not logger.isEnabledFor(logging.INFO):
+        return response
+    
+    if (
+        response.status_code < 400
+        and duracao_ms < settings.logs_requisicao_lenta_ms
+        and random.random() >= settings.logs_amostragem_sucesso
+    ):
+        return response
     
-    # Logar
     logger.info(
-        f"{request.method} {request.url.path} - "
-        f"Status: {response.status_code} - "
-        f"Duração: {duracao:.3f}s"
+        "%s %s - Status: %s - Duração: %.3fs",
+        request.method, request.url.path, response.status_code, duracao_ms / 1000,
+        extra={
+            "metodo": request.method,
+            "caminho": request.url.path,
+            "status": response.status_code,
+            "duracao_ms": round(duracao_ms, 1)
+        }
     )
     
     return response
 
 
+# Middleware para os cabeçalhos de rate limit (definidos pela dependência limitar)
+@app.middleware("http")
+async def adicionar_cabecalhos_limite(request: Request, call_next):
+    """Copia para a resposta os cabeçalhos RateLimit-* calculados na requisição"""
+    response = await call_next(request)
+    
+    cabecalhos = getattr(request.state, "limite_taxa", None)
+    if cabecalhos:
+        for nome, valor in cabecalhos.items():
+            response.headers.setdefault(nome, valor)
+    
+    return response
+
+
 # Handler de exceções global
 @app.exception_handler(Exception)
 async def global_exception_handler(request: Request, exc: Exception):
@@ -75,6 +124,7 @@ app.include_router(auth.router)
 app.include_router(ponto.router)
 app.include_router(relatorios.router)
 app.include_router(admin.router)
+app.include_router(tarefas.router)
 
 
 # Rota raiz
@@ -99,19 +149,45 @@ async def health_check():
     }
 
 
+# Rota de prontidão (balanceador de carga)
+@app.get("/ready")
+async def readiness_check():
+    """Prontidão: aquecimento concluído e Supabase respondendo dentro do limite"""
+    situacao = await ServicoProntidao.verificar()
+    
+    return JSONResponse(
+        status_code=200 if situacao["pronto"] else 503,
+        content={"status": "ready" if situacao["pronto"] else "not_ready", **situacao}
+    )
+
+
 # Inicialização
 @app.on_event("startup")
 async def startup_event():
     """Executado ao iniciar a aplicação"""
     logger.info("=== Sistema de Controle de Ponto Iniciado ===")
-    logger.info(f"Ambiente: {'Desenvolvimento' if settings.debug else 'Produção'}")
-    logger.info(f"CORS Origins: {settings.cors_origins}")
+    logger.info("Ambiente: %s", "Desenvolvimento" if settings.debug else "Produção")
+    logger.info("CORS Origins: %s", settings.cors_origins)
+    
+    # Pool de tarefas em segundo plano (exportações longas)
+    ServicoTarefas.iniciar()
+    
+    # Clientes, conexões, índice de presença e caches (em segundo plano; ver /ready)
+    ServicoProntidao.iniciar()
+    
+    # Réplica local para relatórios (se REPLICA_HABILITADA)
+    ServicoReplica.iniciar()
 
 
 @app.on_event("shutdown")
 async def shutdown_event():
     """Executado ao desligar a aplicação"""
+    ServicoProntidao.encerrar()
+    ServicoReplica.encerrar()
+    ServicoEventos.encerrar()
+    ServicoTarefas.encerrar()
     logger.info("=== Sistema de Controle de Ponto Desligado ===")
+    encerrar_logs()
 
 
 if __name__ == "__main__":
@@ -14,3 +14,44 @@ class TipoPonto(str, Enum):
     SAIDA = "clock_out"
     INICIO_INTERVALO = "break_start"
     FIM_INTERVALO = "break_end"
+
+
+class ClasseLimite(str, Enum):
+    """Classes de rota com orçamentos de rate limit separados"""
+    PONTO = "ponto"
+    LEITURA = "leitura"
+    RELATORIO = "relatorio"
+
+
+class EstadoPresenca(str, Enum):
+    """Situação atual do funcionário, derivada do último registro de ponto"""
+    TRABALHANDO = "trabalhando"
+    INTERVALO = "intervalo"
+    AUSENTE = "ausente"
+
+
+class TipoTarefa(str, Enum):
+    """Tipos de tarefa executados em segundo plano"""
+    EXPORTACAO_FOLHA = "exportacao_folha"
+    EXPORTACAO_REGISTROS = "exportacao_registros"
+    ESPELHOS_PONTO = "espelhos_ponto"
+    LIMPEZA_FOTOS = "limpeza_fotos"
+    REMOCAO_EMPRESA = "remocao_empresa"
+    ANALISE_ANOMALIAS = "analise_anomalias"
+    IMPORTACAO_USUARIOS = "importacao_usuarios"
+
+
+class TipoAnomalia(str, Enum):
+    """Anomalias encontradas pela análise em lote dos registros de ponto"""
+    REGISTRO_DUPLICADO = "registro_duplicado"
+    DESLOCAMENTO_IMPOSSIVEL = "deslocamento_impossivel"
+    INTERVALO_NAO_FECHADO = "intervalo_nao_fechado"
+    SAIDA_AUSENTE = "saida_ausente"
+
+
+class StatusTarefa(str, Enum):
+    """Estados de uma tarefa em segundo plano"""
+    PENDENTE = "pendente"
+    EXECUTANDO = "executando"
+    CONCLUIDA = "concluida"
+    FALHOU = "falhou"
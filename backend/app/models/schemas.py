@@ -1,7 +1,7 @@
 from pydantic import BaseModel, EmailStr, Field, UUID4
-from datetime import datetime
+from datetime import date, datetime
 from typing import Optional
-from .enums import FuncaoUsuario, TipoPonto
+from .enums import FuncaoUsuario, TipoPonto, EstadoPresenca, TipoTarefa, StatusTarefa, TipoAnomalia
 
 
 # ========== Schemas de Usuário e Autenticação ==========
@@ -17,6 +17,29 @@ class PerfilUsuario(BaseModel):
     criado_em: datetime
 
 
+class PaginaUsuarios(BaseModel):
+    """Página da listagem de usuários (campos conforme a projeção pedida)"""
+    usuarios: list[dict]
+    proximo_cursor: Optional[str] = None
+
+
+class ResultadoImportacao(BaseModel):
+    """Resultado de uma linha da importação em lote"""
+    linha: int
+    email: Optional[str] = None
+    sucesso: bool
+    usuario_id: Optional[UUID4] = None
+    erro: Optional[str] = None
+
+
+class RespostaImportacao(BaseModel):
+    """Relatório da importação em lote de funcionários"""
+    total: int
+    criados: int
+    falhas: int
+    resultados: list[ResultadoImportacao]
+
+
 class RequisicaoLogin(BaseModel):
     """Credenciais de login"""
     email: EmailStr
@@ -62,6 +85,7 @@ class RegistroPonto(BaseModel):
     foto_url: Optional[str] = None
     sincronizado_em: Optional[datetime] = None
     criado_em: datetime
+    local_id: Optional[UUID4] = None  # Local da empresa (geocerca) em que o ponto foi registrado
 
 
 class RequisicaoSincronizacao(BaseModel):
@@ -77,6 +101,13 @@ class RespostaSincronizacao(BaseModel):
     erros: list[str] = []
 
 
+class RespostaDeltaRegistros(BaseModel):
+    """Registros criados ou alterados desde o cursor (sincronização incremental)"""
+    registros: list[RegistroPonto]
+    cursor: str  # Enviar na próxima consulta
+    tem_mais: bool  # Há mais registros pendentes; consultar de novo imediatamente
+
+
 class RespostaUltimoPonto(BaseModel):
     """Último registro de ponto para validação"""
     tipo_ponto: Optional[TipoPonto] = None
@@ -105,6 +136,43 @@ class RequisicaoCriarEmpresa(BaseModel):
     configuracoes: Optional[dict] = None
 
 
+class RequisicaoAtualizarEmpresa(BaseModel):
+    """Atualizar dados de uma empresa (campos omitidos não são alterados)"""
+    nome: Optional[str] = None
+    configuracoes: Optional[dict] = None
+    ativa: Optional[bool] = None
+
+
+class LocalEmpresa(BaseModel):
+    """Local permitido para registro de ponto (geocerca circular)"""
+    id: UUID4
+    empresa_id: UUID4
+    nome: str
+    latitude: float
+    longitude: float
+    raio_metros: int
+    ativo: bool = True
+    criado_em: Optional[datetime] = None
+
+
+class RequisicaoCriarLocal(BaseModel):
+    """Cadastrar local da empresa"""
+    nome: str
+    latitude: float = Field(..., ge=-90, le=90)
+    longitude: float = Field(..., ge=-180, le=180)
+    raio_metros: int = Field(..., gt=0, le=5000)
+    ativo: bool = True
+
+
+class RequisicaoAtualizarLocal(BaseModel):
+    """Atualizar local da empresa (campos omitidos não são alterados)"""
+    nome: Optional[str] = None
+    latitude: Optional[float] = Field(None, ge=-90, le=90)
+    longitude: Optional[float] = Field(None, ge=-180, le=180)
+    raio_metros: Optional[int] = Field(None, gt=0, le=5000)
+    ativo: Optional[bool] = None
+
+
 # ========== Schemas de Relatórios ==========
 
 class RegistroTempo(BaseModel):
@@ -138,11 +206,81 @@ class DadosFolhaPagamento(BaseModel):
     fim_periodo: str
     horas_regulares: float
     horas_extras: float
+    horas_extras_semanais: float = 0.0  # Parte das extras vinda do limite semanal
     total_horas: float
     faltas: int
     atrasos: int
 
 
+class SaldoBancoHoras(BaseModel):
+    """Saldo do banco de horas de um funcionário"""
+    usuario_id: UUID4
+    saldo_minutos: int = 0
+    saldo_horas: float = 0.0
+    ultimo_dia_fechado: Optional[date] = None
+    atualizado_em: Optional[datetime] = None
+
+
+class PresencaUsuario(BaseModel):
+    """Situação atual de um funcionário"""
+    usuario_id: UUID4
+    estado: EstadoPresenca
+    desde: Optional[datetime] = None  # Momento do registro que levou ao estado
+
+
+class RespostaPresenca(BaseModel):
+    """Quem está trabalhando agora na empresa"""
+    empresa_id: UUID4
+    trabalhando: int
+    intervalo: int
+    ausente: int
+    usuarios: list[PresencaUsuario]
+
+
+# ========== Schemas de Tarefas em Segundo Plano ==========
+
+class RequisicaoTarefa(BaseModel):
+    """Submissão de tarefa em segundo plano (exportações e espelhos em lote)"""
+    tipo: TipoTarefa
+    data_inicio: datetime
+    data_fim: datetime
+    formato: str = "csv"  # exportacao_folha: csv, json, parquet, arrow | exportacao_registros: parquet, arrow
+
+
+class RespostaTarefa(BaseModel):
+    """Estado de uma tarefa em segundo plano"""
+    id: str
+    tipo: TipoTarefa
+    status: StatusTarefa
+    progresso: float = 0.0
+    mensagem: Optional[str] = None
+    criado_em: datetime
+    iniciado_em: Optional[datetime] = None
+    concluido_em: Optional[datetime] = None
+    expira_em: Optional[datetime] = None
+    url_download: Optional[str] = None
+
+
+class AnomaliaPonto(BaseModel):
+    """Achado da análise de anomalias"""
+    id: UUID4
+    empresa_id: UUID4
+    usuario_id: UUID4
+    registro_id: UUID4
+    tipo: TipoAnomalia
+    timestamp: datetime
+    detalhes: dict = {}
+    criado_em: Optional[datetime] = None
+
+
+class PaginaAnomalias(BaseModel):
+    """Página de achados da análise de anomalias"""
+    anomalias: list[AnomaliaPonto]
+    total: int
+    pagina: int
+    por_pagina: int
+
+
 # ========== Respostas Genéricas ==========
 
 class RespostaMensagem(BaseModel):
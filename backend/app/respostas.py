@@ -0,0 +1,17 @@
+from fastapi.responses import JSONResponse
+from typing import Any
+import orjson
+
+
+class RespostaJSONRapida(JSONResponse):
+    """
+    Resposta JSON serializada com orjson, sem passar pelo response_model
+
+    Para listas grandes montadas a partir de linhas do próprio banco, que já
+    estão em tipos JSON e não precisam ser validadas de novo. Rotas que a
+    retornam continuam declarando response_model para a documentação; o
+    FastAPI não valida nem reserializa uma Response devolvida diretamente.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, default=str)
@@ -1,15 +1,40 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, Response, status
+from fastapi.responses import StreamingResponse
 from supabase import Client
 from app.supabase_client import obter_supabase
 from app.models.schemas import (
     Empresa,
     RequisicaoCriarEmpresa,
+    RequisicaoAtualizarEmpresa,
     PerfilUsuario,
-    RequisicaoRegistro
+    RequisicaoRegistro,
+    PresencaUsuario,
+    RespostaPresenca,
+    PaginaUsuarios,
+    RespostaImportacao,
+    RespostaTarefa,
+    LocalEmpresa,
+    RequisicaoCriarLocal,
+    RequisicaoAtualizarLocal,
+    PaginaAnomalias
 )
-from app.dependencies import obter_super_admin, obter_admin_empresa
-from app.models.enums import FuncaoUsuario
-from typing import List
+from app.dependencies import obter_super_admin, obter_admin_empresa, limitar
+from app.models.enums import FuncaoUsuario, EstadoPresenca, TipoTarefa, ClasseLimite, TipoAnomalia
+from app.services.jornada_service import ServicoJornada
+from app.services.estatisticas_service import ServicoEstatisticas
+from app.services.eventos_service import ServicoEventos
+from app.services.presenca_service import ServicoPresenca
+from app.services.perfil_service import ServicoPerfis
+from app.services.replica_service import ServicoReplica
+from app.services.geocerca_service import ServicoGeocerca
+from app.services.anomalia_service import ServicoAnomalias
+from app.services.importacao_service import ServicoImportacao
+from app.services.remocao_empresa_service import ServicoRemocaoEmpresa
+from app.services.tarefa_service import ServicoTarefas
+from app.services.cache_service import ServicoCache
+from app.config import settings
+from datetime import datetime
+from typing import List, Optional, Union
 import logging
 
 logger = logging.getLogger(__name__)
@@ -54,6 +79,15 @@ async def criar_empresa(
     """
     Criar nova empresa (super admin apenas)
     """
+    try:
+        # Validar configurações de jornada antes de gravar
+        ServicoJornada.compilar("nova", dados.configuracoes)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    
     try:
         dados_empresa = {
             "nome": dados.nome,
@@ -71,7 +105,7 @@ async def criar_empresa(
                 detail="Falha ao criar empresa"
             )
         
-        logger.info(f"Nova empresa criada: {dados.nome}")
+        logger.info("Nova empresa criada: %s", dados.nome)
         
         return Empresa(**resposta.data[0])
         
@@ -130,32 +164,378 @@ async def obter_empresa(
         )
 
 
+@router.patch("/empresas/{empresa_id}", response_model=Empresa)
+async def atualizar_empresa(
+    empresa_id: str,
+    dados: RequisicaoAtualizarEmpresa,
+    usuario_atual: PerfilUsuario = Depends(obter_super_admin),
+    supabase: Client = Depends(lambda: obter_supabase(usar_service_key=True))
+):
+    """
+    Atualizar dados e configurações de uma empresa (super admin apenas)
+    
+    Invalida a jornada compilada em cache da empresa
+    """
+    alteracoes = dados.model_dump(exclude_none=True)
+    
+    if not alteracoes:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Nenhum campo para atualizar"
+        )
+    
+    if "configuracoes" in alteracoes:
+        try:
+            ServicoJornada.compilar(empresa_id, alteracoes["configuracoes"])
+        except ValueError as e:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=str(e)
+            )
+    
+    try:
+        resposta = supabase.table("empresas")\
+            .update(alteracoes)\
+            .eq("id", empresa_id)\
+            .execute()
+        
+        if not resposta.data:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Empresa não encontrada"
+            )
+        
+        await ServicoCache.executar(ServicoJornada.invalidar, empresa_id)
+        
+        logger.info("Empresa atualizada: %s", empresa_id)
+        
+        return Empresa(**resposta.data[0])
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Erro ao atualizar empresa: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=str(e)
+        )
+
+
+@router.delete("/empresas/{empresa_id}", response_model=RespostaTarefa, status_code=status.HTTP_202_ACCEPTED)
+async def remover_empresa(
+    empresa_id: str,
+    usuario_atual: PerfilUsuario = Depends(obter_super_admin),
+    supabase: Client = Depends(lambda: obter_supabase(usar_service_key=True))
+):
+    """
+    Remover empresa com todos os usuários, registros e fotos (super admin apenas)
+    
+    A remoção roda em segundo plano, em etapas e lotes; acompanhe por
+    GET /tarefas/{id} ou GET /admin/empresas/{empresa_id}/remocao. Se for
+    interrompida, repetir a chamada continua de onde parou; enquanto estiver
+    pendente ou em execução, a chamada devolve a tarefa em andamento
+    """
+    if empresa_id == str(usuario_atual.empresa_id):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Não é possível remover a própria empresa"
+        )
+    
+    try:
+        progresso = await ServicoRemocaoEmpresa.obter_progresso(supabase, empresa_id)
+        
+        if progresso is None:
+            resposta = supabase.table("empresas")\
+                .select("id")\
+                .eq("id", empresa_id)\
+                .execute()
+            
+            if not resposta.data:
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail="Empresa não encontrada"
+                )
+        elif progresso["etapa"] == "concluida":
+            raise HTTPException(
+                status_code=status.HTTP_410_GONE,
+                detail="Empresa já removida"
+            )
+        
+        meta = ServicoTarefas.submeter(
+            supabase,
+            empresa_id,
+            str(usuario_atual.id),
+            TipoTarefa.REMOCAO_EMPRESA,
+            {"solicitado_por": str(usuario_atual.id)},
+            unica=True  # Repetir a chamada durante a remoção devolve a tarefa em andamento
+        )
+        
+        logger.info("Remoção da empresa %s submetida por %s", empresa_id, usuario_atual.id)
+        
+        return ServicoTarefas.para_resposta(meta)
+        
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=str(e)
+        )
+    except Exception as e:
+        logger.error(f"Erro ao remover empresa: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=str(e)
+        )
+
+
+@router.get("/empresas/{empresa_id}/remocao")
+async def obter_progresso_remocao(
+    empresa_id: str,
+    usuario_atual: PerfilUsuario = Depends(obter_super_admin),
+    supabase: Client = Depends(lambda: obter_supabase(usar_service_key=True))
+):
+    """
+    Consultar o ponto de controle da remoção de uma empresa (super admin apenas)
+    """
+    try:
+        progresso = await ServicoRemocaoEmpresa.obter_progresso(supabase, empresa_id)
+        
+        if progresso is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Remoção não iniciada para esta empresa"
+            )
+        
+        return progresso
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Erro ao obter progresso da remoção: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=str(e)
+        )
+
+
+# ============================================================================
+# Locais da Empresa (Geocerca)
+# ============================================================================
+
+def _verificar_acesso_empresa(usuario_atual: PerfilUsuario, empresa_id: str) -> None:
+    """Admin da empresa só administra a própria empresa"""
+    if usuario_atual.funcao == FuncaoUsuario.ADMIN_EMPRESA and str(usuario_atual.empresa_id) != empresa_id:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Você só pode acessar sua própria empresa"
+        )
+
+
+@router.get("/empresas/{empresa_id}/locais", response_model=List[LocalEmpresa], dependencies=[Depends(limitar(ClasseLimite.LEITURA))])
+async def listar_locais(
+    empresa_id: str,
+    usuario_atual: PerfilUsuario = Depends(obter_admin_empresa),
+    supabase: Client = Depends(lambda: obter_supabase(usar_service_key=True))
+):
+    """
+    Listar locais em que a empresa permite registrar ponto
+    """
+    _verificar_acesso_empresa(usuario_atual, empresa_id)
+    
+    try:
+        return [LocalEmpresa(**linha) for linha in ServicoGeocerca.listar(supabase, empresa_id)]
+        
+    except Exception as e:
+        logger.error(f"Erro ao listar locais: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=str(e)
+        )
+
+
+@router.post("/empresas/{empresa_id}/locais", response_model=LocalEmpresa, status_code=status.HTTP_201_CREATED)
+async def criar_local(
+    empresa_id: str,
+    dados: RequisicaoCriarLocal,
+    usuario_atual: PerfilUsuario = Depends(obter_admin_empresa),
+    supabase: Client = Depends(lambda: obter_supabase(usar_service_key=True))
+):
+    """
+    Cadastrar local da empresa
+    
+    A partir do primeiro local ativo, o ponto só é aceito dentro do raio de
+    algum local da empresa
+    """
+    _verificar_acesso_empresa(usuario_atual, empresa_id)
+    
+    try:
+        resposta = supabase.table("locais_empresa")\
+            .insert({**dados.model_dump(), "empresa_id": empresa_id})\
+            .execute()
+        
+        await ServicoCache.executar(ServicoGeocerca.marcar_alteracao, empresa_id)
+        
+        logger.info("Local criado: empresa=%s, local=%s", empresa_id, resposta.data[0]["id"])
+        
+        return LocalEmpresa(**resposta.data[0])
+        
+    except Exception as e:
+        logger.error(f"Erro ao criar local: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=str(e)
+        )
+
+
+@router.patch("/empresas/{empresa_id}/locais/{local_id}", response_model=LocalEmpresa)
+async def atualizar_local(
+    empresa_id: str,
+    local_id: str,
+    dados: RequisicaoAtualizarLocal,
+    usuario_atual: PerfilUsuario = Depends(obter_admin_empresa),
+    supabase: Client = Depends(lambda: obter_supabase(usar_service_key=True))
+):
+    """
+    Atualizar local da empresa (ativo=false suspende o local sem removê-lo)
+    """
+    _verificar_acesso_empresa(usuario_atual, empresa_id)
+    
+    alteracoes = dados.model_dump(exclude_none=True)
+    
+    if not alteracoes:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Nenhum campo para atualizar"
+        )
+    
+    try:
+        resposta = supabase.table("locais_empresa")\
+            .update(alteracoes)\
+            .eq("id", local_id)\
+            .eq("empresa_id", empresa_id)\
+            .execute()
+        
+        if not resposta.data:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Local não encontrado"
+            )
+        
+        await ServicoCache.executar(ServicoGeocerca.marcar_alteracao, empresa_id)
+        
+        logger.info("Local atualizado: empresa=%s, local=%s", empresa_id, local_id)
+        
+        return LocalEmpresa(**resposta.data[0])
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Erro ao atualizar local: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=str(e)
+        )
+
+
+@router.delete("/empresas/{empresa_id}/locais/{local_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def deletar_local(
+    empresa_id: str,
+    local_id: str,
+    usuario_atual: PerfilUsuario = Depends(obter_admin_empresa),
+    supabase: Client = Depends(lambda: obter_supabase(usar_service_key=True))
+):
+    """
+    Remover local da empresa (registros feitos nele ficam com local_id nulo)
+    """
+    _verificar_acesso_empresa(usuario_atual, empresa_id)
+    
+    try:
+        resposta = supabase.table("locais_empresa")\
+            .delete()\
+            .eq("id", local_id)\
+            .eq("empresa_id", empresa_id)\
+            .execute()
+        
+        if not resposta.data:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Local não encontrado"
+            )
+        
+        await ServicoCache.executar(ServicoGeocerca.marcar_alteracao, empresa_id)
+        
+        logger.info("Local removido: empresa=%s, local=%s", empresa_id, local_id)
+        
+        return None
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Erro ao remover local: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=str(e)
+        )
+
+
 # ============================================================================
 # Gerenciamento de Usuários
 # ============================================================================
 
-@router.get("/usuarios", response_model=List[PerfilUsuario])
+@router.get("/usuarios", response_model=PaginaUsuarios, dependencies=[Depends(limitar(ClasseLimite.LEITURA))])
 async def listar_usuarios(
+    response: Response,
+    limite: int = Query(50, ge=1, le=200, description="Usuários por página"),
+    cursor: Optional[str] = Query(None, description="proximo_cursor da página anterior"),
+    campos: Optional[str] = Query(None, description="Campos a retornar, separados por vírgula (padrão: todos)"),
+    busca: Optional[str] = Query(None, description="Trecho do nome ou do código do funcionário"),
+    if_none_match: Optional[str] = Header(None),
     usuario_atual: PerfilUsuario = Depends(obter_admin_empresa),
     supabase: Client = Depends(obter_supabase)
 ):
     """
-    Listar usuários da empresa
+    Listar usuários da empresa, paginado por cursor e em ordem de nome
     
     Admin da empresa vê apenas usuários de sua empresa
     Super admin vê todos
+    
+    Responde 304 sem consultar o banco quando If-None-Match coincide com o
+    ETag atual (nenhum perfil da empresa alterado desde a última listagem)
     """
     try:
-        consulta = supabase.table("perfis").select("*")
+        campos_projetados = ServicoPerfis.validar_campos(campos)
+        busca = busca.strip() if busca else None
         
         # Filtrar por empresa se não for super admin
+        empresa_id = None
         if usuario_atual.funcao != FuncaoUsuario.SUPER_ADMIN:
-            consulta = consulta.eq("empresa_id", str(usuario_atual.empresa_id))
+            empresa_id = str(usuario_atual.empresa_id)
+        
+        etag = await ServicoCache.executar(ServicoPerfis.etag, empresa_id, [cursor, limite, campos_projetados, busca])
         
-        resposta = consulta.order("nome_completo").execute()
+        if if_none_match and etag in [valor.strip() for valor in if_none_match.split(",")]:
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+        
+        usuarios, proximo_cursor = ServicoPerfis.listar(
+            supabase,
+            empresa_id,
+            campos_projetados,
+            limite,
+            cursor,
+            busca
+        )
         
-        return [PerfilUsuario(**usuario) for usuario in resposta.data]
+        response.headers["ETag"] = etag
+        response.headers["Cache-Control"] = "private, no-cache"
         
+        return PaginaUsuarios(usuarios=usuarios, proximo_cursor=proximo_cursor)
+        
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
     except Exception as e:
         logger.error(f"Erro ao listar usuários: {str(e)}")
         raise HTTPException(
@@ -164,6 +544,89 @@ async def listar_usuarios(
         )
 
 
+@router.post(
+    "/usuarios/importar",
+    response_model=Union[RespostaImportacao, RespostaTarefa],
+    dependencies=[Depends(limitar(ClasseLimite.RELATORIO))]
+)
+async def importar_usuarios(
+    request: Request,
+    response: Response,
+    empresa_id: Optional[str] = Query(None, description="Empresa das linhas sem empresa_id"),
+    usuario_atual: PerfilUsuario = Depends(obter_super_admin),
+    supabase: Client = Depends(lambda: obter_supabase(usar_service_key=True))
+):
+    """
+    Importar funcionários em lote (super admin apenas)
+    
+    Aceita CSV (multipart com o campo `arquivo` ou corpo text/csv) ou JSON
+    (lista de objetos no formato de /auth/register). Cada linha recebe seu
+    resultado; linhas com erro não impedem a criação das demais.
+    Com mais de IMPORTACAO_MAX_LINHAS_SINCRONAS linhas válidas, responde 202
+    com uma tarefa cujo artefato é o mesmo relatório
+    """
+    try:
+        tipo_conteudo = request.headers.get("content-type", "")
+        
+        if tipo_conteudo.startswith("multipart/form-data"):
+            formulario = await request.form()
+            arquivo = formulario.get("arquivo")
+            if arquivo is None or isinstance(arquivo, str):
+                raise ValueError("Envie o CSV no campo 'arquivo'")
+            linhas = ServicoImportacao.ler_csv(await arquivo.read())
+        elif tipo_conteudo.startswith("text/csv"):
+            linhas = ServicoImportacao.ler_csv(await request.body())
+        else:
+            linhas = await request.json()
+            if not isinstance(linhas, list) or not all(isinstance(linha, dict) for linha in linhas):
+                raise ValueError("JSON deve ser uma lista de funcionários")
+        
+        if not linhas:
+            raise ValueError("Nenhum funcionário para importar")
+        
+        if len(linhas) > settings.importacao_max_linhas:
+            raise ValueError(f"Máximo de {settings.importacao_max_linhas} funcionários por importação")
+        
+        validas, resultados = ServicoImportacao.validar_linhas(linhas, empresa_id)
+        
+        if len(validas) > settings.importacao_max_linhas_sincronas:
+            # Milhares de chamadas ao Auth não cabem em uma requisição
+            lote = ServicoImportacao.guardar_lote(validas)
+            try:
+                meta = ServicoTarefas.submeter(
+                    supabase,
+                    str(usuario_atual.empresa_id),
+                    str(usuario_atual.id),
+                    TipoTarefa.IMPORTACAO_USUARIOS,
+                    {"lote": lote, "invalidas": resultados}
+                )
+            except Exception:
+                ServicoImportacao.retirar_lote(lote)
+                raise
+            
+            logger.info("Importação de %s usuários submetida como tarefa %s", len(validas), meta["id"])
+            
+            response.status_code = status.HTTP_202_ACCEPTED
+            return ServicoTarefas.para_resposta(meta)
+        
+        if validas:
+            resultados += await ServicoImportacao.importar(supabase, validas)
+        
+        return ServicoImportacao.resumir(resultados)
+        
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    except Exception as e:
+        logger.error(f"Erro ao importar usuários: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=str(e)
+        )
+
+
 @router.get("/usuarios/{usuario_id}", response_model=PerfilUsuario)
 async def obter_usuario(
     usuario_id: str,
@@ -233,6 +696,10 @@ async def deletar_usuario(
         
         # Deletar perfil
         supabase.table("perfis").delete().eq("id", usuario_id).execute()
+        await ServicoCache.executar(ServicoEstatisticas.ajustar_usuarios, resposta_perfil.data["empresa_id"], -1)
+        ServicoPresenca.remover(resposta_perfil.data["empresa_id"], usuario_id)
+        await ServicoCache.executar(ServicoPerfis.marcar_alteracao, resposta_perfil.data["empresa_id"])
+        ServicoReplica.remover_usuario(usuario_id)
         
         # Deletar usuário do Auth
         try:
@@ -240,7 +707,7 @@ async def deletar_usuario(
         except Exception as e:
             logger.warning(f"Falha ao deletar usuário do Auth: {str(e)}")
         
-        logger.info(f"Usuário deletado: {usuario_id}")
+        logger.info("Usuário deletado: %s", usuario_id)
         
         return None
         
@@ -258,58 +725,123 @@ async def deletar_usuario(
 # Estatísticas
 # ============================================================================
 
-@router.get("/estatisticas")
+@router.get("/estatisticas", dependencies=[Depends(limitar(ClasseLimite.LEITURA))])
 async def obter_estatisticas(
     usuario_atual: PerfilUsuario = Depends(obter_admin_empresa),
     supabase: Client = Depends(obter_supabase)
 ):
     """
     Obter estatísticas gerais da empresa
+    
+    Respondidas pelos contadores em memória, recontados periodicamente no banco
     """
     try:
-        empresa_id = str(usuario_atual.empresa_id)
-        
-        # Contar usuários
-        resposta_usuarios = supabase.table("perfis")\
-            .select("id", count="exact")\
-            .eq("empresa_id", empresa_id)\
-            .execute()
-        
-        total_usuarios = resposta_usuarios.count or 0
+        return await ServicoEstatisticas.obter(supabase, str(usuario_atual.empresa_id))
         
-        # Contar registros do mês atual
-        from datetime import datetime
-        inicio_mes = datetime.utcnow().replace(day=1, hour=0, minute=0, second=0)
-        
-        resposta_registros = supabase.table("registros_ponto")\
-            .select("id", count="exact")\
-            .eq("empresa_id", empresa_id)\
-            .gte("timestamp", inicio_mes.isoformat())\
-            .execute()
-        
-        total_registros_mes = resposta_registros.count or 0
-        
-        # Contar registros hoje
-        inicio_hoje = datetime.utcnow().replace(hour=0, minute=0, second=0)
-        
-        resposta_registros_hoje = supabase.table("registros_ponto")\
-            .select("id", count="exact")\
-            .eq("empresa_id", empresa_id)\
-            .gte("timestamp", inicio_hoje.isoformat())\
-            .execute()
-        
-        total_registros_hoje = resposta_registros_hoje.count or 0
+    except Exception as e:
+        logger.error(f"Erro ao obter estatísticas: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=str(e)
+        )
+
+
+@router.get("/presenca", response_model=RespostaPresenca, dependencies=[Depends(limitar(ClasseLimite.LEITURA))])
+async def obter_presenca(
+    estado: Optional[EstadoPresenca] = None,
+    usuario_atual: PerfilUsuario = Depends(obter_admin_empresa),
+    supabase: Client = Depends(lambda: obter_supabase(usar_service_key=True))
+):
+    """
+    Quem está trabalhando, em intervalo ou ausente agora
+    
+    Respondido pelo índice de presença em memória
+    """
+    try:
+        empresa_id = str(usuario_atual.empresa_id)
+        situacoes = ServicoPresenca.listar(supabase, empresa_id)
+        
+        contagem = {valor: 0 for valor in EstadoPresenca}
+        for _, estado_atual, _ in situacoes:
+            contagem[estado_atual] += 1
+        
+        return RespostaPresenca(
+            empresa_id=empresa_id,
+            trabalhando=contagem[EstadoPresenca.TRABALHANDO],
+            intervalo=contagem[EstadoPresenca.INTERVALO],
+            ausente=contagem[EstadoPresenca.AUSENTE],
+            usuarios=[
+                PresencaUsuario(usuario_id=usuario_id, estado=estado_atual, desde=desde)
+                for usuario_id, estado_atual, desde in situacoes
+                if estado is None or estado_atual == estado
+            ]
+        )
         
-        return {
-            "total_usuarios": total_usuarios,
-            "total_registros_mes": total_registros_mes,
-            "total_registros_hoje": total_registros_hoje,
-            "empresa_id": empresa_id
-        }
+    except Exception as e:
+        logger.error(f"Erro ao obter presença: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=str(e)
+        )
+
+
+@router.get("/anomalias", response_model=PaginaAnomalias, dependencies=[Depends(limitar(ClasseLimite.LEITURA))])
+async def listar_anomalias(
+    data_inicio: Optional[datetime] = Query(None, description="Data inicial (formato ISO)"),
+    data_fim: Optional[datetime] = Query(None, description="Data final (formato ISO)"),
+    tipo: Optional[TipoAnomalia] = None,
+    usuario_id: Optional[str] = Query(None, description="Restringir a um funcionário"),
+    pagina: int = Query(1, ge=1),
+    por_pagina: int = Query(100, ge=1, le=1000),
+    usuario_atual: PerfilUsuario = Depends(obter_admin_empresa),
+    supabase: Client = Depends(lambda: obter_supabase(usar_service_key=True))
+):
+    """
+    Achados da análise de anomalias da empresa, do mais recente ao mais antigo
+    
+    Gerados por POST /tarefas/analise-anomalias
+    """
+    try:
+        return ServicoAnomalias.listar(
+            supabase,
+            str(usuario_atual.empresa_id),
+            data_inicio,
+            data_fim,
+            tipo,
+            usuario_id,
+            pagina,
+            por_pagina
+        )
         
     except Exception as e:
-        logger.error(f"Erro ao obter estatísticas: {str(e)}")
+        logger.error(f"Erro ao listar anomalias: {str(e)}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=str(e)
         )
+
+
+# ============================================================================
+# Eventos em Tempo Real
+# ============================================================================
+
+@router.get("/eventos")
+async def transmitir_eventos(
+    usuario_atual: PerfilUsuario = Depends(obter_admin_empresa)
+):
+    """
+    Feed Server-Sent Events dos registros de ponto da empresa
+    
+    Cada batida (online ou sincronizada do modo offline) é enviada como evento
+    `registro_ponto`; conexões que não consomem os eventos são encerradas
+    """
+    assinatura = ServicoEventos.assinar(str(usuario_atual.empresa_id))
+    
+    return StreamingResponse(
+        ServicoEventos.transmitir(assinatura),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no"
+        }
+    )
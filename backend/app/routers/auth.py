@@ -8,8 +8,11 @@ from app.models.schemas import (
     PerfilUsuario,
     RespostaErro
 )
-from app.models.enums import FuncaoUsuario
-from app.dependencies import obter_usuario_atual, obter_super_admin
+from app.models.enums import FuncaoUsuario, ClasseLimite
+from app.dependencies import obter_usuario_atual, obter_super_admin, limitar
+from app.services.estatisticas_service import ServicoEstatisticas
+from app.services.perfil_service import ServicoPerfis
+from app.services.cache_service import ServicoCache
 import logging
 
 logger = logging.getLogger(__name__)
@@ -118,7 +121,10 @@ async def registrar_usuario(
                 detail="Falha ao criar perfil do usuário"
             )
         
-        logger.info(f"Novo usuário criado: {dados.email}")
+        await ServicoCache.executar(ServicoEstatisticas.ajustar_usuarios, str(dados.empresa_id), 1)
+        await ServicoCache.executar(ServicoPerfis.marcar_alteracao, str(dados.empresa_id))
+        
+        logger.info("Novo usuário criado: %s", dados.email)
         
         return PerfilUsuario(**resposta_perfil.data[0])
         
@@ -132,7 +138,7 @@ async def registrar_usuario(
         )
 
 
-@router.get("/me", response_model=PerfilUsuario)
+@router.get("/me", response_model=PerfilUsuario, dependencies=[Depends(limitar(ClasseLimite.LEITURA))])
 async def obter_meu_perfil(
     usuario: PerfilUsuario = Depends(obter_usuario_atual)
 ):
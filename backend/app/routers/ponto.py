@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, status
 from supabase import Client
 from app.supabase_client import obter_supabase
 from app.models.schemas import (
@@ -7,11 +7,14 @@ from app.models.schemas import (
     RequisicaoSincronizacao,
     RespostaSincronizacao,
     RespostaUltimoPonto,
+    RespostaDeltaRegistros,
     PerfilUsuario
 )
-from app.models.enums import TipoPonto
-from app.dependencies import obter_usuario_atual
+from app.models.enums import TipoPonto, ClasseLimite
+from app.dependencies import obter_usuario_atual, limitar
 from app.services.clock_service import ServicoPonto
+from app.services.lote_offline_service import ServicoLoteOffline
+from app.respostas import RespostaJSONRapida
 from datetime import datetime, timedelta
 from typing import List, Optional
 import logging
@@ -21,7 +24,7 @@ logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/ponto", tags=["Registro de Ponto"])
 
 
-@router.post("/registrar", response_model=RegistroPonto, status_code=status.HTTP_201_CREATED)
+@router.post("/registrar", response_model=RegistroPonto, status_code=status.HTTP_201_CREATED, dependencies=[Depends(limitar(ClasseLimite.PONTO))])
 async def registrar_ponto(
     dados: RequisicaoPonto,
     usuario: PerfilUsuario = Depends(obter_usuario_atual),
@@ -50,7 +53,7 @@ async def registrar_ponto(
         )
 
 
-@router.get("/ultimo", response_model=RespostaUltimoPonto)
+@router.get("/ultimo", response_model=RespostaUltimoPonto, dependencies=[Depends(limitar(ClasseLimite.LEITURA))])
 async def obter_ultimo_registro(
     usuario: PerfilUsuario = Depends(obter_usuario_atual),
     supabase: Client = Depends(obter_supabase)
@@ -102,7 +105,7 @@ async def obter_ultimo_registro(
         )
 
 
-@router.get("/meus-registros", response_model=List[RegistroPonto])
+@router.get("/meus-registros", response_model=List[RegistroPonto], dependencies=[Depends(limitar(ClasseLimite.LEITURA))])
 async def obter_meus_registros(
     dias: int = 7,
     usuario: PerfilUsuario = Depends(obter_usuario_atual),
@@ -118,14 +121,14 @@ async def obter_meus_registros(
         data_inicio = datetime.utcnow() - timedelta(days=dias)
         data_fim = datetime.utcnow()
         
-        registros = await ServicoPonto.obter_registros_usuario(
+        registros = await ServicoPonto.obter_linhas_usuario(
             supabase,
             usuario.id,
             data_inicio,
             data_fim
         )
         
-        return registros
+        return RespostaJSONRapida(registros)
         
     except Exception as e:
         logger.error(f"Erro ao buscar registros: {str(e)}")
@@ -135,7 +138,62 @@ async def obter_meus_registros(
         )
 
 
-@router.post("/sincronizar", response_model=RespostaSincronizacao)
+@router.get("/registros/delta", response_model=RespostaDeltaRegistros, dependencies=[Depends(limitar(ClasseLimite.LEITURA))])
+async def obter_delta_registros(
+    cursor: Optional[str] = None,
+    dias: int = 30,
+    limite: Optional[int] = None,
+    usuario: PerfilUsuario = Depends(obter_usuario_atual),
+    supabase: Client = Depends(obter_supabase)
+):
+    """
+    Obter registros do próprio usuário criados ou alterados desde o cursor
+    
+    Sem cursor devolve os registros alterados nos últimos `dias` dias. A
+    resposta traz o cursor da próxima consulta; se tem_mais for verdadeiro,
+    consultar de novo imediatamente. Registros podem se repetir entre
+    respostas e devem ser mesclados por id.
+    
+    Args:
+        cursor: Cursor devolvido pela consulta anterior
+        dias: Janela da carga inicial (padrão: 30)
+        limite: Registros por resposta (máximo: SINCRONIZACAO_DELTA_MAX_REGISTROS)
+    """
+    if limite is not None and limite < 1:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="limite deve ser positivo"
+        )
+    
+    try:
+        registros, proximo, tem_mais = await ServicoPonto.obter_delta_usuario(
+            supabase,
+            usuario.id,
+            cursor,
+            dias,
+            limite
+        )
+        
+        return RespostaJSONRapida({
+            "registros": registros,
+            "cursor": proximo,
+            "tem_mais": tem_mais
+        })
+        
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    except Exception as e:
+        logger.error(f"Erro ao buscar registros alterados: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=str(e)
+        )
+
+
+@router.post("/sincronizar", response_model=RespostaSincronizacao, dependencies=[Depends(limitar(ClasseLimite.PONTO))])
 async def sincronizar_registros_offline(
     dados: RequisicaoSincronizacao,
     usuario: PerfilUsuario = Depends(obter_usuario_atual),
@@ -163,7 +221,50 @@ async def sincronizar_registros_offline(
         )
 
 
-@router.get("/registros-usuario/{usuario_id}", response_model=List[RegistroPonto])
+@router.post("/sincronizar/lote", response_model=RespostaSincronizacao, dependencies=[Depends(limitar(ClasseLimite.PONTO))])
+async def sincronizar_lote_offline(
+    request: Request,
+    usuario: PerfilUsuario = Depends(obter_usuario_atual),
+    supabase: Client = Depends(obter_supabase)
+):
+    """
+    Sincronizar registros offline enviados como lote binário
+    
+    Alternativa a /ponto/sincronizar com fotos em bytes (sem base64) e corpo
+    opcionalmente comprimido (Content-Encoding: gzip). Os quadros são lidos
+    e registrados à medida que chegam.
+    """
+    codificacao = request.headers.get("content-encoding", "identity").strip().lower()
+    if codificacao not in ("identity", "gzip"):
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail="Content-Encoding não suportado (use gzip ou nenhum)"
+        )
+    
+    try:
+        resultado = await ServicoLoteOffline.sincronizar(
+            supabase,
+            usuario,
+            request.stream(),
+            comprimido=codificacao == "gzip"
+        )
+        
+        return RespostaSincronizacao(**resultado)
+        
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    except Exception as e:
+        logger.error(f"Erro na sincronização do lote: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Erro ao sincronizar registros: {str(e)}"
+        )
+
+
+@router.get("/registros-usuario/{usuario_id}", response_model=List[RegistroPonto], dependencies=[Depends(limitar(ClasseLimite.LEITURA))])
 async def obter_registros_usuario(
     usuario_id: str,
     data_inicio: Optional[str] = None,
@@ -208,14 +309,14 @@ async def obter_registros_usuario(
     fim = datetime.fromisoformat(data_fim) if data_fim else datetime.utcnow()
     
     try:
-        registros = await ServicoPonto.obter_registros_usuario(
+        registros = await ServicoPonto.obter_linhas_usuario(
             supabase,
             usuario_id,
             inicio,
             fim
         )
         
-        return registros
+        return RespostaJSONRapida(registros)
         
     except Exception as e:
         logger.error(f"Erro ao buscar registros: {str(e)}")
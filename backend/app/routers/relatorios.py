@@ -4,26 +4,30 @@ from app.supabase_client import obter_supabase
 from app.models.schemas import (
     RelatorioFuncionario,
     DadosFolhaPagamento,
+    SaldoBancoHoras,
     PerfilUsuario
 )
-from app.models.enums import FuncaoUsuario
-from app.dependencies import obter_usuario_atual, obter_admin_empresa
+from app.models.enums import FuncaoUsuario, ClasseLimite
+from app.dependencies import obter_usuario_atual, obter_admin_empresa, limitar
 from app.services.relatorio_service import ServicoRelatorio
 from app.services.folha_service import ServicoFolha
-from datetime import datetime, timedelta
-from typing import List
+from app.services.exportacao_service import ServicoExportacao
+from app.services.banco_horas_service import ServicoBancoHoras
+from app.services.replica_service import ServicoReplica
+from app.respostas import RespostaJSONRapida
+from datetime import date, datetime, timedelta
+from typing import List, Optional
 import logging
-import csv
-import io
-from fastapi.responses import StreamingResponse
+from fastapi.responses import StreamingResponse, Response
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/relatorios", tags=["Relatórios"])
 
 
-@router.get("/espelho-ponto", response_model=RelatorioFuncionario)
+@router.get("/espelho-ponto", response_model=RelatorioFuncionario, dependencies=[Depends(limitar(ClasseLimite.RELATORIO))])
 async def obter_espelho_ponto(
+    response: Response,
     usuario_id: str = Query(..., description="ID do usuário"),
     data_inicio: str = Query(..., description="Data inicial (formato ISO)"),
     data_fim: str = Query(..., description="Data final (formato ISO)"),
@@ -69,6 +73,7 @@ async def obter_espelho_ponto(
             fim
         )
         
+        response.headers.update(ServicoReplica.cabecalhos())
         return espelho
         
     except ValueError as e:
@@ -84,8 +89,9 @@ async def obter_espelho_ponto(
         )
 
 
-@router.get("/folha-pagamento", response_model=DadosFolhaPagamento)
+@router.get("/folha-pagamento", response_model=DadosFolhaPagamento, dependencies=[Depends(limitar(ClasseLimite.RELATORIO))])
 async def obter_dados_folha(
+    response: Response,
     usuario_id: str = Query(..., description="ID do usuário"),
     data_inicio: str = Query(..., description="Data inicial (formato ISO)"),
     data_fim: str = Query(..., description="Data final (formato ISO)"),
@@ -122,8 +128,14 @@ async def obter_dados_folha(
             fim
         )
         
+        response.headers.update(ServicoReplica.cabecalhos())
         return dados_folha
         
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=str(e)
+        )
     except Exception as e:
         logger.error(f"Erro ao calcular folha: {str(e)}")
         raise HTTPException(
@@ -132,7 +144,99 @@ async def obter_dados_folha(
         )
 
 
-@router.get("/empresa/registros")
+@router.get("/banco-horas", response_model=SaldoBancoHoras, dependencies=[Depends(limitar(ClasseLimite.LEITURA))])
+async def obter_banco_horas(
+    usuario_id: str = Query(..., description="ID do usuário"),
+    usuario_atual: PerfilUsuario = Depends(obter_usuario_atual),
+    supabase: Client = Depends(obter_supabase)
+):
+    """
+    Obter saldo do banco de horas de um funcionário
+    
+    O saldo inclui os dias já fechados (ver POST /relatorios/banco-horas/fechar)
+    Funcionários podem ver apenas o próprio saldo
+    """
+    if str(usuario_atual.id) != usuario_id:
+        if usuario_atual.funcao == FuncaoUsuario.FUNCIONARIO:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="Você só pode ver seu próprio banco de horas"
+            )
+        
+        if usuario_atual.funcao == FuncaoUsuario.ADMIN_EMPRESA:
+            perfil_response = supabase.table("perfis")\
+                .select("empresa_id")\
+                .eq("id", usuario_id)\
+                .single()\
+                .execute()
+            
+            if not perfil_response.data or perfil_response.data["empresa_id"] != str(usuario_atual.empresa_id):
+                raise HTTPException(
+                    status_code=status.HTTP_403_FORBIDDEN,
+                    detail="Você só pode ver dados da sua empresa"
+                )
+    
+    try:
+        saldo = await ServicoBancoHoras.obter_saldo(supabase, usuario_id)
+        
+        if not saldo:
+            return SaldoBancoHoras(usuario_id=usuario_id)
+        
+        return SaldoBancoHoras(
+            usuario_id=saldo["usuario_id"],
+            saldo_minutos=saldo["saldo_minutos"],
+            saldo_horas=round(saldo["saldo_minutos"] / 60, 2),
+            ultimo_dia_fechado=saldo["ultimo_dia_fechado"],
+            atualizado_em=saldo.get("atualizado_em")
+        )
+        
+    except Exception as e:
+        logger.error(f"Erro ao obter banco de horas: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=str(e)
+        )
+
+
+@router.post("/banco-horas/fechar", dependencies=[Depends(limitar(ClasseLimite.RELATORIO))])
+async def fechar_banco_horas(
+    ate: Optional[str] = Query(None, description="Último dia a fechar (formato ISO, padrão: ontem)"),
+    usuario_atual: PerfilUsuario = Depends(obter_admin_empresa),
+    supabase: Client = Depends(lambda: obter_supabase(usar_service_key=True))
+):
+    """
+    Fechar dias pendentes do banco de horas de todos os funcionários da empresa
+    
+    Processa apenas os dias após o último fechamento de cada funcionário
+    """
+    try:
+        data_limite = date.fromisoformat(ate) if ate else None
+        
+        if data_limite and data_limite >= datetime.utcnow().date():
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Só é possível fechar dias já encerrados"
+            )
+        
+        processados = await ServicoBancoHoras.fechar_dias_empresa(
+            supabase,
+            str(usuario_atual.empresa_id),
+            data_limite
+        )
+        
+        return {"funcionarios_processados": processados}
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Erro ao fechar banco de horas: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=str(e)
+        )
+
+
+@router.get("/empresa/registros", dependencies=[Depends(limitar(ClasseLimite.RELATORIO))])
 async def obter_registros_empresa(
     data_inicio: str = Query(..., description="Data inicial (formato ISO)"),
     data_fim: str = Query(..., description="Data final (formato ISO)"),
@@ -159,7 +263,10 @@ async def obter_registros_empresa(
             fim
         )
         
-        return {"registros": registros, "total": len(registros)}
+        return RespostaJSONRapida(
+            {"registros": registros, "total": len(registros)},
+            headers=ServicoReplica.cabecalhos()
+        )
         
     except Exception as e:
         logger.error(f"Erro ao buscar registros da empresa: {str(e)}")
@@ -169,18 +276,77 @@ async def obter_registros_empresa(
         )
 
 
-@router.get("/empresa/folha/exportar")
+@router.get("/empresa/espelhos-ponto", dependencies=[Depends(limitar(ClasseLimite.RELATORIO))])
+async def obter_espelhos_empresa(
+    data_inicio: str = Query(..., description="Data inicial (formato ISO)"),
+    data_fim: str = Query(..., description="Data final (formato ISO)"),
+    usuario_atual: PerfilUsuario = Depends(obter_admin_empresa),
+    supabase: Client = Depends(obter_supabase)
+):
+    """
+    Espelhos de ponto de todos os funcionários da empresa (NDJSON, um por linha)
+    
+    Os registros do período são lidos uma única vez e cada espelho é enviado
+    assim que fica pronto
+    """
+    try:
+        inicio = datetime.fromisoformat(data_inicio)
+        fim = datetime.fromisoformat(data_fim)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    
+    empresa_id = str(usuario_atual.empresa_id)
+    espelhos = ServicoRelatorio.gerar_espelhos_empresa(supabase, empresa_id, inicio, fim)
+    
+    try:
+        # Primeiro espelho antes da resposta: erros iniciais viram 500 e a origem dos dados fica definida
+        primeiro = await espelhos.__anext__()
+    except StopAsyncIteration:
+        primeiro = None
+    except Exception as e:
+        logger.error(f"Erro ao gerar espelhos da empresa: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=str(e)
+        )
+    
+    async def linhas():
+        if primeiro is None:
+            return
+        yield primeiro.model_dump_json().encode("utf-8") + b"\n"
+        try:
+            async for espelho in espelhos:
+                yield espelho.model_dump_json().encode("utf-8") + b"\n"
+        except Exception as e:
+            # Status já enviado: a resposta termina incompleta
+            logger.error(f"Erro ao gerar espelhos da empresa: {str(e)}")
+            raise
+    
+    return StreamingResponse(
+        linhas(),
+        media_type="application/x-ndjson",
+        headers={
+            "Content-Disposition": f"attachment; filename=espelhos_{empresa_id}_{inicio.strftime('%Y%m%d')}_{fim.strftime('%Y%m%d')}.ndjson",
+            **ServicoReplica.cabecalhos()
+        }
+    )
+
+
+@router.get("/empresa/folha/exportar", dependencies=[Depends(limitar(ClasseLimite.RELATORIO))])
 async def exportar_folha_empresa(
     data_inicio: str = Query(..., description="Data inicial (formato ISO)"),
     data_fim: str = Query(..., description="Data final (formato ISO)"),
-    formato: str = Query("csv", description="Formato: csv ou json"),
+    formato: str = Query("csv", description="Formato: csv, json, parquet ou arrow"),
     usuario_atual: PerfilUsuario = Depends(obter_admin_empresa),
     supabase: Client = Depends(obter_supabase)
 ):
     """
     Exportar dados de folha de toda a empresa
     
-    Formatos disponíveis: CSV ou JSON
+    Formatos disponíveis: CSV, JSON, Parquet ou Arrow IPC
     """
     try:
         inicio = datetime.fromisoformat(data_inicio)
@@ -195,52 +361,40 @@ async def exportar_folha_empresa(
             fim
         )
         
-        if formato.lower() == "csv":
-            # Gerar CSV
-            saida = io.StringIO()
-            escritor = csv.writer(saida)
-            
-            # Cabeçalho
-            escritor.writerow([
-                "Nome",
-                "Email",
-                "Código Funcionário",
-                "Período Início",
-                "Período Fim",
-                "Horas Regulares",
-                "Horas Extras",
-                "Total Horas",
-                "Faltas",
-                "Atrasos"
-            ])
-            
-            # Dados
-            for item in dados:
-                escritor.writerow([
-                    item.nome_usuario,
-                    "",  # Email não está no schema
-                    item.codigo_funcionario or "",
-                    item.inicio_periodo,
-                    item.fim_periodo,
-                    f"{item.horas_regulares:.2f}",
-                    f"{item.horas_extras:.2f}",
-                    f"{item.total_horas:.2f}",
-                    item.faltas,
-                    item.atrasos
-                ])
+        if ServicoExportacao.formato_suportado(formato):
+            # Gerar arquivo colunar direto dos buffers por coluna
+            media_type, extensao = ServicoExportacao.FORMATOS_COLUNARES[formato.lower()]
+            conteudo = ServicoExportacao.serializar(
+                ServicoExportacao.tabela_folha(dados),
+                formato
+            )
             
-            saida.seek(0)
+            return Response(
+                content=conteudo,
+                media_type=media_type,
+                headers={
+                    "Content-Disposition": f"attachment; filename=folha_{empresa_id}_{inicio.strftime('%Y%m%d')}_{fim.strftime('%Y%m%d')}.{extensao}",
+                    **ServicoReplica.cabecalhos()
+                }
+            )
+        elif formato.lower() == "csv":
+            # Gerar CSV
+            conteudo = ServicoExportacao.folha_csv(dados)
             
             return StreamingResponse(
-                iter([saida.getvalue()]),
+                iter([conteudo]),
                 media_type="text/csv",
                 headers={
-                    "Content-Disposition": f"attachment; filename=folha_{empresa_id}_{inicio.strftime('%Y%m%d')}_{fim.strftime('%Y%m%d')}.csv"
+                    "Content-Disposition": f"attachment; filename=folha_{empresa_id}_{inicio.strftime('%Y%m%d')}_{fim.strftime('%Y%m%d')}.csv",
+                    **ServicoReplica.cabecalhos()
                 }
             )
         else:
             # Retornar JSON
-            return {"dados": [item.dict() for item in dados]}
+            return RespostaJSONRapida(
+                {"dados": [item.dict() for item in dados]},
+                headers=ServicoReplica.cabecalhos()
+            )
         
     except Exception as e:
         logger.error(f"Erro ao exportar folha: {str(e)}")
@@ -248,3 +402,57 @@ async def exportar_folha_empresa(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=str(e)
         )
+
+
+@router.get("/empresa/registros/exportar", dependencies=[Depends(limitar(ClasseLimite.RELATORIO))])
+async def exportar_registros_empresa(
+    data_inicio: str = Query(..., description="Data inicial (formato ISO)"),
+    data_fim: str = Query(..., description="Data final (formato ISO)"),
+    formato: str = Query("parquet", description="Formato: parquet ou arrow"),
+    usuario_atual: PerfilUsuario = Depends(obter_admin_empresa),
+    supabase: Client = Depends(obter_supabase)
+):
+    """
+    Exportar registros de ponto brutos da empresa em formato colunar
+    
+    Formatos disponíveis: Parquet ou Arrow IPC
+    """
+    if not ServicoExportacao.formato_suportado(formato):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Formato inválido. Use parquet ou arrow"
+        )
+    
+    try:
+        inicio = datetime.fromisoformat(data_inicio)
+        fim = datetime.fromisoformat(data_fim)
+        
+        empresa_id = str(usuario_atual.empresa_id)
+        
+        linhas = await ServicoExportacao.obter_registros_brutos(
+            supabase,
+            empresa_id,
+            inicio,
+            fim
+        )
+        
+        media_type, extensao = ServicoExportacao.FORMATOS_COLUNARES[formato.lower()]
+        conteudo = ServicoExportacao.serializar(
+            ServicoExportacao.tabela_registros(linhas),
+            formato
+        )
+        
+        return Response(
+            content=conteudo,
+            media_type=media_type,
+            headers={
+                "Content-Disposition": f"attachment; filename=registros_{empresa_id}_{inicio.strftime('%Y%m%d')}_{fim.strftime('%Y%m%d')}.{extensao}"
+            }
+        )
+        
+    except Exception as e:
+        logger.error(f"Erro ao exportar registros: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=str(e)
+        )
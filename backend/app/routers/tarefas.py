@@ -0,0 +1,225 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import FileResponse
+from supabase import Client
+from app.supabase_client import obter_supabase
+from app.models.schemas import (
+    RequisicaoTarefa,
+    RespostaTarefa,
+    PerfilUsuario
+)
+from app.models.enums import FuncaoUsuario, StatusTarefa, TipoTarefa, ClasseLimite
+from app.dependencies import obter_admin_empresa, limitar
+from app.services.tarefa_service import ServicoTarefas
+from app.config import settings
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/tarefas", tags=["Tarefas em Segundo Plano"])
+
+
+def _obter_tarefa_autorizada(tarefa_id: str, usuario_atual: PerfilUsuario) -> Dict:
+    """Obter tarefa verificando se pertence à empresa do usuário"""
+    meta = ServicoTarefas.obter(tarefa_id)
+
+    if not meta:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Tarefa não encontrada ou expirada"
+        )
+
+    if usuario_atual.funcao != FuncaoUsuario.SUPER_ADMIN and meta["empresa_id"] != str(usuario_atual.empresa_id):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Você só pode acessar tarefas da sua empresa"
+        )
+
+    return meta
+
+
+@router.post("", response_model=RespostaTarefa, status_code=status.HTTP_202_ACCEPTED, dependencies=[Depends(limitar(ClasseLimite.RELATORIO))])
+async def submeter_tarefa(
+    dados: RequisicaoTarefa,
+    usuario_atual: PerfilUsuario = Depends(obter_admin_empresa),
+    supabase: Client = Depends(obter_supabase)
+):
+    """
+    Submeter exportação ou lote de espelhos de ponto para execução em segundo plano
+
+    Retorna imediatamente o ID da tarefa; acompanhe por GET /tarefas/{id}
+    """
+    if dados.tipo in (TipoTarefa.LIMPEZA_FOTOS, TipoTarefa.REMOCAO_EMPRESA, TipoTarefa.ANALISE_ANOMALIAS):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Use POST /tarefas/limpeza-fotos, POST /tarefas/analise-anomalias ou DELETE /admin/empresas/{id} para este tipo de tarefa"
+        )
+    
+    try:
+        meta = ServicoTarefas.submeter(
+            supabase,
+            str(usuario_atual.empresa_id),
+            str(usuario_atual.id),
+            dados.tipo,
+            {
+                "data_inicio": dados.data_inicio.isoformat(),
+                "data_fim": dados.data_fim.isoformat(),
+                "formato": dados.formato
+            }
+        )
+
+        return ServicoTarefas.para_resposta(meta)
+
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=str(e)
+        )
+    except Exception as e:
+        logger.error(f"Erro ao submeter tarefa: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=str(e)
+        )
+
+
+@router.post("/limpeza-fotos", response_model=RespostaTarefa, status_code=status.HTTP_202_ACCEPTED, dependencies=[Depends(limitar(ClasseLimite.RELATORIO))])
+async def submeter_limpeza_fotos(
+    dias_retencao: Optional[int] = Query(None, ge=1, description="Manter fotos dos últimos N dias (padrão: FOTOS_RETENCAO_DIAS)"),
+    simular: bool = Query(True, description="Apenas contar o que seria removido"),
+    usuario_id: Optional[str] = Query(None, description="Restringir a um funcionário"),
+    usuario_atual: PerfilUsuario = Depends(obter_admin_empresa),
+    supabase: Client = Depends(lambda: obter_supabase(usar_service_key=True))
+):
+    """
+    Remover em segundo plano as fotos de ponto fora do prazo de retenção
+    
+    Por padrão roda em modo simulação; envie simular=false para remover.
+    O artefato da tarefa é um JSON com as métricas da limpeza
+    """
+    try:
+        antes_de = datetime.now(timezone.utc) - timedelta(days=dias_retencao or settings.fotos_retencao_dias)
+        
+        meta = ServicoTarefas.submeter(
+            supabase,
+            str(usuario_atual.empresa_id),
+            str(usuario_atual.id),
+            TipoTarefa.LIMPEZA_FOTOS,
+            {
+                "antes_de": antes_de.isoformat(),
+                "simular": simular,
+                "usuario_id": usuario_id
+            }
+        )
+        
+        return ServicoTarefas.para_resposta(meta)
+        
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=str(e)
+        )
+    except Exception as e:
+        logger.error(f"Erro ao submeter limpeza de fotos: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=str(e)
+        )
+
+
+@router.post("/analise-anomalias", response_model=RespostaTarefa, status_code=status.HTTP_202_ACCEPTED, dependencies=[Depends(limitar(ClasseLimite.RELATORIO))])
+async def submeter_analise_anomalias(
+    data_inicio: datetime = Query(..., description="Data inicial (formato ISO)"),
+    data_fim: datetime = Query(..., description="Data final (formato ISO)"),
+    usuario_atual: PerfilUsuario = Depends(obter_admin_empresa),
+    supabase: Client = Depends(lambda: obter_supabase(usar_service_key=True))
+):
+    """
+    Analisar em segundo plano os registros da empresa no período
+    
+    Os achados substituem os do mesmo período e são consultados em
+    GET /admin/anomalias. O artefato da tarefa é um JSON com o resumo
+    """
+    if data_fim < data_inicio:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="data_fim deve ser posterior a data_inicio"
+        )
+    
+    try:
+        meta = ServicoTarefas.submeter(
+            supabase,
+            str(usuario_atual.empresa_id),
+            str(usuario_atual.id),
+            TipoTarefa.ANALISE_ANOMALIAS,
+            {
+                "data_inicio": data_inicio.isoformat(),
+                "data_fim": data_fim.isoformat()
+            }
+        )
+        
+        return ServicoTarefas.para_resposta(meta)
+        
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=str(e)
+        )
+    except Exception as e:
+        logger.error(f"Erro ao submeter análise de anomalias: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=str(e)
+        )
+
+
+@router.get("", response_model=List[RespostaTarefa], dependencies=[Depends(limitar(ClasseLimite.LEITURA))])
+async def listar_tarefas(
+    usuario_atual: PerfilUsuario = Depends(obter_admin_empresa)
+):
+    """
+    Listar tarefas não expiradas da empresa
+    """
+    return [ServicoTarefas.para_resposta(meta) for meta in ServicoTarefas.listar(str(usuario_atual.empresa_id))]
+
+
+@router.get("/{tarefa_id}", response_model=RespostaTarefa, dependencies=[Depends(limitar(ClasseLimite.LEITURA))])
+async def obter_tarefa(
+    tarefa_id: str,
+    usuario_atual: PerfilUsuario = Depends(obter_admin_empresa)
+):
+    """
+    Consultar estado e progresso de uma tarefa
+    """
+    return ServicoTarefas.para_resposta(_obter_tarefa_autorizada(tarefa_id, usuario_atual))
+
+
+@router.get("/{tarefa_id}/download", dependencies=[Depends(limitar(ClasseLimite.LEITURA))])
+async def baixar_artefato(
+    tarefa_id: str,
+    usuario_atual: PerfilUsuario = Depends(obter_admin_empresa)
+):
+    """
+    Baixar o artefato gerado por uma tarefa concluída
+    """
+    meta = _obter_tarefa_autorizada(tarefa_id, usuario_atual)
+
+    if meta["status"] != StatusTarefa.CONCLUIDA.value:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Tarefa ainda não concluída (status: {meta['status']})"
+        )
+
+    caminho = ServicoTarefas.caminho_artefato(meta)
+    if not caminho.exists():
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Artefato não encontrado ou expirado"
+        )
+
+    return FileResponse(
+        caminho,
+        media_type=meta["media_type"],
+        filename=meta["nome_arquivo"]
+    )
@@ -0,0 +1,325 @@
+from supabase import Client
+from postgrest.types import ReturnMethod
+from app.config import settings
+from app.models.enums import TipoAnomalia, TipoPonto
+from app.services.exportacao_service import ServicoExportacao
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, List, Optional
+import math
+import pyarrow as pa
+import pyarrow.compute as pc
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Raio médio da Terra (metros)
+RAIO_TERRA_METROS = 6371008.8
+
+
+class ServicoAnomalias:
+    """
+    Análise em lote dos registros de ponto de uma empresa
+
+    Os registros do período são lidos uma vez, montados em uma tabela Arrow
+    e ordenados por (usuario_id, timestamp). As regras são avaliadas sobre
+    pares de registros consecutivos (a coluna comparada com ela mesma
+    deslocada de uma posição) com pyarrow.compute, sem laço por usuário.
+    Só os achados são convertidos para objetos Python e gravados em
+    anomalias_ponto.
+    """
+
+    TAMANHO_LOTE_GRAVACAO = 1000
+
+    @staticmethod
+    def _haversine(lat1: pa.Array, lon1: pa.Array, lat2: pa.Array, lon2: pa.Array) -> pa.Array:
+        """Distância em metros entre pares de pontos (nula se faltar coordenada)"""
+        radiano = math.pi / 180
+        fi1 = pc.multiply(lat1, radiano)
+        fi2 = pc.multiply(lat2, radiano)
+        meio_delta_fi = pc.multiply(pc.subtract(fi2, fi1), 0.5)
+        meio_delta_lambda = pc.multiply(pc.subtract(lon2, lon1), radiano / 2)
+
+        a = pc.add(
+            pc.power(pc.sin(meio_delta_fi), 2),
+            pc.multiply(pc.multiply(pc.cos(fi1), pc.cos(fi2)), pc.power(pc.sin(meio_delta_lambda), 2))
+        )
+        return pc.multiply(pc.asin(pc.min_element_wise(pc.sqrt(a), 1.0, skip_nulls=False)), 2 * RAIO_TERRA_METROS)
+
+    @staticmethod
+    def analisar(tabela: pa.Table, inicio: datetime, fim: datetime, referencia: datetime) -> List[Dict]:
+        """
+        Encontrar anomalias nos registros
+
+        Args:
+            tabela: Registros no schema ServicoExportacao.SCHEMA_REGISTROS
+            inicio: Início do período analisado (achados antes dele são ignorados)
+            fim: Fim do período analisado (registros depois dele servem só de contexto)
+            referencia: Instante até o qual há registros (intervalos e jornadas
+                abertos há mais tempo que o limite são anomalias)
+
+        Returns:
+            Achados: usuario_id, registro_id, tipo, timestamp, detalhes
+        """
+        n = tabela.num_rows
+        if n == 0:
+            return []
+
+        tabela = tabela.sort_by([("usuario_id", "ascending"), ("timestamp", "ascending"), ("id", "ascending")])
+
+        ids = tabela["id"].combine_chunks()
+        usuarios = tabela["usuario_id"].combine_chunks()
+        tipos = tabela["tipo_registro"].combine_chunks().cast(pa.string())
+        instantes = tabela["timestamp"].combine_chunks().cast(pa.int64())  # microssegundos
+        latitudes = tabela["latitude"].combine_chunks()
+        longitudes = tabela["longitude"].combine_chunks()
+
+        def anterior(coluna: pa.Array) -> pa.Array:
+            return coluna.slice(0, n - 1)
+
+        def atual(coluna: pa.Array) -> pa.Array:
+            return coluna.slice(1)
+
+        # ---- Pares consecutivos (anterior, atual) do mesmo usuário: n - 1 posições
+        mesmo_usuario = pc.equal(atual(usuarios), anterior(usuarios))
+        segundos = pc.divide(pc.subtract(atual(instantes), anterior(instantes)).cast(pa.float64()), 1_000_000)
+
+        duplicado = pc.and_(
+            pc.and_(mesmo_usuario, pc.equal(atual(tipos), anterior(tipos))),
+            pc.less_equal(segundos, settings.anomalias_janela_duplicado_segundos)
+        )
+
+        distancia = ServicoAnomalias._haversine(
+            anterior(latitudes), anterior(longitudes), atual(latitudes), atual(longitudes)
+        )
+        velocidade_kmh = pc.multiply(pc.divide(distancia, pc.max_element_wise(segundos, 1.0)), 3.6)
+        deslocamento = pc.and_(
+            pc.and_(mesmo_usuario, pc.invert(duplicado)),
+            pc.and_(
+                pc.greater_equal(distancia, settings.anomalias_distancia_minima_metros),
+                pc.greater(velocidade_kmh, settings.anomalias_velocidade_maxima_kmh)
+            )
+        )
+
+        # ---- Por registro (n posições): próximo registro do mesmo usuário
+        ultimo = pa.concat_arrays([pc.invert(mesmo_usuario), pa.array([True])])
+        proximo_tipo = pa.concat_arrays([
+            pc.if_else(mesmo_usuario, atual(tipos), pa.scalar(None, pa.string())),
+            pa.array([None], pa.string())
+        ])
+        # Próximo registro é duplicata deste: a anomalia já é contada como duplicado
+        proximo_duplicado = pa.concat_arrays([duplicado, pa.array([False])])
+        aberto_ha = pc.divide(
+            pc.subtract(pa.scalar(int(referencia.timestamp() * 1_000_000), pa.int64()), instantes).cast(pa.float64()),
+            3_600_000_000
+        )
+
+        def sem_fechamento(tipos_abertura: List[str], fechamento: List[str], limite_horas: float) -> pa.Array:
+            """Abertura seguida de outra coisa que não o fechamento, ou em aberto há mais que o limite"""
+            abertura = pc.is_in(tipos, value_set=pa.array(tipos_abertura))
+            seguido_errado = pc.and_(
+                pc.and_(pc.invert(ultimo), pc.invert(proximo_duplicado)),
+                pc.invert(pc.is_in(proximo_tipo, value_set=pa.array(fechamento)))
+            )
+            expirado = pc.and_(ultimo, pc.greater(aberto_ha, limite_horas))
+            return pc.and_(abertura, pc.or_(seguido_errado, expirado))
+
+        intervalo_aberto = sem_fechamento(
+            [TipoPonto.INICIO_INTERVALO.value],
+            [TipoPonto.FIM_INTERVALO.value],
+            settings.anomalias_intervalo_maximo_horas
+        )
+        saida_ausente = sem_fechamento(
+            [TipoPonto.ENTRADA.value, TipoPonto.FIM_INTERVALO.value],
+            [TipoPonto.SAIDA.value, TipoPonto.INICIO_INTERVALO.value],
+            settings.anomalias_jornada_maxima_horas
+        )
+
+        # ---- Achados: só aqui os valores viram objetos Python
+        no_periodo = pc.and_(
+            pc.greater_equal(instantes, pa.scalar(int(inicio.timestamp() * 1_000_000), pa.int64())),
+            pc.less_equal(instantes, pa.scalar(int(fim.timestamp() * 1_000_000), pa.int64()))
+        )
+        achados: List[Dict] = []
+
+        def coletar(mascara: pa.Array, deslocado: bool, tipo: TipoAnomalia, detalhes: Callable[[Dict], Dict]) -> None:
+            # Máscaras de pares apontam para o registro atual (posição + 1)
+            if deslocado:
+                mascara = pa.concat_arrays([pa.array([False]), mascara])
+            mascara = pc.fill_null(pc.and_(mascara, no_periodo), False)
+            posicoes = pc.indices_nonzero(mascara)
+            if not len(posicoes):
+                return
+
+            colunas = {
+                "registro_id": pc.take(ids, posicoes),
+                "usuario_id": pc.take(usuarios, posicoes),
+                "timestamp": pc.take(tabela["timestamp"].combine_chunks(), posicoes),
+            }
+            if deslocado:
+                pares = pc.subtract(posicoes, 1)
+                colunas["registro_anterior_id"] = pc.take(ids, pares)
+                colunas["segundos"] = pc.take(segundos, pares)
+                colunas["distancia_metros"] = pc.take(distancia, pares)
+                colunas["velocidade_kmh"] = pc.take(velocidade_kmh, pares)
+            else:
+                colunas["proximo_tipo"] = pc.take(proximo_tipo, posicoes)
+                colunas["aberto_horas"] = pc.take(aberto_ha, posicoes)
+
+            for linha in pa.table(colunas).to_pylist():
+                achados.append({
+                    "usuario_id": linha["usuario_id"],
+                    "registro_id": linha["registro_id"],
+                    "tipo": tipo.value,
+                    "timestamp": linha["timestamp"].isoformat(),
+                    "detalhes": detalhes(linha)
+                })
+
+        coletar(duplicado, True, TipoAnomalia.REGISTRO_DUPLICADO, lambda linha: {
+            "registro_anterior_id": linha["registro_anterior_id"],
+            "segundos": round(linha["segundos"], 1)
+        })
+        coletar(deslocamento, True, TipoAnomalia.DESLOCAMENTO_IMPOSSIVEL, lambda linha: {
+            "registro_anterior_id": linha["registro_anterior_id"],
+            "distancia_metros": round(linha["distancia_metros"]),
+            "segundos": round(linha["segundos"], 1),
+            "velocidade_kmh": round(linha["velocidade_kmh"], 1)
+        })
+        for mascara, tipo in (
+            (intervalo_aberto, TipoAnomalia.INTERVALO_NAO_FECHADO),
+            (saida_ausente, TipoAnomalia.SAIDA_AUSENTE)
+        ):
+            coletar(mascara, False, tipo, lambda linha: (
+                {"proximo_tipo": linha["proximo_tipo"]}
+                if linha["proximo_tipo"]
+                else {"aberto_horas": round(linha["aberto_horas"], 1)}
+            ))
+
+        return achados
+
+    @staticmethod
+    async def analisar_empresa(
+        supabase: Client,
+        empresa_id: str,
+        data_inicio: datetime,
+        data_fim: datetime,
+        progresso: Optional[Callable[[float], None]] = None
+    ) -> Dict:
+        """
+        Analisar os registros da empresa no período e substituir os achados gravados
+
+        Args:
+            supabase: Cliente Supabase (service key)
+            empresa_id: ID da empresa
+            data_inicio: Data inicial
+            data_fim: Data final
+            progresso: Callback opcional com a fração concluída (0 a 1)
+
+        Returns:
+            Resumo: registros analisados e achados por tipo
+        """
+        if data_inicio.tzinfo is None:
+            data_inicio = data_inicio.replace(tzinfo=timezone.utc)
+        if data_fim.tzinfo is None:
+            data_fim = data_fim.replace(tzinfo=timezone.utc)
+
+        # Registros após o fim mostram se intervalos e jornadas do fim do período foram fechados
+        margem = timedelta(hours=max(settings.anomalias_jornada_maxima_horas, settings.anomalias_intervalo_maximo_horas))
+        referencia = min(data_fim + margem, datetime.now(timezone.utc))
+
+        linhas = await ServicoExportacao.obter_registros_brutos(supabase, empresa_id, data_inicio, referencia)
+        if progresso:
+            progresso(0.6)
+
+        achados = ServicoAnomalias.analisar(ServicoExportacao.tabela_registros(linhas), data_inicio, data_fim, referencia)
+        if progresso:
+            progresso(0.7)
+
+        ServicoAnomalias.salvar(supabase, empresa_id, data_inicio, data_fim, achados)
+        if progresso:
+            progresso(1.0)
+
+        por_tipo = {tipo.value: 0 for tipo in TipoAnomalia}
+        for achado in achados:
+            por_tipo[achado["tipo"]] += 1
+
+        logger.info(
+            "Análise de anomalias: empresa=%s, registros=%s, achados=%s",
+            empresa_id, len(linhas), len(achados)
+        )
+
+        return {
+            "data_inicio": data_inicio.isoformat(),
+            "data_fim": data_fim.isoformat(),
+            "registros_analisados": len(linhas),
+            "anomalias": len(achados),
+            "por_tipo": por_tipo
+        }
+
+    @staticmethod
+    def salvar(supabase: Client, empresa_id: str, data_inicio: datetime, data_fim: datetime, achados: List[Dict]) -> None:
+        """
+        Substituir os achados da empresa no período (uma nova análise refaz o período)
+
+        Args:
+            supabase: Cliente Supabase (service key)
+            empresa_id: ID da empresa
+            data_inicio: Data inicial
+            data_fim: Data final
+            achados: Achados de analisar
+        """
+        supabase.table("anomalias_ponto")\
+            .delete(returning=ReturnMethod.minimal)\
+            .eq("empresa_id", str(empresa_id))\
+            .gte("timestamp", data_inicio.isoformat())\
+            .lte("timestamp", data_fim.isoformat())\
+            .execute()
+
+        for inicio in range(0, len(achados), ServicoAnomalias.TAMANHO_LOTE_GRAVACAO):
+            lote = achados[inicio:inicio + ServicoAnomalias.TAMANHO_LOTE_GRAVACAO]
+            supabase.table("anomalias_ponto")\
+                .insert([{**achado, "empresa_id": str(empresa_id)} for achado in lote], returning=ReturnMethod.minimal)\
+                .execute()
+
+    @staticmethod
+    def listar(
+        supabase: Client,
+        empresa_id: str,
+        data_inicio: Optional[datetime] = None,
+        data_fim: Optional[datetime] = None,
+        tipo: Optional[TipoAnomalia] = None,
+        usuario_id: Optional[str] = None,
+        pagina: int = 1,
+        por_pagina: int = 100
+    ) -> Dict:
+        """
+        Listar achados gravados, do mais recente ao mais antigo
+
+        Returns:
+            Dicionário com anomalias, total, pagina e por_pagina
+        """
+        consulta = supabase.table("anomalias_ponto")\
+            .select("*", count="exact")\
+            .eq("empresa_id", str(empresa_id))
+
+        if data_inicio:
+            consulta = consulta.gte("timestamp", data_inicio.isoformat())
+        if data_fim:
+            consulta = consulta.lte("timestamp", data_fim.isoformat())
+        if tipo:
+            consulta = consulta.eq("tipo", tipo.value)
+        if usuario_id:
+            consulta = consulta.eq("usuario_id", str(usuario_id))
+
+        deslocamento = (pagina - 1) * por_pagina
+        resposta = consulta\
+            .order("timestamp", desc=True)\
+            .order("id")\
+            .range(deslocamento, deslocamento + por_pagina - 1)\
+            .execute()
+
+        return {
+            "anomalias": resposta.data,
+            "total": resposta.count or 0,
+            "pagina": pagina,
+            "por_pagina": por_pagina
+        }
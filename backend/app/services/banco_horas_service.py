@@ -0,0 +1,263 @@
+from supabase import Client
+from app.services.jornada_service import ServicoJornada
+from app.services.calendario_service import ServicoCalendario
+from app.services.folha_service import ServicoFolha
+from app.services.fuso_service import ServicoFuso
+from datetime import date, datetime, timedelta, timezone
+from typing import Dict, List, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class ServicoBancoHoras:
+    """
+    Banco de horas mantido de forma incremental
+
+    Cada funcionário tem uma linha em banco_horas com o saldo acumulado e o
+    último dia já fechado. Fechar dias processa apenas os dias posteriores a
+    esse marco, grava um lançamento por dia em banco_horas_lancamentos e
+    avança o saldo; consultar o saldo é a leitura de uma única linha.
+    """
+
+    TABELA_SALDOS = "banco_horas"
+    TABELA_LANCAMENTOS = "banco_horas_lancamentos"
+
+    # Registros por página na leitura do período a fechar
+    TAMANHO_PAGINA = 1000
+
+    @staticmethod
+    async def obter_saldo(supabase: Client, usuario_id: str) -> Optional[Dict]:
+        """
+        Obter saldo atual do banco de horas (leitura de uma linha)
+
+        Args:
+            supabase: Cliente Supabase
+            usuario_id: ID do usuário
+
+        Returns:
+            Linha de banco_horas ou None se ainda não houver dias fechados
+        """
+        resposta = supabase.table(ServicoBancoHoras.TABELA_SALDOS)\
+            .select("*")\
+            .eq("usuario_id", usuario_id)\
+            .limit(1)\
+            .execute()
+
+        return resposta.data[0] if resposta.data else None
+
+    @staticmethod
+    def _ler_registros(supabase: Client, usuario_id: str, inicio: datetime, fim: datetime) -> List[Dict]:
+        """
+        Ler os registros do funcionário em [inicio, fim), em páginas por (timestamp, id)
+
+        O primeiro fechamento parte da criação do perfil, então o período pode
+        passar do limite de linhas por resposta do PostgREST.
+
+        Returns:
+            Linhas com timestamp, tipo_registro e id, em ordem cronológica
+        """
+        linhas: List[Dict] = []
+
+        while True:
+            consulta = supabase.table("registros_ponto")\
+                .select("id, timestamp, tipo_registro")\
+                .eq("usuario_id", usuario_id)\
+                .gte("timestamp", inicio.isoformat())\
+                .lt("timestamp", fim.isoformat())
+            if linhas:
+                ultimo = linhas[-1]
+                consulta = consulta.or_(
+                    f"timestamp.gt.{ultimo['timestamp']},"
+                    f"and(timestamp.eq.{ultimo['timestamp']},id.gt.{ultimo['id']})"
+                )
+            pagina = consulta\
+                .order("timestamp")\
+                .order("id")\
+                .limit(ServicoBancoHoras.TAMANHO_PAGINA)\
+                .execute().data or []
+
+            linhas.extend(pagina)
+            if len(pagina) < ServicoBancoHoras.TAMANHO_PAGINA:
+                return linhas
+
+    @staticmethod
+    async def fechar_dias(
+        supabase: Client,
+        usuario_id: str,
+        ate: Optional[date] = None
+    ) -> Optional[Dict]:
+        """
+        Fechar os dias ainda não processados do funcionário até a data informada
+
+        Args:
+            supabase: Cliente Supabase (service key, a tabela não aceita escrita de usuários)
+            usuario_id: ID do usuário
+            ate: Último dia a fechar (padrão: ontem, no fuso da empresa)
+
+        Returns:
+            Linha de banco_horas atualizada
+        """
+        saldo = await ServicoBancoHoras.obter_saldo(supabase, usuario_id)
+
+        if saldo:
+            empresa_id = saldo["empresa_id"]
+            inicio = date.fromisoformat(saldo["ultimo_dia_fechado"]) + timedelta(days=1)
+        else:
+            perfil_response = supabase.table("perfis")\
+                .select("empresa_id, criado_em")\
+                .eq("id", usuario_id)\
+                .single()\
+                .execute()
+
+            if not perfil_response.data:
+                raise ValueError(f"Usuário {usuario_id} não encontrado")
+
+            empresa_id = perfil_response.data["empresa_id"]
+
+        jornada = await ServicoJornada.obter_jornada(supabase, empresa_id)
+        tabela_fuso = jornada.tabela_fuso
+
+        if not saldo:
+            criado_em = datetime.fromisoformat(perfil_response.data["criado_em"].replace("Z", "+00:00"))
+            inicio = tabela_fuso.data_local(criado_em)
+
+        ate = ate or (tabela_fuso.data_local(datetime.now(timezone.utc)) - timedelta(days=1))
+        if inicio > ate:
+            return saldo
+
+        # Dias locais [inicio, ate], com folga para jornadas que atravessam a meia-noite
+        registros = ServicoBancoHoras._ler_registros(
+            supabase,
+            usuario_id,
+            ServicoFuso.inicio_dia_utc(inicio, jornada.fuso_horario),
+            ServicoFuso.inicio_dia_utc(ate + timedelta(days=1), jornada.fuso_horario) + ServicoFuso.MARGEM_SESSAO
+        )
+
+        lancamentos = ServicoBancoHoras._calcular_lancamentos(
+            ServicoFolha._resumir_dias(registros, jornada),
+            ServicoCalendario.mascara_dias_uteis(jornada, inicio, ate),
+            jornada.jornada_diaria_horas,
+            usuario_id,
+            empresa_id,
+            inicio,
+            ate
+        )
+
+        if lancamentos:
+            # Reprocessar um dia já lançado (fechamento concorrente) não duplica o lançamento
+            supabase.table(ServicoBancoHoras.TABELA_LANCAMENTOS)\
+                .upsert(lancamentos, on_conflict="usuario_id,data", ignore_duplicates=True)\
+                .execute()
+
+        variacao = sum(lancamento["saldo_minutos"] for lancamento in lancamentos)
+        novo_saldo = {
+            "usuario_id": usuario_id,
+            "empresa_id": empresa_id,
+            "saldo_minutos": (saldo["saldo_minutos"] if saldo else 0) + variacao,
+            "ultimo_dia_fechado": ate.isoformat(),
+            "atualizado_em": datetime.utcnow().isoformat()
+        }
+
+        try:
+            if saldo:
+                # Atualização otimista: só avança se ninguém fechou esses dias antes
+                resposta = supabase.table(ServicoBancoHoras.TABELA_SALDOS)\
+                    .update(novo_saldo)\
+                    .eq("usuario_id", usuario_id)\
+                    .eq("ultimo_dia_fechado", saldo["ultimo_dia_fechado"])\
+                    .execute()
+            else:
+                resposta = supabase.table(ServicoBancoHoras.TABELA_SALDOS)\
+                    .insert(novo_saldo)\
+                    .execute()
+        except Exception as e:
+            logger.warning(f"Fechamento concorrente do banco de horas de {usuario_id}: {str(e)}")
+            return await ServicoBancoHoras.obter_saldo(supabase, usuario_id)
+
+        if not resposta.data:
+            return await ServicoBancoHoras.obter_saldo(supabase, usuario_id)
+
+        logger.info("Banco de horas fechado: usuario=%s, ate=%s, variacao=%smin", usuario_id, ate, variacao)
+
+        return resposta.data[0]
+
+    @staticmethod
+    async def fechar_dias_empresa(
+        supabase: Client,
+        empresa_id: str,
+        ate: Optional[date] = None
+    ) -> int:
+        """
+        Fechar dias pendentes de todos os funcionários da empresa
+
+        Args:
+            supabase: Cliente Supabase (service key)
+            empresa_id: ID da empresa
+            ate: Último dia a fechar (padrão: ontem, no fuso da empresa)
+
+        Returns:
+            Quantidade de funcionários processados com sucesso
+        """
+        usuarios_response = supabase.table("perfis")\
+            .select("id")\
+            .eq("empresa_id", empresa_id)\
+            .execute()
+
+        processados = 0
+        for usuario in usuarios_response.data:
+            try:
+                await ServicoBancoHoras.fechar_dias(supabase, usuario["id"], ate)
+                processados += 1
+            except Exception as e:
+                logger.error(f"Erro ao fechar banco de horas do usuário {usuario['id']}: {str(e)}")
+
+        return processados
+
+    @staticmethod
+    def _calcular_lancamentos(
+        dias: Dict[date, Dict],
+        mascara_uteis: int,
+        jornada_diaria_horas: float,
+        usuario_id: str,
+        empresa_id: str,
+        inicio: date,
+        fim: date
+    ) -> List[Dict]:
+        """
+        Lançamentos diários (trabalhado - esperado) do período
+
+        Args:
+            dias: Resumo por dia de ServicoFolha._resumir_dias
+            mascara_uteis: Máscara de dias úteis do período (bit 0 = inicio)
+            jornada_diaria_horas: Horas esperadas em dia útil
+            usuario_id: ID do usuário
+            empresa_id: ID da empresa
+            inicio: Primeiro dia do período
+            fim: Último dia do período
+
+        Returns:
+            Lançamentos dos dias com horas esperadas ou trabalhadas
+        """
+        lancamentos = []
+        esperado_util = round(jornada_diaria_horas * 60)
+
+        for deslocamento in range((fim - inicio).days + 1):
+            dia = inicio + timedelta(days=deslocamento)
+            esperado = esperado_util if mascara_uteis >> deslocamento & 1 else 0
+            horas = dias.get(dia, {}).get("horas")
+            trabalhado = round(horas * 60) if horas else 0
+
+            if esperado == 0 and trabalhado == 0:
+                continue
+
+            lancamentos.append({
+                "usuario_id": usuario_id,
+                "empresa_id": empresa_id,
+                "data": dia.isoformat(),
+                "trabalhado_minutos": trabalhado,
+                "esperado_minutos": esperado,
+                "saldo_minutos": trabalhado - esperado
+            })
+
+        return lancamentos
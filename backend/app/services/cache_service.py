@@ -0,0 +1,317 @@
+from app.config import settings
+from app.arquivos import diretorio_privado
+from collections import OrderedDict
+from dataclasses import fields, is_dataclass
+from datetime import date, datetime, time
+from pydantic import BaseModel
+from typing import Any, Callable, Dict, Optional, Tuple, TypeVar
+from uuid import UUID
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+import time as relogio
+import uuid
+import logging
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Classes (dataclass ou modelo pydantic) que o cache compartilhado sabe reconstruir
+_TIPOS_REGISTRADOS: Dict[str, type] = {}
+
+
+def registrar_tipo(classe: type) -> type:
+    """Permitir que instâncias da classe sejam gravadas no cache compartilhado (usável como decorator)"""
+    _TIPOS_REGISTRADOS[classe.__name__] = classe
+    return classe
+
+
+def _codificar(valor: Any) -> Any:
+    """Valor em estrutura JSON com marcação de tipo ("$t") para o que JSON não representa"""
+    if valor is None or isinstance(valor, (bool, int, float, str)):
+        return valor
+    if isinstance(valor, list):
+        return [_codificar(item) for item in valor]
+    if isinstance(valor, dict):
+        if all(isinstance(chave, str) for chave in valor) and "$t" not in valor:
+            return {chave: _codificar(item) for chave, item in valor.items()}
+        return {"$t": "dict", "v": [[_codificar(chave), _codificar(item)] for chave, item in valor.items()]}
+    if isinstance(valor, tuple):
+        return {"$t": "tuple", "v": [_codificar(item) for item in valor]}
+    if isinstance(valor, (set, frozenset)):
+        return {"$t": "frozenset", "v": [_codificar(item) for item in valor]}
+    for nome, tipo in (("datetime", datetime), ("date", date), ("time", time), ("uuid", UUID)):
+        if isinstance(valor, tipo):
+            return {"$t": nome, "v": str(valor) if tipo is UUID else valor.isoformat()}
+
+    nome = type(valor).__name__
+    if _TIPOS_REGISTRADOS.get(nome) is type(valor):
+        if isinstance(valor, BaseModel):
+            return {"$t": "modelo", "c": nome, "v": valor.model_dump(mode="json")}
+        if is_dataclass(valor):
+            return {"$t": "dataclass", "c": nome, "v": {campo.name: _codificar(getattr(valor, campo.name)) for campo in fields(valor)}}
+
+    raise TypeError(f"Tipo não suportado pelo cache compartilhado: {nome}")
+
+
+def _decodificar(valor: Any) -> Any:
+    """Inverso de _codificar; só reconstrói classes registradas"""
+    if isinstance(valor, list):
+        return [_decodificar(item) for item in valor]
+    if not isinstance(valor, dict):
+        return valor
+
+    marca = valor.get("$t")
+    if marca is None:
+        return {chave: _decodificar(item) for chave, item in valor.items()}
+    if marca == "dict":
+        return {_decodificar(chave): _decodificar(item) for chave, item in valor["v"]}
+    if marca == "tuple":
+        return tuple(_decodificar(item) for item in valor["v"])
+    if marca == "frozenset":
+        return frozenset(_decodificar(item) for item in valor["v"])
+    if marca == "datetime":
+        return datetime.fromisoformat(valor["v"])
+    if marca == "date":
+        return date.fromisoformat(valor["v"])
+    if marca == "time":
+        return time.fromisoformat(valor["v"])
+    if marca == "uuid":
+        return UUID(valor["v"])
+
+    classe = _TIPOS_REGISTRADOS.get(valor.get("c"))
+    if classe is None:
+        raise ValueError(f"Tipo desconhecido no cache: {valor.get('c')}")
+    if marca == "modelo":
+        return classe.model_validate(valor["v"])
+    if marca == "dataclass":
+        return classe(**{chave: _decodificar(item) for chave, item in valor["v"].items()})
+    raise ValueError(f"Marcação desconhecida no cache: {marca}")
+
+
+class CacheLRU:
+    """
+    Cache no próprio processo, com expiração por entrada e descarte LRU
+
+    Os valores são guardados por referência: quem usa o cache deve tratá-los
+    como imutáveis e gravar alterações com definir/atualizar.
+    """
+
+    compartilhado = False
+
+    def __init__(self, capacidade: int = 10000):
+        self.capacidade = max(capacidade, 1)
+        self.identificador = uuid.uuid4().hex[:12]
+        self._itens: "OrderedDict[str, Tuple[Any, Optional[float]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _ler(self, chave: str, agora: float) -> Optional[Tuple[Any, Optional[float]]]:
+        """Entrada válida (valor, expiração) ou None; chamar com o lock"""
+        item = self._itens.get(chave)
+        if item is None:
+            return None
+        if item[1] is not None and item[1] <= agora:
+            del self._itens[chave]
+            return None
+        self._itens.move_to_end(chave)
+        return item
+
+    def _gravar(self, chave: str, valor: Any, expira_em: Optional[float]) -> None:
+        """Gravar entrada descartando as menos usadas; chamar com o lock"""
+        self._itens[chave] = (valor, expira_em)
+        self._itens.move_to_end(chave)
+        while len(self._itens) > self.capacidade:
+            self._itens.popitem(last=False)
+
+    def obter(self, chave: str, padrao: Any = None) -> Any:
+        with self._lock:
+            item = self._ler(chave, relogio.time())
+        return padrao if item is None else item[0]
+
+    def definir(self, chave: str, valor: Any, ttl: Optional[float] = None) -> None:
+        with self._lock:
+            self._gravar(chave, valor, relogio.time() + ttl if ttl else None)
+
+    def atualizar(self, chave: str, funcao: Callable[[Any], Any], ttl: Optional[float] = None) -> Any:
+        with self._lock:
+            agora = relogio.time()
+            item = self._ler(chave, agora)
+            novo = funcao(None if item is None else item[0])
+            if novo is not None:
+                expira_em = item[1] if item is not None else (agora + ttl if ttl else None)
+                self._gravar(chave, novo, expira_em)
+            return novo
+
+    def remover(self, chave: str) -> None:
+        with self._lock:
+            self._itens.pop(chave, None)
+
+    def limpar(self, prefixo: str = "") -> None:
+        with self._lock:
+            if not prefixo:
+                self._itens.clear()
+                return
+            for chave in [chave for chave in self._itens if chave.startswith(prefixo)]:
+                del self._itens[chave]
+
+
+class CacheSQLite:
+    """
+    Cache em um arquivo SQLite compartilhado pelos workers do mesmo host
+
+    Entradas e invalidações feitas por um worker valem para todos. Valores
+    são gravados em JSON: além dos tipos JSON, tuplas, frozensets, datas,
+    UUIDs e as classes registradas com registrar_tipo (nunca pickle, que
+    executaria o que estiver no arquivo). Uma entrada que não decodifica é
+    tratada como ausente. atualizar roda em uma transação IMMEDIATE, o que
+    torna incrementos e outras leituras-e-escritas atômicos entre processos;
+    como pode esperar o lock, chamadas feitas no event loop passam por
+    ServicoCache.executar.
+    """
+
+    compartilhado = True
+
+    # Operações entre limpezas de entradas expiradas
+    INTERVALO_LIMPEZA = 10000
+
+    def __init__(self, caminho: str):
+        self._caminho = caminho
+        self._local = threading.local()
+        self._operacoes = 0
+
+        conexao = self._conexao()
+        conexao.execute(
+            "CREATE TABLE IF NOT EXISTS cache ("
+            "chave TEXT PRIMARY KEY, valor BLOB NOT NULL, expira_em REAL)"
+        )
+        conexao.execute("CREATE TABLE IF NOT EXISTS cache_meta (nome TEXT PRIMARY KEY, valor TEXT NOT NULL)")
+        conexao.execute(
+            "INSERT OR IGNORE INTO cache_meta (nome, valor) VALUES ('identificador', ?)",
+            (uuid.uuid4().hex[:12],)
+        )
+        self.identificador = conexao.execute(
+            "SELECT valor FROM cache_meta WHERE nome = 'identificador'"
+        ).fetchone()[0]
+
+    def _conexao(self) -> sqlite3.Connection:
+        """Conexão da thread atual (sqlite3 não compartilha conexões entre threads)"""
+        conexao = getattr(self._local, "conexao", None)
+        if conexao is None:
+            conexao = sqlite3.connect(self._caminho, timeout=5, isolation_level=None)
+            conexao.execute("PRAGMA journal_mode=WAL")
+            conexao.execute("PRAGMA synchronous=OFF")
+            self._local.conexao = conexao
+        return conexao
+
+    def _ler(self, conexao: sqlite3.Connection, chave: str, agora: float) -> Optional[Tuple[Any, Optional[float]]]:
+        """Entrada válida (valor, expiração) ou None"""
+        linha = conexao.execute("SELECT valor, expira_em FROM cache WHERE chave = ?", (chave,)).fetchone()
+        if linha is None or (linha[1] is not None and linha[1] <= agora):
+            return None
+        try:
+            return _decodificar(json.loads(linha[0])), linha[1]
+        except (ValueError, TypeError, KeyError) as e:
+            logger.warning(f"Entrada de cache ilegível descartada ({chave}): {str(e)}")
+            return None
+
+    def _gravar(self, conexao: sqlite3.Connection, chave: str, valor: Any, expira_em: Optional[float]) -> None:
+        conexao.execute(
+            "INSERT INTO cache (chave, valor, expira_em) VALUES (?, ?, ?) "
+            "ON CONFLICT(chave) DO UPDATE SET valor = excluded.valor, expira_em = excluded.expira_em",
+            (chave, json.dumps(_codificar(valor), separators=(",", ":")), expira_em)
+        )
+        self._operacoes += 1
+        if self._operacoes >= self.INTERVALO_LIMPEZA:
+            self._operacoes = 0
+            conexao.execute("DELETE FROM cache WHERE expira_em IS NOT NULL AND expira_em <= ?", (relogio.time(),))
+
+    def obter(self, chave: str, padrao: Any = None) -> Any:
+        item = self._ler(self._conexao(), chave, relogio.time())
+        return padrao if item is None else item[0]
+
+    def definir(self, chave: str, valor: Any, ttl: Optional[float] = None) -> None:
+        self._gravar(self._conexao(), chave, valor, relogio.time() + ttl if ttl else None)
+
+    def atualizar(self, chave: str, funcao: Callable[[Any], Any], ttl: Optional[float] = None) -> Any:
+        conexao = self._conexao()
+        conexao.execute("BEGIN IMMEDIATE")
+        try:
+            agora = relogio.time()
+            item = self._ler(conexao, chave, agora)
+            novo = funcao(None if item is None else item[0])
+            if novo is not None:
+                expira_em = item[1] if item is not None else (agora + ttl if ttl else None)
+                self._gravar(conexao, chave, novo, expira_em)
+            conexao.execute("COMMIT")
+        except Exception:
+            conexao.execute("ROLLBACK")
+            raise
+        return novo
+
+    def remover(self, chave: str) -> None:
+        self._conexao().execute("DELETE FROM cache WHERE chave = ?", (chave,))
+
+    def limpar(self, prefixo: str = "") -> None:
+        if not prefixo:
+            self._conexao().execute("DELETE FROM cache")
+            return
+        # Intervalo [prefixo, prefixo + U+FFFF) em vez de LIKE, que trataria "_" e "%" como curingas
+        self._conexao().execute(
+            "DELETE FROM cache WHERE chave >= ? AND chave < ?",
+            (prefixo, prefixo + "\uffff")
+        )
+
+
+class ServicoCache:
+    """
+    Cache usado pelos serviços (jornadas, perfis, versões, estatísticas)
+
+    CACHE_BACKEND=memoria usa um LRU por processo; CACHE_BACKEND=sqlite usa
+    um arquivo compartilhado, de modo que os workers do mesmo host dividem
+    entradas e invalidações. Operações:
+
+        obter(chave, padrao), definir(chave, valor, ttl),
+        atualizar(chave, funcao, ttl), remover(chave), limpar(prefixo)
+
+    atualizar aplica funcao ao valor atual (None se ausente ou expirado) de
+    forma atômica; se funcao retornar None nada é gravado. A expiração de
+    uma entrada existente é mantida.
+
+    Com o backend compartilhado as operações podem esperar o lock do
+    arquivo; código que roda no event loop chama as funções que usam o
+    cache por ServicoCache.executar.
+    """
+
+    _backend = None
+
+    @staticmethod
+    def cache():
+        """Backend configurado (criado no primeiro uso)"""
+        if ServicoCache._backend is None:
+            if settings.cache_backend == "sqlite":
+                caminho = settings.cache_sqlite_caminho or os.path.join(diretorio_privado(), "cache.sqlite3")
+                ServicoCache._backend = CacheSQLite(caminho)
+            else:
+                ServicoCache._backend = CacheLRU(settings.cache_memoria_capacidade)
+            logger.info("Cache: backend %s", settings.cache_backend)
+        return ServicoCache._backend
+
+    @staticmethod
+    async def executar(funcao: Callable[..., T], *args, **kwargs) -> T:
+        """
+        Chamar uma função síncrona que usa o cache a partir do event loop
+
+        Com o backend compartilhado a chamada vai para uma thread (o SQLite
+        pode esperar até 5 s pelo lock); com o LRU roda direto.
+        """
+        if ServicoCache.cache().compartilhado:
+            return await asyncio.to_thread(funcao, *args, **kwargs)
+        return funcao(*args, **kwargs)
+
+    @staticmethod
+    def definir_backend(backend) -> None:
+        """Substituir o backend (útil para testes)"""
+        ServicoCache._backend = backend
@@ -0,0 +1,152 @@
+from app.services.jornada_service import JornadaEmpresa
+from datetime import date, timedelta
+from typing import Dict, Iterable, Set, Tuple
+import calendar
+
+
+class ServicoCalendario:
+    """
+    Índice de dias úteis por empresa, armazenado como bitsets
+
+    Cada ano é representado por um inteiro em que o bit i indica se o dia
+    (1º de janeiro + i) é dia útil para a empresa: dia da semana com jornada
+    prevista, que não seja feriado nacional, feriado configurado ou folga.
+    Faltas de um funcionário viram operações de bits entre a máscara de dias
+    úteis do período e a máscara de dias trabalhados.
+    """
+
+    # Feriados nacionais de data fixa (mês, dia)
+    FERIADOS_NACIONAIS_FIXOS = (
+        (1, 1),    # Confraternização Universal
+        (4, 21),   # Tiradentes
+        (5, 1),    # Dia do Trabalho
+        (9, 7),    # Independência
+        (10, 12),  # Nossa Senhora Aparecida
+        (11, 2),   # Finados
+        (11, 15),  # Proclamação da República
+        (11, 20),  # Dia Nacional de Zumbi e da Consciência Negra
+        (12, 25),  # Natal
+    )
+
+    # (empresa_id, ano) -> (jornada usada na construção, máscara do ano)
+    _cache: Dict[Tuple[str, int], Tuple[JornadaEmpresa, int]] = {}
+
+    @staticmethod
+    def pascoa(ano: int) -> date:
+        """Data do domingo de Páscoa (algoritmo de Meeus/Jones/Butcher)"""
+        a = ano % 19
+        b, c = divmod(ano, 100)
+        d, e = divmod(b, 4)
+        f = (b + 8) // 25
+        g = (b - f + 1) // 3
+        h = (19 * a + b - d - g + 15) % 30
+        i, k = divmod(c, 4)
+        l = (32 + 2 * e + 2 * i - h - k) % 7
+        m = (a + 11 * h + 22 * l) // 451
+        mes, dia = divmod(h + l - 7 * m + 114, 31)
+        return date(ano, mes, dia + 1)
+
+    @staticmethod
+    def feriados_nacionais(ano: int) -> Set[date]:
+        """Feriados nacionais do ano (fixos e Sexta-feira Santa)"""
+        feriados = {date(ano, mes, dia) for mes, dia in ServicoCalendario.FERIADOS_NACIONAIS_FIXOS}
+        feriados.add(ServicoCalendario.pascoa(ano) - timedelta(days=2))
+        return feriados
+
+    @staticmethod
+    def mascara_ano(jornada: JornadaEmpresa, ano: int) -> int:
+        """
+        Máscara de dias úteis do ano para a empresa (com cache)
+
+        Args:
+            jornada: Jornada compilada da empresa
+            ano: Ano
+
+        Returns:
+            Inteiro com o bit i ligado se 1º de janeiro + i for dia útil
+        """
+        chave = (jornada.empresa_id, ano)
+        em_cache = ServicoCalendario._cache.get(chave)
+
+        # Jornada igual (mesmo objeto ou, vinda do cache compartilhado, mesmos campos) = mesma configuração
+        if em_cache and (em_cache[0] is jornada or em_cache[0] == jornada):
+            return em_cache[1]
+
+        primeiro_dia = date(ano, 1, 1)
+        total_dias = (date(ano + 1, 1, 1) - primeiro_dia).days
+
+        # Dias da semana com jornada prevista
+        mascara = 0
+        for deslocamento in range(total_dias):
+            if jornada.horarios[(primeiro_dia.weekday() + deslocamento) % 7] is not None:
+                mascara |= 1 << deslocamento
+
+        # Remover feriados e folgas
+        sem_expediente = {d for d in jornada.datas_sem_expediente if d.year == ano}
+        sem_expediente.update(
+            date(ano, mes, dia) for mes, dia in jornada.feriados_anuais
+            if (mes, dia) != (2, 29) or calendar.isleap(ano)
+        )
+        if jornada.feriados_nacionais:
+            sem_expediente.update(ServicoCalendario.feriados_nacionais(ano))
+
+        for dia in sem_expediente:
+            mascara &= ~(1 << (dia - primeiro_dia).days)
+
+        ServicoCalendario._cache[chave] = (jornada, mascara)
+
+        return mascara
+
+    @staticmethod
+    def mascara_dias_uteis(jornada: JornadaEmpresa, inicio: date, fim: date) -> int:
+        """
+        Máscara de dias úteis do período [inicio, fim], com o bit 0 em `inicio`
+
+        Args:
+            jornada: Jornada compilada da empresa
+            inicio: Primeiro dia do período
+            fim: Último dia do período (inclusivo)
+
+        Returns:
+            Máscara de dias úteis do período
+        """
+        mascara = 0
+        deslocamento = 0
+
+        for ano in range(inicio.year, fim.year + 1):
+            de = max(inicio, date(ano, 1, 1))
+            ate = min(fim, date(ano, 12, 31))
+            quantidade = (ate - de).days + 1
+            if quantidade <= 0:
+                continue
+
+            parte = ServicoCalendario.mascara_ano(jornada, ano) >> (de - date(ano, 1, 1)).days
+            parte &= (1 << quantidade) - 1
+            mascara |= parte << deslocamento
+            deslocamento += quantidade
+
+        return mascara
+
+    @staticmethod
+    def mascara_dias(dias: Iterable[date], inicio: date, fim: date) -> int:
+        """
+        Máscara dos dias informados dentro do período, com o bit 0 em `inicio`
+
+        Args:
+            dias: Datas (ex.: dias trabalhados por um funcionário)
+            inicio: Primeiro dia do período
+            fim: Último dia do período (inclusivo)
+
+        Returns:
+            Máscara com os dias do período presentes em `dias`
+        """
+        mascara = 0
+        for dia in dias:
+            if inicio <= dia <= fim:
+                mascara |= 1 << (dia - inicio).days
+        return mascara
+
+    @staticmethod
+    def contar_faltas(mascara_uteis: int, mascara_trabalhados: int) -> int:
+        """Quantidade de dias úteis sem trabalho registrado"""
+        return (mascara_uteis & ~mascara_trabalhados).bit_count()
@@ -2,8 +2,16 @@ from supabase import Client
 from app.models.enums import TipoPonto
 from app.models.schemas import RequisicaoPonto, RegistroPonto, PerfilUsuario
 from app.services.photo_service import ServicoFoto
-from datetime import datetime
-from typing import Optional, Dict
+from app.services.estatisticas_service import ServicoEstatisticas
+from app.services.eventos_service import ServicoEventos
+from app.services.presenca_service import ServicoPresenca
+from app.services.geocerca_service import ServicoGeocerca
+from app.services.cache_service import ServicoCache
+from app.config import settings
+from datetime import datetime, timedelta, timezone
+from typing import Optional, Dict, List, Tuple
+import base64
+import json
 import logging
 from uuid import UUID
 
@@ -13,11 +21,43 @@ logger = logging.getLogger(__name__)
 class ServicoPonto:
     """Serviço para operações de registro de ponto"""
     
+    # Colunas de registros_ponto expostas como RegistroPonto
+    COLUNAS_REGISTRO = "id, usuario_id, empresa_id, tipo_registro, timestamp, latitude, longitude, foto_url, sincronizado_em, criado_em, local_id"
+    
+    @staticmethod
+    def linha_para_resposta(linha: Dict) -> Dict:
+        """
+        Converter linha de registros_ponto para o formato de RegistroPonto sem validação
+        
+        As linhas vêm do próprio banco (tipos já garantidos pelo schema), então
+        são apenas renomeadas para serialização direta, sem construir modelos
+        
+        Args:
+            linha: Linha de registros_ponto
+        
+        Returns:
+            Dicionário com os campos de RegistroPonto
+        """
+        return {
+            "id": linha["id"],
+            "usuario_id": linha["usuario_id"],
+            "empresa_id": linha["empresa_id"],
+            "tipo_ponto": linha.get("tipo_registro", linha.get("tipo_ponto")),
+            "timestamp": linha["timestamp"],
+            "latitude": linha.get("latitude"),
+            "longitude": linha.get("longitude"),
+            "foto_url": linha.get("foto_url"),
+            "sincronizado_em": linha.get("sincronizado_em"),
+            "criado_em": linha.get("criado_em"),
+            "local_id": linha.get("local_id")
+        }
+    
     @staticmethod
     async def registrar_ponto(
         supabase: Client,
         usuario: PerfilUsuario,
-        requisicao: RequisicaoPonto
+        requisicao: RequisicaoPonto,
+        foto_bytes: Optional[bytes] = None
     ) -> RegistroPonto:
         """
         Registrar um evento de ponto (entrada/saída/intervalo)
@@ -26,19 +66,37 @@ class ServicoPonto:
             supabase: Cliente Supabase
             usuario: Perfil do usuário atual
             requisicao: Dados da requisição de ponto
+            foto_bytes: Foto já em bytes (lote binário); tem precedência sobre foto_base64
         
         Returns:
             Registro de ponto criado
         
         Raises:
-            ValueError: Se a sequência de ponto for inválida
+            ValueError: Se a sequência de ponto for inválida ou a localização
+                estiver fora dos locais da empresa
         """
         # Validar sequência de ponto
         await ServicoPonto._validar_sequencia_ponto(supabase, usuario.id, requisicao.tipo_ponto)
         
+        # Validar localização contra os locais da empresa (índice em memória)
+        local_id = await ServicoCache.executar(
+            ServicoGeocerca.validar,
+            str(usuario.empresa_id),
+            requisicao.latitude,
+            requisicao.longitude
+        )
+        
         # Fazer upload da foto se fornecida
         url_foto = None
-        if requisicao.foto_base64:
+        if foto_bytes:
+            url_foto = await ServicoFoto.enviar_foto(
+                supabase=supabase,
+                usuario_id=str(usuario.id),
+                empresa_id=str(usuario.empresa_id),
+                bytes_foto=foto_bytes,
+                tipo_ponto=requisicao.tipo_ponto.value
+            )
+        elif requisicao.foto_base64:
             url_foto = await ServicoFoto.fazer_upload_foto(
                 supabase=supabase,
                 usuario_id=str(usuario.id),
@@ -58,6 +116,8 @@ class ServicoPonto:
             "foto_url": url_foto,
             "criado_em": datetime.utcnow().isoformat()
         }
+        if local_id:
+            dados_registro["local_id"] = local_id
         
         # Inserir no banco de dados
         resposta = supabase.table("registros_ponto").insert(dados_registro).execute()
@@ -65,7 +125,18 @@ class ServicoPonto:
         if not resposta.data or len(resposta.data) == 0:
             raise Exception("Falha ao criar registro de ponto")
         
-        logger.info(f"Registro de ponto criado: usuario={usuario.id}, tipo={requisicao.tipo_ponto.value}")
+        await ServicoCache.executar(ServicoEstatisticas.registrar_ponto, str(usuario.empresa_id))
+        ServicoPresenca.registrar(str(usuario.empresa_id), str(usuario.id), requisicao.tipo_ponto.value)
+        ServicoEventos.publicar(str(usuario.empresa_id), "registro_ponto", {
+            "id": resposta.data[0].get("id"),
+            "usuario_id": str(usuario.id),
+            "nome_completo": usuario.nome_completo,
+            "tipo_registro": requisicao.tipo_ponto.value,
+            "timestamp": resposta.data[0].get("timestamp", dados_registro["timestamp"]),
+            "local_id": local_id
+        })
+        
+        logger.info("Registro de ponto criado: usuario=%s, tipo=%s", usuario.id, requisicao.tipo_ponto.value)
         
         return RegistroPonto(**resposta.data[0])
     
@@ -166,8 +237,31 @@ class ServicoPonto:
         Returns:
             Lista de registros de ponto
         """
+        linhas = await ServicoPonto.obter_linhas_usuario(supabase, usuario_id, data_inicio, data_fim)
+        
+        return [RegistroPonto(**linha) for linha in linhas]
+    
+    @staticmethod
+    async def obter_linhas_usuario(
+        supabase: Client,
+        usuario_id: UUID,
+        data_inicio: Optional[datetime] = None,
+        data_fim: Optional[datetime] = None
+    ) -> List[Dict]:
+        """
+        Obter registros de ponto de um usuário já no formato de resposta, sem validação
+        
+        Args:
+            supabase: Cliente Supabase
+            usuario_id: ID do usuário
+            data_inicio: Data de início (opcional)
+            data_fim: Data de fim (opcional)
+        
+        Returns:
+            Registros como dicionários no formato de RegistroPonto, do mais recente ao mais antigo
+        """
         consulta = supabase.table("registros_ponto")\
-            .select("*")\
+            .select(ServicoPonto.COLUNAS_REGISTRO)\
             .eq("usuario_id", str(usuario_id))
         
         if data_inicio:
@@ -179,7 +273,103 @@ class ServicoPonto:
         
         resposta = consulta.execute()
         
-        return [RegistroPonto(**registro) for registro in resposta.data]
+        return [ServicoPonto.linha_para_resposta(linha) for linha in resposta.data]
+    
+    @staticmethod
+    def codificar_cursor_delta(atualizado_em: str, registro_id: Optional[str], continuacao: bool) -> str:
+        """Cursor opaco da sincronização incremental"""
+        bruto = json.dumps([atualizado_em, registro_id, continuacao]).encode()
+        return base64.urlsafe_b64encode(bruto).decode().rstrip("=")
+    
+    @staticmethod
+    def decodificar_cursor_delta(cursor: str) -> Tuple[datetime, Optional[str], bool]:
+        """
+        Decodificar cursor da sincronização incremental
+        
+        Raises:
+            ValueError: Se o cursor for inválido
+        """
+        try:
+            bruto = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+            atualizado_em, registro_id, continuacao = json.loads(bruto)
+            instante = datetime.fromisoformat(atualizado_em)
+            if instante.tzinfo is None:
+                raise ValueError
+            if registro_id is not None:
+                registro_id = str(UUID(registro_id))
+            return instante, registro_id, bool(continuacao)
+        except Exception:
+            raise ValueError("Cursor inválido")
+    
+    @staticmethod
+    async def obter_delta_usuario(
+        supabase: Client,
+        usuario_id: UUID,
+        cursor: Optional[str] = None,
+        dias: int = 30,
+        limite: Optional[int] = None
+    ) -> Tuple[List[Dict], str, bool]:
+        """
+        Obter registros do usuário criados ou alterados desde o cursor
+        
+        Os registros são lidos em ordem de (atualizado_em, id). Dentro de uma
+        sequência de páginas (tem_mais) o cursor é estrito; depois da última
+        página a próxima consulta relê SINCRONIZACAO_SOBREPOSICAO_SEGUNDOS antes
+        do último registro, para pegar transações confirmadas fora de ordem. O
+        cliente deve portanto mesclar os registros por id.
+        
+        Args:
+            supabase: Cliente Supabase
+            usuario_id: ID do usuário
+            cursor: Cursor devolvido pela consulta anterior (None = carga inicial)
+            dias: Janela da carga inicial, em dias de atualizado_em
+            limite: Registros por resposta (padrão: SINCRONIZACAO_DELTA_MAX_REGISTROS)
+        
+        Returns:
+            Tupla (registros no formato de RegistroPonto, próximo cursor, tem_mais)
+        
+        Raises:
+            ValueError: Se o cursor for inválido
+        """
+        limite = min(limite or settings.sincronizacao_delta_max_registros, settings.sincronizacao_delta_max_registros)
+        sobreposicao = timedelta(seconds=settings.sincronizacao_sobreposicao_segundos)
+        
+        consulta = supabase.table("registros_ponto")\
+            .select(ServicoPonto.COLUNAS_REGISTRO + ", atualizado_em")\
+            .eq("usuario_id", str(usuario_id))
+        
+        if cursor is None:
+            desde = datetime.now(timezone.utc) - timedelta(days=dias)
+            consulta = consulta.gte("atualizado_em", desde.isoformat())
+        else:
+            instante, registro_id, continuacao = ServicoPonto.decodificar_cursor_delta(cursor)
+            if continuacao and registro_id:
+                marca = instante.isoformat()
+                consulta = consulta.or_(
+                    f"atualizado_em.gt.{marca},and(atualizado_em.eq.{marca},id.gt.{registro_id})"
+                )
+            else:
+                consulta = consulta.gte("atualizado_em", (instante - sobreposicao).isoformat())
+        
+        linhas = consulta\
+            .order("atualizado_em")\
+            .order("id")\
+            .limit(limite + 1)\
+            .execute().data
+        
+        tem_mais = len(linhas) > limite
+        linhas = linhas[:limite]
+        
+        if linhas:
+            ultima = linhas[-1]
+            proximo = ServicoPonto.codificar_cursor_delta(ultima["atualizado_em"], ultima["id"], tem_mais)
+        elif cursor is not None:
+            # Nada novo: a próxima consulta relê a mesma janela
+            proximo = ServicoPonto.codificar_cursor_delta(instante.isoformat(), None, False)
+        else:
+            proximo = ServicoPonto.codificar_cursor_delta(datetime.now(timezone.utc).isoformat(), None, False)
+        
+        return [ServicoPonto.linha_para_resposta(linha) for linha in linhas], proximo, tem_mais
     
     @staticmethod
     async def sincronizar_registros_offline(
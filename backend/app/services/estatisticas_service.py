@@ -0,0 +1,193 @@
+from supabase import Client
+from app.config import settings
+from app.services.jornada_service import ServicoJornada
+from app.services.fuso_service import ServicoFuso, TabelaFuso
+from app.services.cache_service import ServicoCache, registrar_tipo
+from dataclasses import dataclass, replace
+from datetime import date, datetime, timezone
+from typing import Dict, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+@registrar_tipo
+@dataclass(frozen=True)
+class ContadoresEmpresa:
+    """Contadores de uma empresa, válidos para o dia/mês local indicados"""
+    total_usuarios: int
+    registros_mes: int
+    registros_hoje: int
+    dia: date
+    fuso_horario: str
+
+    @property
+    def tabela_fuso(self) -> TabelaFuso:
+        """Tabela de transições do fuso da empresa"""
+        return ServicoFuso.tabela(self.fuso_horario)
+
+    def virar(self, hoje: date) -> "ContadoresEmpresa":
+        """Contadores zerados se o dia ou o mês local mudou desde a última leitura"""
+        if hoje == self.dia:
+            return self
+        registros_mes = self.registros_mes if (hoje.year, hoje.month) == (self.dia.year, self.dia.month) else 0
+        return replace(self, registros_mes=registros_mes, registros_hoje=0, dia=hoje)
+
+
+class ServicoEstatisticas:
+    """
+    Estatísticas do painel administrativo mantidas no ServicoCache
+
+    Os contadores de cada empresa são semeados com contagens exatas na
+    primeira consulta, atualizados a cada registro de ponto ou alteração de
+    usuários e recontados no banco quando a entrada expira (a cada
+    ESTATISTICAS_RECONCILIACAO_SEGUNDOS), o que corrige escritas feitas fora
+    do alcance do cache.
+    """
+
+    PREFIXO_CACHE = "estatisticas:"
+
+    @staticmethod
+    async def obter(supabase: Client, empresa_id: str) -> Dict:
+        """
+        Obter estatísticas da empresa
+
+        Args:
+            supabase: Cliente Supabase
+            empresa_id: ID da empresa
+
+        Returns:
+            Dicionário com total_usuarios, total_registros_mes e total_registros_hoje
+        """
+        empresa_id = str(empresa_id)
+        contadores = await ServicoCache.executar(ServicoCache.cache().obter, ServicoEstatisticas.PREFIXO_CACHE + empresa_id)
+
+        if contadores is None:
+            contadores = await ServicoEstatisticas.semear(supabase, empresa_id)
+        else:
+            contadores = contadores.virar(contadores.tabela_fuso.data_local(datetime.now(timezone.utc)))
+
+        return {
+            "total_usuarios": contadores.total_usuarios,
+            "total_registros_mes": contadores.registros_mes,
+            "total_registros_hoje": contadores.registros_hoje,
+            "empresa_id": empresa_id
+        }
+
+    @staticmethod
+    async def semear(supabase: Client, empresa_id: str) -> ContadoresEmpresa:
+        """
+        Recontar no banco os contadores da empresa (dia e mês no fuso da empresa)
+
+        Args:
+            supabase: Cliente Supabase
+            empresa_id: ID da empresa
+
+        Returns:
+            Contadores recém-semeados
+        """
+        jornada = await ServicoJornada.obter_jornada(supabase, empresa_id)
+        tabela_fuso = jornada.tabela_fuso
+        hoje = tabela_fuso.data_local(datetime.now(timezone.utc))
+
+        resposta_usuarios = supabase.table("perfis")\
+            .select("id", count="exact")\
+            .eq("empresa_id", empresa_id)\
+            .limit(1)\
+            .execute()
+
+        inicio_mes = ServicoFuso.inicio_dia_utc(hoje.replace(day=1), jornada.fuso_horario)
+        resposta_mes = supabase.table("registros_ponto")\
+            .select("id", count="exact")\
+            .eq("empresa_id", empresa_id)\
+            .gte("timestamp", inicio_mes.isoformat())\
+            .limit(1)\
+            .execute()
+
+        inicio_hoje = ServicoFuso.inicio_dia_utc(hoje, jornada.fuso_horario)
+        resposta_hoje = supabase.table("registros_ponto")\
+            .select("id", count="exact")\
+            .eq("empresa_id", empresa_id)\
+            .gte("timestamp", inicio_hoje.isoformat())\
+            .limit(1)\
+            .execute()
+
+        contadores = ContadoresEmpresa(
+            total_usuarios=resposta_usuarios.count or 0,
+            registros_mes=resposta_mes.count or 0,
+            registros_hoje=resposta_hoje.count or 0,
+            dia=hoje,
+            fuso_horario=jornada.fuso_horario
+        )
+
+        chave = ServicoEstatisticas.PREFIXO_CACHE + empresa_id
+        anteriores = await ServicoCache.executar(ServicoCache.cache().obter, chave)
+        if anteriores and anteriores.dia == hoje and anteriores.registros_hoje != contadores.registros_hoje:
+            logger.info(
+                "Estatísticas reconciliadas: empresa=%s, hoje %s -> %s",
+                empresa_id, anteriores.registros_hoje, contadores.registros_hoje
+            )
+
+        await ServicoCache.executar(ServicoCache.cache().definir, chave, contadores, settings.estatisticas_reconciliacao_segundos)
+
+        return contadores
+
+    @staticmethod
+    def registrar_ponto(empresa_id: str, momento: Optional[datetime] = None) -> None:
+        """
+        Contabilizar um registro de ponto recém-gravado
+
+        Args:
+            empresa_id: ID da empresa
+            momento: Timestamp do registro (padrão: agora)
+        """
+        momento = momento or datetime.now(timezone.utc)
+        if momento.tzinfo is None:
+            momento = momento.replace(tzinfo=timezone.utc)
+
+        def contar(contadores: Optional[ContadoresEmpresa]) -> Optional[ContadoresEmpresa]:
+            if contadores is None:
+                # Ainda não semeado: a primeira consulta conta o registro no banco
+                return None
+
+            dia = contadores.tabela_fuso.data_local(momento)
+            contadores = contadores.virar(max(dia, contadores.dia))
+
+            mesmo_mes = (dia.year, dia.month) == (contadores.dia.year, contadores.dia.month)
+
+            return replace(
+                contadores,
+                registros_hoje=contadores.registros_hoje + (1 if dia == contadores.dia else 0),
+                registros_mes=contadores.registros_mes + (1 if mesmo_mes else 0)
+            )
+
+        ServicoCache.cache().atualizar(ServicoEstatisticas.PREFIXO_CACHE + str(empresa_id), contar)
+
+    @staticmethod
+    def ajustar_usuarios(empresa_id: str, variacao: int) -> None:
+        """
+        Ajustar total de usuários após criação (+1) ou remoção (-1) de perfil
+
+        Args:
+            empresa_id: ID da empresa
+            variacao: Quantidade a somar
+        """
+        ServicoCache.cache().atualizar(
+            ServicoEstatisticas.PREFIXO_CACHE + str(empresa_id),
+            lambda contadores: None if contadores is None else replace(
+                contadores, total_usuarios=max(0, contadores.total_usuarios + variacao)
+            )
+        )
+
+    @staticmethod
+    def invalidar(empresa_id: Optional[str] = None) -> None:
+        """
+        Descartar contadores (serão recontados na próxima consulta)
+
+        Args:
+            empresa_id: Empresa a invalidar (None invalida todas)
+        """
+        if empresa_id is None:
+            ServicoCache.cache().limpar(ServicoEstatisticas.PREFIXO_CACHE)
+        else:
+            ServicoCache.cache().remover(ServicoEstatisticas.PREFIXO_CACHE + str(empresa_id))
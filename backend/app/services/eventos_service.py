@@ -0,0 +1,137 @@
+from app.config import settings
+from typing import Any, AsyncIterator, Dict, Optional, Set
+import asyncio
+import itertools
+import json
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class Assinatura:
+    """Assinante do feed de uma empresa, com buffer limitado"""
+
+    __slots__ = ("empresa_id", "fila", "descartada")
+
+    def __init__(self, empresa_id: str, tamanho_buffer: int):
+        self.empresa_id = empresa_id
+        self.fila: asyncio.Queue = asyncio.Queue(maxsize=tamanho_buffer)
+        self.descartada = False
+
+
+class ServicoEventos:
+    """
+    Pub/sub em processo dos eventos de ponto por empresa
+
+    Publicar nunca bloqueia: cada assinante tem um buffer limitado e, se ele
+    encher (consumidor lento ou conexão travada), o assinante é descartado e
+    sua conexão encerrada; o cliente reconecta e recarrega o estado.
+    Publicação e consumo acontecem no loop de eventos da aplicação.
+    """
+
+    _assinantes: Dict[str, Set[Assinatura]] = {}
+    _sequencia = itertools.count(1)
+
+    @staticmethod
+    def assinar(empresa_id: str) -> Assinatura:
+        """
+        Registrar novo assinante do feed da empresa
+
+        Args:
+            empresa_id: ID da empresa
+
+        Returns:
+            Assinatura (encerrar com cancelar)
+        """
+        assinatura = Assinatura(str(empresa_id), settings.eventos_buffer_assinante)
+        ServicoEventos._assinantes.setdefault(assinatura.empresa_id, set()).add(assinatura)
+        return assinatura
+
+    @staticmethod
+    def cancelar(assinatura: Assinatura) -> None:
+        """Remover assinante do feed"""
+        assinantes = ServicoEventos._assinantes.get(assinatura.empresa_id)
+        if assinantes is not None:
+            assinantes.discard(assinatura)
+            if not assinantes:
+                del ServicoEventos._assinantes[assinatura.empresa_id]
+
+    @staticmethod
+    def publicar(empresa_id: str, tipo: str, dados: Dict[str, Any]) -> int:
+        """
+        Publicar evento para todos os assinantes da empresa
+
+        Args:
+            empresa_id: ID da empresa
+            tipo: Tipo do evento (ex.: "registro_ponto")
+            dados: Conteúdo serializável em JSON
+
+        Returns:
+            Quantidade de assinantes que receberam o evento
+        """
+        assinantes = ServicoEventos._assinantes.get(str(empresa_id))
+        if not assinantes:
+            return 0
+
+        evento = (next(ServicoEventos._sequencia), tipo, json.dumps(dados, default=str))
+        entregues = 0
+
+        for assinatura in list(assinantes):
+            try:
+                assinatura.fila.put_nowait(evento)
+                entregues += 1
+            except asyncio.QueueFull:
+                logger.warning(f"Assinante lento descartado do feed da empresa {empresa_id}")
+                assinatura.descartada = True
+                ServicoEventos.cancelar(assinatura)
+
+        return entregues
+
+    @staticmethod
+    async def transmitir(assinatura: Assinatura, intervalo_heartbeat: Optional[float] = None) -> AsyncIterator[str]:
+        """
+        Gerar o fluxo Server-Sent Events de uma assinatura
+
+        Envia um comentário de heartbeat quando não há eventos, para manter a
+        conexão aberta através de proxies e detectar clientes desconectados.
+
+        Args:
+            assinatura: Assinatura obtida em assinar
+            intervalo_heartbeat: Segundos entre heartbeats (padrão: configuração)
+
+        Yields:
+            Blocos de texto no formato text/event-stream
+        """
+        intervalo = intervalo_heartbeat or settings.eventos_heartbeat_segundos
+
+        try:
+            yield f"retry: {settings.eventos_retry_ms}\n\n"
+
+            while not assinatura.descartada:
+                try:
+                    evento_id, tipo, dados = await asyncio.wait_for(assinatura.fila.get(), timeout=intervalo)
+                except asyncio.TimeoutError:
+                    yield ": heartbeat\n\n"
+                    continue
+
+                yield f"id: {evento_id}\nevent: {tipo}\ndata: {dados}\n\n"
+
+            # Avisar o cliente de que perdeu eventos e deve recarregar o estado
+            yield "event: descartado\ndata: {}\n\n"
+        finally:
+            ServicoEventos.cancelar(assinatura)
+
+    @staticmethod
+    def encerrar() -> None:
+        """Descartar todos os assinantes (desligamento da aplicação)"""
+        for assinantes in list(ServicoEventos._assinantes.values()):
+            for assinatura in list(assinantes):
+                assinatura.descartada = True
+        ServicoEventos._assinantes.clear()
+
+    @staticmethod
+    def total_assinantes(empresa_id: Optional[str] = None) -> int:
+        """Quantidade de conexões abertas (de uma empresa ou de todas)"""
+        if empresa_id is not None:
+            return len(ServicoEventos._assinantes.get(str(empresa_id), ()))
+        return sum(len(assinantes) for assinantes in ServicoEventos._assinantes.values())
@@ -0,0 +1,242 @@
+from supabase import Client
+from app.models.schemas import DadosFolhaPagamento
+from datetime import datetime
+from typing import Dict, List
+import pyarrow as pa
+import pyarrow.ipc as ipc
+import pyarrow.parquet as pq
+import logging
+import csv
+import io
+
+logger = logging.getLogger(__name__)
+
+
+class ServicoExportacao:
+    """Serviço para exportação de folha e registros (CSV, Parquet e Arrow IPC)"""
+
+    # Formato -> (media type, extensão do arquivo)
+    FORMATOS_COLUNARES = {
+        "parquet": ("application/vnd.apache.parquet", "parquet"),
+        "arrow": ("application/vnd.apache.arrow.file", "arrow"),
+    }
+
+    # Tamanho de página das leituras de registros (limite padrão do PostgREST é 1000)
+    TAMANHO_PAGINA = 1000
+
+    COLUNAS_REGISTROS = (
+        "id, usuario_id, empresa_id, tipo_registro, timestamp, latitude, "
+        "longitude, foto_url, sincronizado_em, criado_em"
+    )
+
+    SCHEMA_FOLHA = pa.schema([
+        ("usuario_id", pa.string()),
+        ("nome_usuario", pa.string()),
+        ("codigo_funcionario", pa.string()),
+        ("inicio_periodo", pa.string()),
+        ("fim_periodo", pa.string()),
+        ("horas_regulares", pa.float64()),
+        ("horas_extras", pa.float64()),
+        ("horas_extras_semanais", pa.float64()),
+        ("total_horas", pa.float64()),
+        ("faltas", pa.int32()),
+        ("atrasos", pa.int32()),
+    ])
+
+    SCHEMA_REGISTROS = pa.schema([
+        ("id", pa.string()),
+        ("usuario_id", pa.string()),
+        ("empresa_id", pa.string()),
+        ("tipo_registro", pa.dictionary(pa.int8(), pa.string())),
+        ("timestamp", pa.timestamp("us", tz="UTC")),
+        ("latitude", pa.float64()),
+        ("longitude", pa.float64()),
+        ("foto_url", pa.string()),
+        ("sincronizado_em", pa.timestamp("us", tz="UTC")),
+        ("criado_em", pa.timestamp("us", tz="UTC")),
+    ])
+
+    @staticmethod
+    def formato_suportado(formato: str) -> bool:
+        """Indica se o formato informado é um dos formatos colunares"""
+        return formato.lower() in ServicoExportacao.FORMATOS_COLUNARES
+
+    @staticmethod
+    def folha_csv(dados: List[DadosFolhaPagamento]) -> str:
+        """
+        Gera o CSV da folha (uma linha por funcionário)
+
+        Args:
+            dados: Dados de folha calculados por funcionário
+
+        Returns:
+            Conteúdo CSV
+        """
+        saida = io.StringIO()
+        escritor = csv.writer(saida)
+
+        # Cabeçalho
+        escritor.writerow([
+            "Nome",
+            "Email",
+            "Código Funcionário",
+            "Período Início",
+            "Período Fim",
+            "Horas Regulares",
+            "Horas Extras",
+            "Total Horas",
+            "Faltas",
+            "Atrasos",
+            "Horas Extras Semanais"
+        ])
+
+        # Dados
+        for item in dados:
+            escritor.writerow([
+                item.nome_usuario,
+                "",  # Email não está no schema
+                item.codigo_funcionario or "",
+                item.inicio_periodo,
+                item.fim_periodo,
+                f"{item.horas_regulares:.2f}",
+                f"{item.horas_extras:.2f}",
+                f"{item.total_horas:.2f}",
+                item.faltas,
+                item.atrasos,
+                f"{item.horas_extras_semanais:.2f}"
+            ])
+
+        return saida.getvalue()
+
+    @staticmethod
+    def tabela_folha(dados: List[DadosFolhaPagamento]) -> pa.Table:
+        """
+        Monta tabela Arrow da folha a partir de buffers por coluna
+
+        Args:
+            dados: Dados de folha calculados por funcionário
+
+        Returns:
+            Tabela Arrow com uma linha por funcionário
+        """
+        colunas: Dict[str, list] = {campo.name: [] for campo in ServicoExportacao.SCHEMA_FOLHA}
+
+        for item in dados:
+            colunas["usuario_id"].append(str(item.usuario_id))
+            colunas["nome_usuario"].append(item.nome_usuario)
+            colunas["codigo_funcionario"].append(item.codigo_funcionario)
+            colunas["inicio_periodo"].append(item.inicio_periodo)
+            colunas["fim_periodo"].append(item.fim_periodo)
+            colunas["horas_regulares"].append(item.horas_regulares)
+            colunas["horas_extras"].append(item.horas_extras)
+            colunas["horas_extras_semanais"].append(item.horas_extras_semanais)
+            colunas["total_horas"].append(item.total_horas)
+            colunas["faltas"].append(item.faltas)
+            colunas["atrasos"].append(item.atrasos)
+
+        return pa.table(colunas, schema=ServicoExportacao.SCHEMA_FOLHA)
+
+    @staticmethod
+    def tabela_registros(linhas: List[Dict]) -> pa.Table:
+        """
+        Monta tabela Arrow de registros de ponto a partir das linhas brutas
+
+        Os valores são transpostos uma única vez para listas por coluna; timestamps
+        são convertidos de ISO 8601 de forma vetorizada pelo próprio Arrow.
+
+        Args:
+            linhas: Linhas de registros_ponto como retornadas pelo Supabase
+
+        Returns:
+            Tabela Arrow com uma linha por registro
+        """
+        schema = ServicoExportacao.SCHEMA_REGISTROS
+        arrays = []
+
+        for campo in schema:
+            valores = [linha.get(campo.name) for linha in linhas]
+
+            if pa.types.is_timestamp(campo.type):
+                array = pa.array(valores, type=pa.string()).cast(campo.type)
+            elif pa.types.is_dictionary(campo.type):
+                array = pa.array(valores, type=pa.string()).dictionary_encode().cast(campo.type)
+            elif pa.types.is_floating(campo.type):
+                array = pa.array(
+                    [float(v) if v is not None else None for v in valores],
+                    type=campo.type
+                )
+            else:
+                array = pa.array(valores, type=campo.type)
+
+            arrays.append(array)
+
+        return pa.Table.from_arrays(arrays, schema=schema)
+
+    @staticmethod
+    def serializar(tabela: pa.Table, formato: str) -> bytes:
+        """
+        Serializa tabela Arrow no formato colunar solicitado
+
+        Args:
+            tabela: Tabela Arrow
+            formato: "parquet" ou "arrow" (Arrow IPC em formato de arquivo)
+
+        Returns:
+            Bytes do arquivo gerado (compressão zstd)
+        """
+        saida = pa.BufferOutputStream()
+
+        if formato.lower() == "parquet":
+            pq.write_table(tabela, saida, compression="zstd")
+        elif formato.lower() == "arrow":
+            opcoes = ipc.IpcWriteOptions(compression="zstd")
+            with ipc.new_file(saida, tabela.schema, options=opcoes) as escritor:
+                escritor.write_table(tabela)
+        else:
+            raise ValueError(f"Formato colunar não suportado: {formato}")
+
+        return saida.getvalue().to_pybytes()
+
+    @staticmethod
+    async def obter_registros_brutos(
+        supabase: Client,
+        empresa_id: str,
+        data_inicio: datetime,
+        data_fim: datetime
+    ) -> List[Dict]:
+        """
+        Lê todos os registros da empresa no período, em páginas
+
+        Args:
+            supabase: Cliente Supabase
+            empresa_id: ID da empresa
+            data_inicio: Data inicial
+            data_fim: Data final
+
+        Returns:
+            Linhas brutas de registros_ponto ordenadas por timestamp
+        """
+        linhas: List[Dict] = []
+        inicio = 0
+
+        while True:
+            resposta = supabase.table("registros_ponto")\
+                .select(ServicoExportacao.COLUNAS_REGISTROS)\
+                .eq("empresa_id", empresa_id)\
+                .gte("timestamp", data_inicio.isoformat())\
+                .lte("timestamp", data_fim.isoformat())\
+                .order("timestamp")\
+                .order("id")\
+                .range(inicio, inicio + ServicoExportacao.TAMANHO_PAGINA - 1)\
+                .execute()
+
+            pagina = resposta.data or []
+            linhas.extend(pagina)
+
+            if len(pagina) < ServicoExportacao.TAMANHO_PAGINA:
+                break
+            inicio += ServicoExportacao.TAMANHO_PAGINA
+
+        logger.info("Registros lidos para exportação: empresa=%s, total=%s", empresa_id, len(linhas))
+
+        return linhas
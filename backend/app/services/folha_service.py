@@ -1,7 +1,11 @@
 from supabase import Client
 from app.models.schemas import DadosFolhaPagamento, PerfilUsuario
-from datetime import datetime, timedelta
-from typing import Dict, List
+from app.services.jornada_service import ServicoJornada, JornadaEmpresa
+from app.services.calendario_service import ServicoCalendario
+from app.services.fuso_service import ServicoFuso
+from app.services.replica_service import ServicoReplica
+from datetime import date, datetime, timedelta, timezone
+from typing import Callable, Dict, List, Optional
 import logging
 
 logger = logging.getLogger(__name__)
@@ -10,10 +14,10 @@ logger = logging.getLogger(__name__)
 class ServicoFolha:
     """Serviço para cálculos de folha de pagamento"""
     
-    # Configurações padrão (podem vir das configurações da empresa)
-    JORNADA_DIARIA_HORAS = 8.0
-    JORNADA_SEMANAL_HORAS = 44.0
-    TOLERANCIA_MINUTOS = 10
+    # Configurações padrão (a jornada efetiva vem de ServicoJornada)
+    JORNADA_DIARIA_HORAS = ServicoJornada.JORNADA_DIARIA_HORAS
+    JORNADA_SEMANAL_HORAS = ServicoJornada.JORNADA_SEMANAL_HORAS
+    TOLERANCIA_MINUTOS = ServicoJornada.TOLERANCIA_MINUTOS
     
     @staticmethod
     async def calcular_dados_folha(
@@ -35,39 +39,30 @@ class ServicoFolha:
             Dados calculados para folha
         """
         # Buscar perfil do usuário
-        perfil_response = supabase.table("perfis")\
-            .select("*")\
-            .eq("id", usuario_id)\
-            .single()\
-            .execute()
-        
-        usuario = PerfilUsuario(**perfil_response.data)
-        
-        # Buscar configurações da empresa (se existirem)
-        empresa_response = supabase.table("empresas")\
-            .select("configuracoes")\
-            .eq("id", str(usuario.empresa_id))\
-            .single()\
-            .execute()
-        
-        config = empresa_response.data.get("configuracoes", {}) if empresa_response.data else {}
-        jornada_diaria = config.get("jornada_diaria_horas", ServicoFolha.JORNADA_DIARIA_HORAS)
-        tolerancia = config.get("tolerancia_atraso_minutos", ServicoFolha.TOLERANCIA_MINUTOS)
-        
-        # Buscar todos os registros do período
-        registros_response = supabase.table("registros_ponto")\
-            .select("*")\
-            .eq("usuario_id", usuario_id)\
-            .gte("timestamp", data_inicio.isoformat())\
-            .lte("timestamp", data_fim.isoformat())\
-            .order("timestamp")\
-            .execute()
+        perfil = await ServicoReplica.ler_perfil(supabase, usuario_id)
+        
+        if not perfil:
+            raise ValueError(f"Usuário {usuario_id} não encontrado")
+        
+        usuario = PerfilUsuario(**perfil)
+        
+        # Jornada compilada da empresa (em cache)
+        jornada = await ServicoJornada.obter_jornada(supabase, str(usuario.empresa_id))
+        
+        # Buscar todos os registros do período (datas sem fuso estão no horário da empresa),
+        # com folga no fim para jornadas que atravessam a meia-noite
+        inicio_utc, fim_utc = ServicoFuso.limites_periodo_utc(data_inicio, data_fim, jornada.fuso_horario)
+        registros = await ServicoReplica.ler_registros_usuario(
+            supabase,
+            usuario_id,
+            inicio_utc,
+            fim_utc
+        )
         
         # Processar registros
         resultado = ServicoFolha._processar_registros_folha(
-            registros_response.data,
-            jornada_diaria,
-            tolerancia,
+            registros,
+            jornada,
             data_inicio,
             data_fim
         )
@@ -80,50 +75,42 @@ class ServicoFolha:
             fim_periodo=data_fim.isoformat(),
             horas_regulares=resultado["horas_normais"],
             horas_extras=resultado["horas_extras"],
+            horas_extras_semanais=resultado["horas_extras_semanais"],
             total_horas=resultado["total_horas"],
             faltas=resultado["faltas"],
             atrasos=resultado["atrasos"]
         )
     
     @staticmethod
-    def _processar_registros_folha(
-        registros: List[Dict],
-        jornada_diaria: float,
-        tolerancia: int,
-        data_inicio: datetime,
-        data_fim: datetime
-    ) -> Dict:
+    def _resumir_dias(registros: List[Dict], jornada: JornadaEmpresa) -> Dict[date, Dict]:
         """
-        Processa registros para cálculo da folha
+        Agrupa registros brutos por dia local e calcula entrada, saída e horas trabalhadas
+        
+        O dia de cada registro é o dia local (fuso da empresa) da entrada que
+        abriu a jornada, então saídas após a meia-noite ficam no dia da entrada.
         
         Args:
-            registros: Lista de registros brutos
-            jornada_diaria: Jornada diária em horas
-            tolerancia: Tolerância para atrasos em minutos
-            data_inicio: Data início do período
-            data_fim: Data fim do período
+            registros: Lista de registros brutos de um funcionário
+            jornada: Jornada compilada da empresa
         
         Returns:
-            Dicionário com totalizadores
+            Dicionário data -> {"entrada", "saida", "horas"} (horas é None sem entrada e saída)
         """
-        from collections import defaultdict
+        registros = sorted(registros, key=lambda x: x["timestamp"])
+        timestamps = [
+            datetime.fromisoformat(registro["timestamp"].replace("Z", "+00:00"))
+            for registro in registros
+        ]
         
-        # Agrupar por dia
-        registros_por_dia = defaultdict(list)
-        for registro in registros:
-            timestamp = datetime.fromisoformat(registro["timestamp"].replace("Z", "+00:00"))
-            data = timestamp.date()
-            registros_por_dia[data].append(registro)
-        
-        # Calcular totais
-        horas_normais = 0.0
-        horas_extras = 0.0
-        dias_trabalhados = 0
-        atrasos = 0
-        
-        # Calcular dias úteis no período (simplificado - não considera feriados)
-        dias_totais = (data_fim.date() - data_inicio.date()).days + 1
+        # Agrupar por dia local da jornada
+        registros_por_dia = ServicoFuso.agrupar_por_dia_local(
+            list(zip(timestamps, registros)),
+            timestamps,
+            [registro["tipo_registro"] for registro in registros],
+            jornada.tabela_fuso
+        )
         
+        dias = {}
         for data, regs_dia in registros_por_dia.items():
             # Encontrar entrada e saída
             entrada = None
@@ -131,8 +118,7 @@ class ServicoFolha:
             duracao_intervalo = 0
             inicio_intervalo = None
             
-            for reg in sorted(regs_dia, key=lambda x: x["timestamp"]):
-                timestamp = datetime.fromisoformat(reg["timestamp"].replace("Z", "+00:00"))
+            for timestamp, reg in regs_dia:
                 tipo = reg["tipo_registro"]
                 
                 if tipo == "clock_in" and not entrada:
@@ -145,34 +131,98 @@ class ServicoFolha:
                     duracao_intervalo += (timestamp - inicio_intervalo).total_seconds() / 3600
                     inicio_intervalo = None
             
+            horas = None
             if entrada and saida:
+                horas = (saida - entrada).total_seconds() / 3600 - duracao_intervalo
+            
+            dias[data] = {"entrada": entrada, "saida": saida, "horas": horas}
+        
+        return dias
+    
+    @staticmethod
+    def _processar_registros_folha(
+        registros: List[Dict],
+        jornada: JornadaEmpresa,
+        data_inicio: datetime,
+        data_fim: datetime
+    ) -> Dict:
+        """
+        Processa registros para cálculo da folha
+        
+        Horas extras consideram o limite diário e, por semana ISO, o limite
+        semanal: horas da semana acima da jornada semanal que não foram
+        contadas como extras diárias também viram extras.
+        
+        Args:
+            registros: Lista de registros brutos
+            jornada: Jornada compilada da empresa
+            data_inicio: Data início do período (sem fuso = horário da empresa)
+            data_fim: Data fim do período (sem fuso = horário da empresa)
+        
+        Returns:
+            Dicionário com totalizadores
+        """
+        from collections import defaultdict
+        
+        jornada_diaria = jornada.jornada_diaria_horas
+        
+        # Calcular totais
+        horas_normais = 0.0
+        horas_extras = 0.0
+        dias_trabalhados = 0
+        atrasos = 0
+        
+        dias_com_entrada = set()
+        normais_por_semana = defaultdict(float)
+        
+        # Período em dias locais da empresa
+        tabela_fuso = jornada.tabela_fuso
+        inicio_periodo = tabela_fuso.data_local(data_inicio)
+        fim_periodo = tabela_fuso.data_local(data_fim)
+        
+        for data, dia in ServicoFolha._resumir_dias(registros, jornada).items():
+            if not inicio_periodo <= data <= fim_periodo:
+                continue
+            
+            if dia["entrada"]:
+                dias_com_entrada.add(data)
+            
+            if dia["horas"] is not None:
                 dias_trabalhados += 1
-                
-                # Calcular horas trabalhadas
-                total_horas_dia = (saida - entrada).total_seconds() / 3600
-                total_horas_dia -= duracao_intervalo
+                total_horas_dia = dia["horas"]
                 
                 # Separar horas normais e extras
-                if total_horas_dia <= jornada_diaria:
-                    horas_normais += total_horas_dia
-                else:
-                    horas_normais += jornada_diaria
-                    horas_extras += (total_horas_dia - jornada_diaria)
+                normais_dia = min(total_horas_dia, jornada_diaria)
+                horas_normais += normais_dia
+                horas_extras += total_horas_dia - normais_dia
+                normais_por_semana[data.isocalendar()[:2]] += normais_dia
                 
-                # Verificar atrasos (simplificado - assume entrada às 8h)
-                # Em produção, isso viria das configurações da empresa
-                hora_entrada_esperada = entrada.replace(hour=8, minute=0, second=0, microsecond=0)
-                atraso_minutos = (entrada - hora_entrada_esperada).total_seconds() / 60
-                if atraso_minutos > tolerancia:
+                # Verificar atrasos contra o horário esperado do dia da semana
+                if jornada.minutos_atraso(dia["entrada"]) > jornada.tolerancia_minutos:
                     atrasos += 1
         
-        # Calcular faltas (dias úteis - dias trabalhados)
-        # Simplificado: assume todos os dias como úteis
-        faltas = max(0, dias_totais - dias_trabalhados)
+        # Horas normais acima da jornada semanal viram extras
+        horas_extras_semanais = sum(
+            max(0.0, normais - jornada.jornada_semanal_horas)
+            for normais in normais_por_semana.values()
+        )
+        horas_normais -= horas_extras_semanais
+        horas_extras += horas_extras_semanais
+        
+        # Calcular faltas: dias úteis do calendário da empresa sem entrada registrada
+        # (dias ainda não transcorridos do período não contam)
+        fim_transcorrido = min(fim_periodo, tabela_fuso.data_local(datetime.now(timezone.utc)))
+        faltas = 0
+        if fim_transcorrido >= inicio_periodo:
+            faltas = ServicoCalendario.contar_faltas(
+                ServicoCalendario.mascara_dias_uteis(jornada, inicio_periodo, fim_transcorrido),
+                ServicoCalendario.mascara_dias(dias_com_entrada, inicio_periodo, fim_transcorrido)
+            )
         
         return {
             "horas_normais": round(horas_normais, 2),
             "horas_extras": round(horas_extras, 2),
+            "horas_extras_semanais": round(horas_extras_semanais, 2),
             "total_horas": round(horas_normais + horas_extras, 2),
             "dias_trabalhados": dias_trabalhados,
             "faltas": faltas,
@@ -184,7 +234,8 @@ class ServicoFolha:
         supabase: Client,
         empresa_id: str,
         data_inicio: datetime,
-        data_fim: datetime
+        data_fim: datetime,
+        progresso: Optional[Callable[[float], None]] = None
     ) -> List[DadosFolhaPagamento]:
         """
         Exporta dados de folha para todos os funcionários da empresa
@@ -194,27 +245,29 @@ class ServicoFolha:
             empresa_id: ID da empresa
             data_inicio: Data inicial
             data_fim: Data final
+            progresso: Callback opcional com a fração concluída (0 a 1)
         
         Returns:
             Lista com dados de folha de todos os funcionários
         """
         # Buscar todos os funcionários da empresa
-        usuarios_response = supabase.table("perfis")\
-            .select("id")\
-            .eq("empresa_id", empresa_id)\
-            .execute()
+        usuarios_ids = await ServicoReplica.ler_ids_perfis_empresa(supabase, empresa_id)
         
         resultados = []
-        for usuario in usuarios_response.data:
+        total = len(usuarios_ids)
+        for indice, usuario_id in enumerate(usuarios_ids, start=1):
             try:
                 dados_folha = await ServicoFolha.calcular_dados_folha(
                     supabase,
-                    usuario["id"],
+                    usuario_id,
                     data_inicio,
                     data_fim
                 )
                 resultados.append(dados_folha)
             except Exception as e:
-                logger.error(f"Erro ao calcular folha para usuário {usuario['id']}: {str(e)}")
+                logger.error(f"Erro ao calcular folha para usuário {usuario_id}: {str(e)}")
+            
+            if progresso:
+                progresso(indice / total)
         
         return resultados
@@ -0,0 +1,243 @@
+from bisect import bisect_right
+from collections import defaultdict
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Dict, List, Sequence, Tuple, TypeVar
+from zoneinfo import ZoneInfo
+
+T = TypeVar("T")
+
+# Ordinal de 1970-01-01 (dia 0 da contagem de dias desde a época Unix)
+ORDINAL_EPOCA = date(1970, 1, 1).toordinal()
+SEGUNDOS_DIA = 86400
+
+
+class TabelaFuso:
+    """
+    Tabela pré-computada das transições de deslocamento UTC de um fuso
+
+    `instantes[i]` é o instante Unix (segundos) a partir do qual vale o
+    deslocamento `deslocamentos[i]`; antes do primeiro instante vale
+    `deslocamento_inicial`. Converter um timestamp em dia local é uma busca
+    binária em uma lista pequena e uma soma, sem chamadas ao zoneinfo.
+    """
+
+    __slots__ = ("nome", "instantes", "deslocamentos", "deslocamento_inicial", "limite_inferior", "limite_superior")
+
+    def __init__(
+        self,
+        nome: str,
+        instantes: List[int],
+        deslocamentos: List[int],
+        deslocamento_inicial: int,
+        limite_inferior: int,
+        limite_superior: int
+    ):
+        self.nome = nome
+        self.instantes = instantes
+        self.deslocamentos = deslocamentos
+        self.deslocamento_inicial = deslocamento_inicial
+        self.limite_inferior = limite_inferior
+        self.limite_superior = limite_superior
+
+    def deslocamento(self, instante: float) -> int:
+        """Deslocamento UTC (segundos) vigente no instante Unix informado"""
+        if instante < self.limite_inferior or instante >= self.limite_superior:
+            # Fora do intervalo pré-computado: consulta direta ao zoneinfo
+            momento = datetime.fromtimestamp(instante, tz=timezone.utc).astimezone(ZoneInfo(self.nome))
+            return int(momento.utcoffset().total_seconds())
+
+        indice = bisect_right(self.instantes, instante) - 1
+        return self.deslocamento_inicial if indice < 0 else self.deslocamentos[indice]
+
+    def dias_locais(self, instantes: Sequence[float]) -> List[int]:
+        """
+        Converter instantes Unix em dias locais (dias desde 1970-01-01) em lote
+
+        Args:
+            instantes: Instantes Unix em segundos
+
+        Returns:
+            Dia local de cada instante, na mesma ordem
+        """
+        if not self.instantes:
+            # Fuso sem transições no intervalo (ex.: America/Sao_Paulo desde 2019)
+            deslocamento = self.deslocamento_inicial
+            inferior, superior = self.limite_inferior, self.limite_superior
+            if all(inferior <= instante < superior for instante in instantes):
+                return [int(instante + deslocamento) // SEGUNDOS_DIA for instante in instantes]
+
+        return [int(instante + self.deslocamento(instante)) // SEGUNDOS_DIA for instante in instantes]
+
+    def data_local(self, momento: datetime) -> date:
+        """Data local de um datetime (sem fuso = já está no horário local)"""
+        if momento.tzinfo is None:
+            return momento.date()
+        instante = momento.timestamp()
+        return date.fromordinal(ORDINAL_EPOCA + int(instante + self.deslocamento(instante)) // SEGUNDOS_DIA)
+
+
+class ServicoFuso:
+    """Serviço de conversão de timestamps para dias no fuso horário da empresa"""
+
+    # Intervalo pré-computado das tabelas de transição
+    ANO_INICIAL = 2000
+    ANO_FINAL = 2060
+
+    # Sessões abertas há mais tempo que isso são consideradas sem saída
+    DURACAO_MAXIMA_SESSAO = timedelta(hours=20)
+
+    # Jornada que começa em um dia pode terminar no seguinte; registros
+    # são buscados com essa folga após o fim do período (a sessão mais
+    # longa aceita pelo agrupamento, iniciada no fim do último dia)
+    MARGEM_SESSAO = DURACAO_MAXIMA_SESSAO
+
+    _tabelas: Dict[str, TabelaFuso] = {}
+
+    @staticmethod
+    def tabela(nome: str) -> TabelaFuso:
+        """Tabela de transições do fuso (construída uma vez por processo)"""
+        tabela = ServicoFuso._tabelas.get(nome)
+        if tabela is None:
+            tabela = ServicoFuso.construir_tabela(nome)
+            ServicoFuso._tabelas[nome] = tabela
+        return tabela
+
+    @staticmethod
+    def construir_tabela(nome: str) -> TabelaFuso:
+        """
+        Construir a tabela de transições do fuso no intervalo pré-computado
+
+        Amostra o deslocamento a cada dia e, onde ele muda, localiza o
+        segundo exato da transição por busca binária.
+
+        Args:
+            nome: Nome IANA do fuso (ex.: "America/Sao_Paulo")
+
+        Returns:
+            Tabela de transições
+        """
+        zona = ZoneInfo(nome)
+
+        def deslocamento(instante: int) -> int:
+            momento = datetime.fromtimestamp(instante, tz=timezone.utc).astimezone(zona)
+            return int(momento.utcoffset().total_seconds())
+
+        inferior = int(datetime(ServicoFuso.ANO_INICIAL, 1, 1, tzinfo=timezone.utc).timestamp())
+        superior = int(datetime(ServicoFuso.ANO_FINAL + 1, 1, 1, tzinfo=timezone.utc).timestamp())
+
+        instantes: List[int] = []
+        deslocamentos: List[int] = []
+        inicial = deslocamento(inferior)
+        atual = inicial
+        anterior = inferior
+
+        for amostra in range(inferior + SEGUNDOS_DIA, superior + 1, SEGUNDOS_DIA):
+            valor = deslocamento(amostra)
+            if valor != atual:
+                # Transição em (anterior, amostra]: busca binária pelo primeiro segundo
+                baixo, alto = anterior, amostra
+                while alto - baixo > 1:
+                    meio = (baixo + alto) // 2
+                    if deslocamento(meio) == atual:
+                        baixo = meio
+                    else:
+                        alto = meio
+                instantes.append(alto)
+                deslocamentos.append(valor)
+                atual = valor
+            anterior = amostra
+
+        return TabelaFuso(nome, instantes, deslocamentos, inicial, inferior, superior)
+
+    @staticmethod
+    def para_utc(momento: datetime, nome_fuso: str) -> datetime:
+        """
+        Converter datetime para UTC (sem fuso = horário local da empresa)
+
+        Args:
+            momento: Datetime informado pelo usuário
+            nome_fuso: Fuso horário da empresa
+
+        Returns:
+            Datetime com fuso UTC
+        """
+        if momento.tzinfo is None:
+            momento = momento.replace(tzinfo=ZoneInfo(nome_fuso))
+        return momento.astimezone(timezone.utc)
+
+    @staticmethod
+    def inicio_dia_utc(dia: date, nome_fuso: str) -> datetime:
+        """Instante UTC da meia-noite local do dia"""
+        return ServicoFuso.para_utc(datetime.combine(dia, time.min), nome_fuso)
+
+    @staticmethod
+    def limites_periodo_utc(data_inicio: datetime, data_fim: datetime, nome_fuso: str) -> Tuple[datetime, datetime]:
+        """
+        Intervalo UTC a ler para os dias locais de data_inicio a data_fim
+
+        Cobre os dias inteiros (o período é filtrado por data local), com
+        MARGEM_SESSAO após o último para jornadas que atravessam a meia-noite.
+
+        Args:
+            data_inicio: Início do período (sem fuso = horário local da empresa)
+            data_fim: Fim do período (sem fuso = horário local da empresa)
+            nome_fuso: Fuso horário da empresa
+
+        Returns:
+            Tupla (início, fim) em UTC
+        """
+        tabela = ServicoFuso.tabela(nome_fuso)
+        return (
+            ServicoFuso.inicio_dia_utc(tabela.data_local(data_inicio), nome_fuso),
+            ServicoFuso.inicio_dia_utc(tabela.data_local(data_fim) + timedelta(days=1), nome_fuso) + ServicoFuso.MARGEM_SESSAO
+        )
+
+    @staticmethod
+    def agrupar_por_dia_local(
+        itens: Sequence[T],
+        timestamps: Sequence[datetime],
+        tipos: Sequence[str],
+        tabela: TabelaFuso
+    ) -> Dict[date, List[T]]:
+        """
+        Agrupar registros de um funcionário pelo dia local da jornada
+
+        Cada registro vai para o dia local da entrada que abriu sua jornada,
+        de modo que uma saída após a meia-noite fica no mesmo dia da entrada.
+        Registros sem jornada aberta vão para o próprio dia local.
+
+        Args:
+            itens: Registros (qualquer tipo) ordenados por timestamp
+            timestamps: Timestamp (com fuso) de cada registro
+            tipos: tipo_registro de cada registro ("clock_in", "clock_out", ...)
+            tabela: Tabela de transições do fuso da empresa
+
+        Returns:
+            Dicionário data local -> registros, em ordem cronológica
+        """
+        instantes = [momento.timestamp() for momento in timestamps]
+        dias = tabela.dias_locais(instantes)
+        duracao_maxima = ServicoFuso.DURACAO_MAXIMA_SESSAO.total_seconds()
+
+        grupos: Dict[date, List[T]] = defaultdict(list)
+        dia_sessao = None
+        inicio_sessao = 0.0
+
+        for item, tipo, instante, dia in zip(itens, tipos, instantes, dias):
+            if dia_sessao is not None and instante - inicio_sessao > duracao_maxima:
+                dia_sessao = None
+
+            if tipo == "clock_in":
+                dia_sessao = dia
+                inicio_sessao = instante
+                destino = dia
+            elif dia_sessao is not None:
+                destino = dia_sessao
+                if tipo == "clock_out":
+                    dia_sessao = None
+            else:
+                destino = dia
+
+            grupos[date.fromordinal(ORDINAL_EPOCA + destino)].append(item)
+
+        return grupos
@@ -0,0 +1,251 @@
+from supabase import Client
+from app.config import settings
+from app.services.cache_service import ServicoCache
+from app.supabase_client import obter_supabase
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Tuple
+import math
+import secrets
+import time as relogio
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Raio médio da Terra e comprimento de um grau de latitude (metros)
+RAIO_TERRA_METROS = 6371008.8
+METROS_POR_GRAU = math.pi * RAIO_TERRA_METROS / 180
+
+
+@dataclass(frozen=True)
+class LocalGeocerca:
+    """Local permitido para registro de ponto (círculo em torno de um centro)"""
+    id: str
+    nome: str
+    latitude: float
+    longitude: float
+    raio_metros: float
+
+
+def distancia_metros(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """Distância entre dois pontos pela fórmula de haversine"""
+    fi1, fi2 = math.radians(lat1), math.radians(lat2)
+    delta_fi = fi2 - fi1
+    delta_lambda = math.radians(lon2 - lon1)
+    a = math.sin(delta_fi / 2) ** 2 + math.cos(fi1) * math.cos(fi2) * math.sin(delta_lambda / 2) ** 2
+    return 2 * RAIO_TERRA_METROS * math.asin(min(1.0, math.sqrt(a)))
+
+
+class IndiceLocais:
+    """
+    Grade regular sobre os locais de uma empresa
+
+    Cada local é inscrito em todas as células (de lado tamanho_celula_metros,
+    em graus de latitude) tocadas pelo retângulo que envolve seu círculo. Uma
+    consulta lê uma única célula e calcula a distância só para os locais
+    dela, de modo que o custo não depende de quantos locais a empresa tem.
+    """
+
+    # Locais que tocariam mais células que isso (perto dos polos) ficam fora da grade
+    MAX_CELULAS_POR_LOCAL = 4096
+
+    def __init__(self, locais: Iterable[LocalGeocerca], tamanho_celula_metros: float = 1000):
+        self.locais: Tuple[LocalGeocerca, ...] = tuple(locais)
+        self._passo = max(tamanho_celula_metros, 1) / METROS_POR_GRAU
+        celulas: Dict[Tuple[int, int], List[LocalGeocerca]] = {}
+        fora_da_grade: List[LocalGeocerca] = []
+
+        for local in self.locais:
+            delta_lat = local.raio_metros / METROS_POR_GRAU
+            cosseno = math.cos(math.radians(local.latitude))
+            delta_lon = 180.0 if cosseno < 1e-6 else min(local.raio_metros / (METROS_POR_GRAU * cosseno), 180.0)
+
+            linhas = range(self._celula(local.latitude - delta_lat), self._celula(local.latitude + delta_lat) + 1)
+            colunas = range(self._celula(local.longitude - delta_lon), self._celula(local.longitude + delta_lon) + 1)
+            if len(linhas) * len(colunas) > self.MAX_CELULAS_POR_LOCAL:
+                fora_da_grade.append(local)
+                continue
+
+            for linha in linhas:
+                for coluna in colunas:
+                    celulas.setdefault((linha, coluna), []).append(local)
+
+        self._celulas: Dict[Tuple[int, int], Tuple[LocalGeocerca, ...]] = {
+            chave: tuple(valor) for chave, valor in celulas.items()
+        }
+        self._fora_da_grade: Tuple[LocalGeocerca, ...] = tuple(fora_da_grade)
+
+    def __len__(self) -> int:
+        return len(self.locais)
+
+    def _celula(self, graus: float) -> int:
+        return math.floor(graus / self._passo)
+
+    def localizar(self, latitude: float, longitude: float) -> Optional[LocalGeocerca]:
+        """
+        Local cujo raio contém o ponto (o de centro mais próximo, se houver vários)
+
+        Returns:
+            Local encontrado ou None
+        """
+        candidatos = self._celulas.get((self._celula(latitude), self._celula(longitude)), ())
+        encontrado, menor = None, math.inf
+
+        for local in candidatos + self._fora_da_grade:
+            distancia = distancia_metros(latitude, longitude, local.latitude, local.longitude)
+            if distancia <= local.raio_metros and distancia < menor:
+                encontrado, menor = local, distancia
+
+        return encontrado
+
+
+class ServicoGeocerca:
+    """
+    Validação da localização do registro de ponto contra os locais da empresa
+
+    O índice de cada empresa fica na memória do worker. Alterações feitas
+    pelo backend incrementam a versão da empresa no ServicoCache (vista por
+    todos os workers se o cache for compartilhado), e o índice é relido
+    quando a versão muda ou após CACHE_LOCAIS_TTL_SEGUNDOS (ou
+    CACHE_LOCAIS_VAZIO_TTL_SEGUNDOS, se a empresa não tem locais).
+
+    Os locais são lidos com a service key: com o cliente da requisição, o
+    RLS de locais_empresa devolveria uma lista vazia e a validação aceitaria
+    qualquer localização.
+    """
+
+    PREFIXO_VERSAO = "locais:versao:"
+    TAMANHO_PAGINA = 1000
+
+    # empresa_id -> (versão, instante da leitura, índice)
+    _indices: Dict[str, Tuple[int, float, IndiceLocais]] = {}
+
+    @staticmethod
+    def versao(empresa_id: str) -> int:
+        """Versão atual dos locais da empresa"""
+        chave = ServicoGeocerca.PREFIXO_VERSAO + str(empresa_id)
+        cache = ServicoCache.cache()
+
+        versao = cache.obter(chave)
+        if versao is None:
+            versao = cache.atualizar(chave, lambda atual: atual if atual is not None else secrets.randbits(32))
+
+        return versao
+
+    @staticmethod
+    def marcar_alteracao(empresa_id: str) -> None:
+        """Registrar que os locais da empresa mudaram"""
+        ServicoGeocerca.versao(empresa_id)
+        ServicoCache.cache().atualizar(ServicoGeocerca.PREFIXO_VERSAO + str(empresa_id), lambda atual: atual + 1)
+
+    @staticmethod
+    def descartar(empresa_id: str) -> None:
+        """Remover o índice da empresa da memória (empresa removida)"""
+        ServicoGeocerca._indices.pop(str(empresa_id), None)
+
+    @staticmethod
+    def listar(supabase: Client, empresa_id: str, apenas_ativos: bool = False) -> List[Dict]:
+        """
+        Ler os locais da empresa em páginas, em ordem de id
+
+        Args:
+            supabase: Cliente Supabase
+            empresa_id: ID da empresa
+            apenas_ativos: Ignorar locais desativados
+
+        Returns:
+            Linhas de locais_empresa
+        """
+        linhas = []
+        ultimo_id = None
+
+        while True:
+            consulta = supabase.table("locais_empresa")\
+                .select("*")\
+                .eq("empresa_id", str(empresa_id))
+            if apenas_ativos:
+                consulta = consulta.eq("ativo", True)
+            if ultimo_id:
+                consulta = consulta.gt("id", ultimo_id)
+            pagina = consulta.order("id").limit(ServicoGeocerca.TAMANHO_PAGINA).execute().data
+
+            linhas.extend(pagina)
+            if len(pagina) < ServicoGeocerca.TAMANHO_PAGINA:
+                return linhas
+            ultimo_id = pagina[-1]["id"]
+
+    @staticmethod
+    def carregar(empresa_id: str) -> IndiceLocais:
+        """
+        Ler os locais ativos da empresa (service key) e montar o índice
+
+        Args:
+            empresa_id: ID da empresa
+
+        Returns:
+            Índice dos locais ativos
+        """
+        locais = [
+            LocalGeocerca(
+                id=linha["id"],
+                nome=linha["nome"],
+                latitude=float(linha["latitude"]),
+                longitude=float(linha["longitude"]),
+                raio_metros=float(linha["raio_metros"])
+            )
+            for linha in ServicoGeocerca.listar(obter_supabase(usar_service_key=True), empresa_id, apenas_ativos=True)
+        ]
+
+        return IndiceLocais(locais, settings.geocerca_tamanho_celula_metros)
+
+    @staticmethod
+    def obter_indice(empresa_id: str) -> IndiceLocais:
+        """
+        Índice de locais da empresa, relido se a versão mudou ou expirou
+
+        Args:
+            empresa_id: ID da empresa
+
+        Returns:
+            Índice dos locais ativos
+        """
+        empresa_id = str(empresa_id)
+        versao = ServicoGeocerca.versao(empresa_id)
+        agora = relogio.monotonic()
+
+        em_memoria = ServicoGeocerca._indices.get(empresa_id)
+        if em_memoria is not None and em_memoria[0] == versao:
+            # Índice vazio (empresa sem locais) expira antes: locais criados fora do backend valem logo
+            ttl = settings.cache_locais_ttl_segundos if len(em_memoria[2]) else settings.cache_locais_vazio_ttl_segundos
+            if agora - em_memoria[1] < ttl:
+                return em_memoria[2]
+
+        indice = ServicoGeocerca.carregar(empresa_id)
+        ServicoGeocerca._indices[empresa_id] = (versao, agora, indice)
+
+        return indice
+
+    @staticmethod
+    def validar(empresa_id: str, latitude: float, longitude: float) -> Optional[str]:
+        """
+        Verificar se a localização do ponto está em um local da empresa
+
+        Args:
+            empresa_id: ID da empresa
+            latitude: Latitude do registro
+            longitude: Longitude do registro
+
+        Returns:
+            ID do local encontrado, ou None se a empresa não tem locais cadastrados
+
+        Raises:
+            ValueError: Se a empresa tem locais e o ponto não está em nenhum
+        """
+        indice = ServicoGeocerca.obter_indice(empresa_id)
+        if not len(indice):
+            return None
+
+        local = indice.localizar(latitude, longitude)
+        if local is None:
+            raise ValueError("Localização fora dos locais permitidos da empresa")
+
+        return local.id
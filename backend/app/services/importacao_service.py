@@ -0,0 +1,263 @@
+from supabase import Client
+from pydantic import ValidationError
+from app.config import settings
+from app.models.schemas import RequisicaoRegistro, RespostaImportacao
+from app.services.estatisticas_service import ServicoEstatisticas
+from app.services.perfil_service import ServicoPerfis
+from app.services.cache_service import ServicoCache
+from collections import Counter
+from typing import Callable, Dict, List, Optional, Tuple
+import asyncio
+import csv
+import io
+import uuid
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class ServicoImportacao:
+    """
+    Importação em lote de funcionários (contas de Auth + perfis)
+
+    As contas são criadas no Supabase Auth em paralelo, limitado por
+    IMPORTACAO_CONCORRENCIA chamadas simultâneas; os perfis são inseridos em
+    lotes. Linhas cujo perfil não pôde ser gravado têm a conta de Auth
+    removida, de modo que nenhuma conta fica sem perfil.
+
+    Importações com mais de IMPORTACAO_MAX_LINHAS_SINCRONAS linhas válidas
+    rodam como tarefa (ServicoTarefas). As linhas validadas, que trazem as
+    senhas, não vão para os metadados da tarefa em disco: ficam em memória
+    (guardar_lote) até o produtor retirá-las, no mesmo processo.
+    """
+
+    # Lotes aguardando a tarefa de importação: chave -> linhas validadas
+    _lotes: Dict[str, List[Tuple[int, RequisicaoRegistro]]] = {}
+
+    @staticmethod
+    def guardar_lote(linhas: List[Tuple[int, RequisicaoRegistro]]) -> str:
+        """Guardar linhas validadas para a tarefa de importação; retorna a chave do lote"""
+        chave = uuid.uuid4().hex
+        ServicoImportacao._lotes[chave] = linhas
+        return chave
+
+    @staticmethod
+    def retirar_lote(chave: str) -> Optional[List[Tuple[int, RequisicaoRegistro]]]:
+        """Retirar as linhas guardadas (None se o lote não existir mais)"""
+        return ServicoImportacao._lotes.pop(chave, None)
+
+    @staticmethod
+    def resumir(resultados: List[Dict]) -> RespostaImportacao:
+        """Relatório da importação a partir dos resultados por linha"""
+        resultados = sorted(resultados, key=lambda resultado: resultado["linha"])
+        criados = sum(1 for resultado in resultados if resultado["sucesso"])
+        return RespostaImportacao(
+            total=len(resultados),
+            criados=criados,
+            falhas=len(resultados) - criados,
+            resultados=resultados
+        )
+
+    @staticmethod
+    def ler_csv(conteudo: bytes) -> List[Dict]:
+        """
+        Ler planilha CSV (separador "," ou ";", com cabeçalho)
+
+        Colunas reconhecidas: email, senha, nome_completo, funcao,
+        codigo_funcionario e empresa_id (opcional se informada na requisição)
+
+        Args:
+            conteudo: Bytes do arquivo (UTF-8, com ou sem BOM)
+
+        Returns:
+            Linhas como dicionários
+
+        Raises:
+            ValueError: Se o arquivo não puder ser lido
+        """
+        try:
+            texto = conteudo.decode("utf-8-sig")
+        except UnicodeDecodeError:
+            raise ValueError("Arquivo CSV deve estar em UTF-8")
+
+        primeira_linha = texto.split("\n", 1)[0]
+        separador = ";" if primeira_linha.count(";") > primeira_linha.count(",") else ","
+
+        leitor = csv.DictReader(io.StringIO(texto), delimiter=separador)
+        if not leitor.fieldnames or "email" not in [campo.strip() for campo in leitor.fieldnames]:
+            raise ValueError("CSV sem cabeçalho ou sem a coluna email")
+
+        return [
+            {chave.strip(): (valor.strip() if isinstance(valor, str) else valor)
+             for chave, valor in linha.items() if chave}
+            for linha in leitor
+        ]
+
+    @staticmethod
+    def validar_linhas(
+        linhas: List[Dict],
+        empresa_id_padrao: Optional[str] = None
+    ) -> Tuple[List[Tuple[int, RequisicaoRegistro]], List[Dict]]:
+        """
+        Validar linhas da importação
+
+        Args:
+            linhas: Linhas lidas do CSV ou JSON
+            empresa_id_padrao: Empresa usada nas linhas sem empresa_id
+
+        Returns:
+            Tupla (linhas válidas como (número, requisição), resultados das linhas inválidas)
+        """
+        emails = Counter(str(linha.get("email") or "").strip().lower() for linha in linhas)
+        emails.pop("", None)  # Linha sem email: erro de validação, não repetição
+        validas = []
+        invalidas = []
+
+        for numero, linha in enumerate(linhas, start=1):
+            dados = {chave: valor for chave, valor in linha.items() if valor not in (None, "")}
+            if empresa_id_padrao and "empresa_id" not in dados:
+                dados["empresa_id"] = empresa_id_padrao
+
+            email = str(dados.get("email", "")).strip().lower()
+            if emails[email] > 1:
+                invalidas.append(ServicoImportacao._resultado(numero, email, erro="Email repetido no arquivo"))
+                continue
+
+            try:
+                validas.append((numero, RequisicaoRegistro(**dados)))
+            except ValidationError as e:
+                erro = "; ".join(f"{'.'.join(str(parte) for parte in item['loc'])}: {item['msg']}" for item in e.errors())
+                invalidas.append(ServicoImportacao._resultado(numero, email or None, erro=erro))
+
+        return validas, invalidas
+
+    @staticmethod
+    async def importar(
+        supabase: Client,
+        linhas: List[Tuple[int, RequisicaoRegistro]],
+        progresso: Optional[Callable[[float], None]] = None
+    ) -> List[Dict]:
+        """
+        Criar contas e perfis das linhas validadas
+
+        Args:
+            supabase: Cliente Supabase (service key)
+            linhas: Linhas válidas de validar_linhas
+            progresso: Callback opcional com a fração concluída (0 a 1)
+
+        Returns:
+            Resultado por linha, na ordem recebida
+        """
+        semaforo = asyncio.Semaphore(max(settings.importacao_concorrencia, 1))
+        contas_criadas = [0]
+
+        async def criar_conta(requisicao: RequisicaoRegistro) -> str:
+            async with semaforo:
+                try:
+                    resposta = await asyncio.to_thread(supabase.auth.admin.create_user, {
+                        "email": requisicao.email,
+                        "password": requisicao.senha,
+                        "email_confirm": True
+                    })
+                finally:
+                    contas_criadas[0] += 1
+                    if progresso:
+                        # Contas de Auth são a parte demorada; perfis e rollback ficam nos 10% finais
+                        progresso(0.9 * contas_criadas[0] / len(linhas))
+            if not resposta.user:
+                raise ValueError("Falha ao criar usuário")
+            return resposta.user.id
+
+        contas = await asyncio.gather(
+            *(criar_conta(requisicao) for _, requisicao in linhas),
+            return_exceptions=True
+        )
+
+        resultados: Dict[int, Dict] = {}
+        pendentes: List[Tuple[int, RequisicaoRegistro, str]] = []
+
+        for (numero, requisicao), conta in zip(linhas, contas):
+            if isinstance(conta, Exception):
+                resultados[numero] = ServicoImportacao._resultado(numero, requisicao.email, erro=str(conta))
+            else:
+                pendentes.append((numero, requisicao, str(conta)))
+
+        orfas: List[str] = []
+        tamanho_lote = max(settings.importacao_lote_perfis, 1)
+
+        for inicio in range(0, len(pendentes), tamanho_lote):
+            lote = pendentes[inicio:inicio + tamanho_lote]
+            perfis = [ServicoImportacao._dados_perfil(requisicao, usuario_id) for _, requisicao, usuario_id in lote]
+
+            try:
+                supabase.table("perfis").insert(perfis).execute()
+                for numero, requisicao, usuario_id in lote:
+                    resultados[numero] = ServicoImportacao._resultado(numero, requisicao.email, usuario_id=usuario_id)
+                continue
+            except Exception as e:
+                # Lote rejeitado como um todo: gravar linha a linha para isolar as inválidas
+                logger.warning(f"Lote de perfis rejeitado, gravando individualmente: {str(e)}")
+
+            for (numero, requisicao, usuario_id), perfil in zip(lote, perfis):
+                try:
+                    supabase.table("perfis").insert(perfil).execute()
+                    resultados[numero] = ServicoImportacao._resultado(numero, requisicao.email, usuario_id=usuario_id)
+                except Exception as e:
+                    orfas.append(usuario_id)
+                    resultados[numero] = ServicoImportacao._resultado(
+                        numero, requisicao.email, erro=f"Falha ao criar perfil: {str(e)}"
+                    )
+
+        if orfas:
+            await ServicoImportacao._remover_contas(supabase, orfas, semaforo)
+
+        criados = Counter(
+            str(requisicao.empresa_id) for numero, requisicao, _ in pendentes if resultados[numero]["sucesso"]
+        )
+        for empresa_id, quantidade in criados.items():
+            await ServicoCache.executar(ServicoEstatisticas.ajustar_usuarios, empresa_id, quantidade)
+            await ServicoCache.executar(ServicoPerfis.marcar_alteracao, empresa_id)
+
+        logger.info("Importação concluída: %s de %s usuários criados", sum(criados.values()), len(linhas))
+
+        return [resultados[numero] for numero, _ in linhas]
+
+    @staticmethod
+    async def _remover_contas(supabase: Client, usuario_ids: List[str], semaforo: asyncio.Semaphore) -> None:
+        """Rollback: remover do Auth contas cujo perfil não foi criado"""
+        async def remover(usuario_id: str) -> None:
+            async with semaforo:
+                try:
+                    await asyncio.to_thread(supabase.auth.admin.delete_user, usuario_id)
+                except Exception as e:
+                    logger.error(f"Falha no rollback da conta {usuario_id}: {str(e)}")
+
+        await asyncio.gather(*(remover(usuario_id) for usuario_id in usuario_ids))
+
+    @staticmethod
+    def _dados_perfil(requisicao: RequisicaoRegistro, usuario_id: str) -> Dict:
+        """Linha de perfis para o usuário criado"""
+        return {
+            "id": usuario_id,
+            "empresa_id": str(requisicao.empresa_id),
+            "email": requisicao.email,
+            "nome_completo": requisicao.nome_completo,
+            "funcao": requisicao.funcao.value,
+            "codigo_funcionario": requisicao.codigo_funcionario
+        }
+
+    @staticmethod
+    def _resultado(
+        linha: int,
+        email: Optional[str],
+        usuario_id: Optional[str] = None,
+        erro: Optional[str] = None
+    ) -> Dict:
+        """Resultado de uma linha da importação"""
+        return {
+            "linha": linha,
+            "email": email,
+            "sucesso": erro is None,
+            "usuario_id": usuario_id,
+            "erro": erro
+        }
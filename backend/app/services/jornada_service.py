@@ -0,0 +1,290 @@
+from supabase import Client
+from app.config import settings
+from app.services.fuso_service import ServicoFuso, TabelaFuso
+from app.services.cache_service import ServicoCache, registrar_tipo
+from dataclasses import dataclass
+from datetime import date, datetime, time
+from typing import FrozenSet, Optional, Tuple
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+# Chaves aceitas em configuracoes["horarios"] e configuracoes["dias_trabalho"]
+DIAS_SEMANA = ("seg", "ter", "qua", "qui", "sex", "sab", "dom")
+
+
+@registrar_tipo
+@dataclass(frozen=True)
+class HorarioDia:
+    """Horário esperado de um dia da semana"""
+    entrada: time
+    saida: time
+
+
+@registrar_tipo
+@dataclass(frozen=True)
+class JornadaEmpresa:
+    """Configuração de jornada compilada (imutável) de uma empresa"""
+    empresa_id: str
+    jornada_diaria_horas: float
+    jornada_semanal_horas: float
+    tolerancia_minutos: int
+    fuso_horario: str
+    horarios: Tuple[Optional[HorarioDia], ...]  # Índice = weekday() (0 = segunda)
+    feriados_nacionais: bool = True
+    feriados_anuais: FrozenSet[Tuple[int, int]] = frozenset()  # (mês, dia) recorrentes
+    datas_sem_expediente: FrozenSet[date] = frozenset()  # Feriados e folgas em datas específicas
+
+    @property
+    def zona(self) -> ZoneInfo:
+        """Fuso horário da empresa"""
+        return ZoneInfo(self.fuso_horario)
+
+    @property
+    def tabela_fuso(self) -> TabelaFuso:
+        """Tabela pré-computada de transições UTC do fuso da empresa"""
+        return ServicoFuso.tabela(self.fuso_horario)
+
+    def horario(self, dia: date) -> Optional[HorarioDia]:
+        """Horário esperado para a data (None se não for dia de trabalho)"""
+        return self.horarios[dia.weekday()]
+
+    def eh_dia_trabalho(self, dia: date) -> bool:
+        """Indica se o dia da semana da data tem jornada prevista"""
+        return self.horarios[dia.weekday()] is not None
+
+    def minutos_atraso(self, entrada: datetime) -> float:
+        """
+        Minutos de atraso de uma entrada em relação ao horário esperado
+
+        Args:
+            entrada: Timestamp da entrada (com fuso)
+
+        Returns:
+            Minutos após o horário esperado no dia local (0 se não houver jornada no dia)
+        """
+        entrada_local = entrada.astimezone(self.zona)
+        horario = self.horario(entrada_local.date())
+        if horario is None:
+            return 0.0
+
+        esperado = datetime.combine(entrada_local.date(), horario.entrada, tzinfo=self.zona)
+        return (entrada_local - esperado).total_seconds() / 60
+
+
+class ServicoJornada:
+    """Serviço para compilar e manter em cache a jornada de trabalho das empresas"""
+
+    # Valores padrão quando a empresa não configura a jornada
+    JORNADA_DIARIA_HORAS = 8.0
+    JORNADA_SEMANAL_HORAS = 44.0
+    TOLERANCIA_MINUTOS = 10
+    FUSO_HORARIO = "America/Sao_Paulo"
+    HORARIO_ENTRADA = "08:00"
+    HORARIO_SAIDA = "17:00"
+    DIAS_TRABALHO = ("seg", "ter", "qua", "qui", "sex")
+
+    # Prefixo das jornadas compiladas no ServicoCache
+    PREFIXO_CACHE = "jornada:"
+
+    @staticmethod
+    def compilar(empresa_id: str, configuracoes: Optional[dict]) -> JornadaEmpresa:
+        """
+        Compila as configurações brutas da empresa em uma jornada imutável
+
+        Chaves reconhecidas em configuracoes:
+            jornada_diaria_horas, jornada_semanal_horas, tolerancia_atraso_minutos,
+            fuso_horario, horario_entrada, horario_saida, dias_trabalho (lista de
+            "seg".."dom"), horarios ({"seg": {"entrada": "08:00", "saida": "17:00"},
+            "sab": null, ...}) para sobrescrever dias específicos, feriados
+            ("AAAA-MM-DD" ou "MM-DD" recorrente), dias_folga ("AAAA-MM-DD") e
+            feriados_nacionais (bool)
+
+        Args:
+            empresa_id: ID da empresa
+            configuracoes: JSON empresas.configuracoes
+
+        Returns:
+            Jornada compilada
+
+        Raises:
+            ValueError: Se alguma configuração for inválida
+        """
+        config = configuracoes or {}
+        if not isinstance(config, dict):
+            raise ValueError("Configurações devem ser um objeto")
+
+        fuso = config.get("fuso_horario") or ServicoJornada.FUSO_HORARIO
+        try:
+            ZoneInfo(fuso)
+        except (ZoneInfoNotFoundError, ValueError, TypeError):
+            raise ValueError(f"Fuso horário inválido: {fuso}")
+
+        entrada_padrao = ServicoJornada._ler_hora(config.get("horario_entrada", ServicoJornada.HORARIO_ENTRADA))
+        saida_padrao = ServicoJornada._ler_hora(config.get("horario_saida", ServicoJornada.HORARIO_SAIDA))
+
+        dias_trabalho = config.get("dias_trabalho", ServicoJornada.DIAS_TRABALHO)
+        if not isinstance(dias_trabalho, (list, tuple)):
+            raise ValueError("dias_trabalho deve ser uma lista")
+        for dia in dias_trabalho:
+            if dia not in DIAS_SEMANA:
+                raise ValueError(f"Dia da semana inválido: {dia}")
+
+        horarios = []
+        sobrescritos = config.get("horarios") or {}
+        if not isinstance(sobrescritos, dict):
+            raise ValueError("horarios deve ser um objeto por dia da semana")
+        for dia in DIAS_SEMANA:
+            if dia in sobrescritos:
+                valor = sobrescritos[dia]
+                if valor is None:
+                    horarios.append(None)
+                elif not isinstance(valor, dict):
+                    raise ValueError(f"Horário de {dia} deve ser um objeto ou null")
+                else:
+                    horarios.append(HorarioDia(
+                        entrada=ServicoJornada._ler_hora(valor.get("entrada", entrada_padrao)),
+                        saida=ServicoJornada._ler_hora(valor.get("saida", saida_padrao))
+                    ))
+            elif dia in dias_trabalho:
+                horarios.append(HorarioDia(entrada=entrada_padrao, saida=saida_padrao))
+            else:
+                horarios.append(None)
+
+        feriados_anuais = set()
+        datas_sem_expediente = set()
+        for chave in ("feriados", "dias_folga"):
+            if not isinstance(config.get(chave) or [], (list, tuple)):
+                raise ValueError(f"{chave} deve ser uma lista")
+        datas = [("feriados", valor) for valor in config.get("feriados") or []]
+        datas += [("dias_folga", valor) for valor in config.get("dias_folga") or []]
+        for chave, valor in datas:
+            try:
+                # Recorrente (MM-DD) só em feriados: folga é sempre uma data específica
+                if chave == "feriados" and len(str(valor)) == 5:
+                    mes, dia = (int(parte) for parte in str(valor).split("-"))
+                    date(2000, mes, dia)  # Validar (2000 é bissexto)
+                    feriados_anuais.add((mes, dia))
+                else:
+                    datas_sem_expediente.add(date.fromisoformat(str(valor)))
+            except ValueError:
+                raise ValueError(f"Data de feriado/folga inválida: {valor}")
+
+        try:
+            jornada_diaria = float(config.get("jornada_diaria_horas", ServicoJornada.JORNADA_DIARIA_HORAS))
+            jornada_semanal = float(config.get("jornada_semanal_horas", ServicoJornada.JORNADA_SEMANAL_HORAS))
+            tolerancia = int(config.get("tolerancia_atraso_minutos", ServicoJornada.TOLERANCIA_MINUTOS))
+        except (TypeError, ValueError):
+            raise ValueError("Jornada e tolerância devem ser numéricas")
+
+        feriados_nacionais = config.get("feriados_nacionais", True)
+        if not isinstance(feriados_nacionais, bool):
+            raise ValueError("feriados_nacionais deve ser true ou false")
+
+        return JornadaEmpresa(
+            empresa_id=str(empresa_id),
+            jornada_diaria_horas=jornada_diaria,
+            jornada_semanal_horas=jornada_semanal,
+            tolerancia_minutos=tolerancia,
+            fuso_horario=fuso,
+            horarios=tuple(horarios),
+            feriados_nacionais=feriados_nacionais,
+            feriados_anuais=frozenset(feriados_anuais),
+            datas_sem_expediente=frozenset(datas_sem_expediente)
+        )
+
+    @staticmethod
+    def _ler_hora(valor) -> time:
+        """Converte "HH:MM" (ou time) em time"""
+        if isinstance(valor, time):
+            return valor
+        try:
+            return time.fromisoformat(str(valor))
+        except ValueError:
+            raise ValueError(f"Horário inválido: {valor}")
+
+    @staticmethod
+    async def obter_jornada(supabase: Client, empresa_id: str) -> JornadaEmpresa:
+        """
+        Obter jornada compilada da empresa, usando o cache quando possível
+
+        Args:
+            supabase: Cliente Supabase
+            empresa_id: ID da empresa
+
+        Returns:
+            Jornada compilada
+        """
+        empresa_id = str(empresa_id)
+
+        cache = ServicoCache.cache()
+        em_cache = await ServicoCache.executar(cache.obter, ServicoJornada.PREFIXO_CACHE + empresa_id)
+        if em_cache is not None:
+            return em_cache
+
+        resposta = supabase.table("empresas")\
+            .select("configuracoes")\
+            .eq("id", empresa_id)\
+            .single()\
+            .execute()
+
+        configuracoes = resposta.data.get("configuracoes", {}) if resposta.data else {}
+
+        try:
+            jornada = ServicoJornada.compilar(empresa_id, configuracoes)
+        except ValueError as e:
+            # Configuração salva inválida não deve derrubar os cálculos
+            logger.error(f"Configuração de jornada inválida para empresa {empresa_id}: {str(e)}")
+            jornada = ServicoJornada.compilar(empresa_id, {})
+
+        await ServicoCache.executar(
+            cache.definir, ServicoJornada.PREFIXO_CACHE + empresa_id, jornada, settings.cache_jornada_ttl_segundos
+        )
+
+        return jornada
+
+    @staticmethod
+    def precarregar(supabase: Client) -> int:
+        """
+        Compilar e colocar em cache a jornada de todas as empresas ativas
+
+        Usado no aquecimento: uma única consulta em vez de uma por empresa
+        nas primeiras requisições.
+
+        Args:
+            supabase: Cliente Supabase (service key)
+
+        Returns:
+            Quantidade de jornadas carregadas
+        """
+        resposta = supabase.table("empresas")\
+            .select("id, configuracoes")\
+            .eq("ativa", True)\
+            .execute()
+
+        for empresa in resposta.data:
+            empresa_id = str(empresa["id"])
+            try:
+                jornada = ServicoJornada.compilar(empresa_id, empresa.get("configuracoes"))
+            except Exception as e:
+                # Uma empresa com configuração quebrada não pode interromper o aquecimento das demais
+                logger.error(f"Configuração de jornada inválida para empresa {empresa_id}: {str(e)}")
+                jornada = ServicoJornada.compilar(empresa_id, {})
+            ServicoCache.cache().definir(ServicoJornada.PREFIXO_CACHE + empresa_id, jornada, settings.cache_jornada_ttl_segundos)
+
+        return len(resposta.data)
+
+    @staticmethod
+    def invalidar(empresa_id: Optional[str] = None) -> None:
+        """
+        Invalidar jornada em cache
+
+        Args:
+            empresa_id: Empresa a invalidar (None invalida todas)
+        """
+        if empresa_id is None:
+            ServicoCache.cache().limpar(ServicoJornada.PREFIXO_CACHE)
+        else:
+            ServicoCache.cache().remover(ServicoJornada.PREFIXO_CACHE + str(empresa_id))
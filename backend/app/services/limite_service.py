@@ -0,0 +1,256 @@
+from app.config import settings
+from app.arquivos import diretorio_privado
+from app.models.enums import ClasseLimite
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+import math
+import os
+import sqlite3
+import threading
+import time as relogio
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class Orcamento:
+    """Capacidade do balde e período em que ele se enche por completo"""
+    capacidade: int
+    periodo_segundos: float
+
+    @property
+    def taxa(self) -> float:
+        """Fichas repostas por segundo"""
+        return self.capacidade / self.periodo_segundos
+
+    @staticmethod
+    def ler(valor: str) -> "Orcamento":
+        """
+        Ler orçamento no formato "requisições/segundos" (ex.: "10/60")
+
+        Raises:
+            ValueError: Se o formato for inválido
+        """
+        try:
+            capacidade, periodo = str(valor).split("/")
+            orcamento = Orcamento(int(capacidade), float(periodo))
+        except ValueError:
+            raise ValueError(f"Orçamento de rate limit inválido: {valor}")
+        if orcamento.capacidade <= 0 or orcamento.periodo_segundos <= 0:
+            raise ValueError(f"Orçamento de rate limit inválido: {valor}")
+        return orcamento
+
+
+@dataclass(frozen=True)
+class Consumo:
+    """Resultado de uma tentativa de consumir uma ficha"""
+    permitido: bool
+    limite: int
+    restantes: int
+    reset_segundos: int  # Até o balde encher de novo
+    retry_after_segundos: int  # Até haver uma ficha (0 se permitido)
+
+
+class BaldesMemoria:
+    """Baldes de fichas no próprio processo"""
+
+    compartilhado = False
+
+    # Chamadas entre limpezas de baldes ociosos
+    INTERVALO_LIMPEZA = 10000
+
+    def __init__(self):
+        self._baldes: Dict[str, Tuple[float, float]] = {}  # chave -> (fichas, instante)
+        self._lock = threading.Lock()
+        self._chamadas = 0
+
+    def consumir(self, chave: str, orcamento: Orcamento, agora: float) -> Tuple[bool, float]:
+        """Consumir uma ficha; retorna (permitido, fichas restantes)"""
+        with self._lock:
+            fichas, instante = self._baldes.get(chave, (float(orcamento.capacidade), agora))
+            fichas = min(float(orcamento.capacidade), fichas + (agora - instante) * orcamento.taxa)
+
+            permitido = fichas >= 1.0
+            if permitido:
+                fichas -= 1.0
+            self._baldes[chave] = (fichas, agora)
+
+            self._chamadas += 1
+            if self._chamadas >= self.INTERVALO_LIMPEZA:
+                self._limpar(agora)
+
+            return permitido, fichas
+
+    def _limpar(self, agora: float) -> None:
+        """Descartar baldes sem uso há mais de uma hora (já estariam cheios)"""
+        self._chamadas = 0
+        for chave in [chave for chave, (_, instante) in self._baldes.items() if agora - instante > 3600]:
+            del self._baldes[chave]
+
+
+class BaldesSQLite:
+    """
+    Baldes de fichas em um arquivo SQLite compartilhado pelos workers do host
+
+    Cada consumo é uma transação IMMEDIATE curta (leitura e escrita do
+    balde), serializada entre processos pelo próprio SQLite.
+    """
+
+    compartilhado = True
+
+    INTERVALO_LIMPEZA = 10000
+
+    def __init__(self, caminho: str):
+        self._caminho = caminho
+        self._local = threading.local()
+        self._chamadas = 0
+        conexao = self._conexao()
+        conexao.execute(
+            "CREATE TABLE IF NOT EXISTS baldes ("
+            "chave TEXT PRIMARY KEY, fichas REAL NOT NULL, instante REAL NOT NULL)"
+        )
+
+    def _conexao(self) -> sqlite3.Connection:
+        """Conexão da thread atual (sqlite3 não compartilha conexões entre threads)"""
+        conexao = getattr(self._local, "conexao", None)
+        if conexao is None:
+            conexao = sqlite3.connect(self._caminho, timeout=5, isolation_level=None)
+            conexao.execute("PRAGMA journal_mode=WAL")
+            conexao.execute("PRAGMA synchronous=OFF")
+            self._local.conexao = conexao
+        return conexao
+
+    def consumir(self, chave: str, orcamento: Orcamento, agora: float) -> Tuple[bool, float]:
+        """Consumir uma ficha; retorna (permitido, fichas restantes)"""
+        conexao = self._conexao()
+        conexao.execute("BEGIN IMMEDIATE")
+        try:
+            linha = conexao.execute("SELECT fichas, instante FROM baldes WHERE chave = ?", (chave,)).fetchone()
+            fichas, instante = linha if linha else (float(orcamento.capacidade), agora)
+            # Relógios de processos diferentes: nunca repor fichas por tempo negativo
+            fichas = min(float(orcamento.capacidade), fichas + max(agora - instante, 0.0) * orcamento.taxa)
+
+            permitido = fichas >= 1.0
+            if permitido:
+                fichas -= 1.0
+
+            conexao.execute(
+                "INSERT INTO baldes (chave, fichas, instante) VALUES (?, ?, ?) "
+                "ON CONFLICT(chave) DO UPDATE SET fichas = excluded.fichas, instante = excluded.instante",
+                (chave, fichas, agora)
+            )
+
+            self._chamadas += 1
+            if self._chamadas >= self.INTERVALO_LIMPEZA:
+                self._chamadas = 0
+                conexao.execute("DELETE FROM baldes WHERE instante < ?", (agora - 3600,))
+
+            conexao.execute("COMMIT")
+        except Exception:
+            conexao.execute("ROLLBACK")
+            raise
+
+        return permitido, fichas
+
+
+class ServicoLimiteTaxa:
+    """
+    Rate limit por token bucket, por usuário e por empresa
+
+    Cada classe de rota (registro de ponto, leitura, relatório pesado) tem
+    um orçamento por usuário e outro, maior, por empresa (opcional: orçamento
+    vazio desliga o balde). Uma requisição só passa se houver ficha nos
+    baldes aplicáveis. O estado fica em memória
+    (LIMITE_BACKEND=memoria) ou em um arquivo SQLite compartilhado pelos
+    workers do mesmo host (LIMITE_BACKEND=sqlite).
+    """
+
+    _backend = None
+    _orcamentos: Dict[Tuple[ClasseLimite, str], Orcamento] = {}
+
+    @staticmethod
+    def backend():
+        """Backend configurado (criado no primeiro uso)"""
+        if ServicoLimiteTaxa._backend is None:
+            if settings.limite_backend == "sqlite":
+                caminho = settings.limite_sqlite_caminho or os.path.join(diretorio_privado(), "limites.sqlite3")
+                ServicoLimiteTaxa._backend = BaldesSQLite(caminho)
+            else:
+                ServicoLimiteTaxa._backend = BaldesMemoria()
+        return ServicoLimiteTaxa._backend
+
+    @staticmethod
+    def orcamento(classe: ClasseLimite, escopo: str) -> Optional[Orcamento]:
+        """
+        Orçamento configurado para a classe de rota
+
+        Args:
+            classe: Classe de rota
+            escopo: "usuario" ou "empresa"
+
+        Returns:
+            Orçamento, ou None se a configuração estiver vazia (sem balde)
+        """
+        chave = (classe, escopo)
+        if chave not in ServicoLimiteTaxa._orcamentos:
+            valor = getattr(settings, f"limite_{classe.value}_{escopo}")
+            ServicoLimiteTaxa._orcamentos[chave] = Orcamento.ler(valor) if str(valor).strip() else None
+        return ServicoLimiteTaxa._orcamentos[chave]
+
+    @staticmethod
+    def consumir(classe: ClasseLimite, usuario_id: str, empresa_id: Optional[str]) -> Optional[Consumo]:
+        """
+        Consumir uma ficha dos baldes do usuário e da empresa
+
+        O balde da empresa só é consultado se o do usuário permitir, para que
+        um usuário bloqueado não gaste o orçamento da empresa.
+
+        Args:
+            classe: Classe da rota chamada
+            usuario_id: ID do usuário autenticado
+            empresa_id: ID da empresa do usuário
+
+        Returns:
+            Consumo do balde mais restritivo (base dos cabeçalhos RateLimit-*),
+            ou None se a classe não tiver nenhum balde configurado
+        """
+        backend = ServicoLimiteTaxa.backend()
+        agora = relogio.time()
+        consumos = []
+
+        escopos = [("usuario", str(usuario_id))]
+        if empresa_id:
+            escopos.append(("empresa", str(empresa_id)))
+
+        for escopo, identificador in escopos:
+            orcamento = ServicoLimiteTaxa.orcamento(classe, escopo)
+            if orcamento is None:
+                continue
+            permitido, fichas = backend.consumir(f"{classe.value}:{escopo}:{identificador}", orcamento, agora)
+            consumos.append(Consumo(
+                permitido=permitido,
+                limite=orcamento.capacidade,
+                restantes=int(fichas),
+                reset_segundos=math.ceil((orcamento.capacidade - fichas) / orcamento.taxa),
+                retry_after_segundos=0 if permitido else max(math.ceil((1.0 - fichas) / orcamento.taxa), 1)
+            ))
+            if not permitido:
+                return consumos[-1]
+
+        if not consumos:
+            return None
+
+        return min(consumos, key=lambda consumo: consumo.restantes)
+
+    @staticmethod
+    def cabecalhos(consumo: Consumo) -> Dict[str, str]:
+        """Cabeçalhos RateLimit-* (e Retry-After quando bloqueado)"""
+        cabecalhos = {
+            "RateLimit-Limit": str(consumo.limite),
+            "RateLimit-Remaining": str(consumo.restantes),
+            "RateLimit-Reset": str(consumo.reset_segundos)
+        }
+        if not consumo.permitido:
+            cabecalhos["Retry-After"] = str(consumo.retry_after_segundos)
+        return cabecalhos
@@ -0,0 +1,215 @@
+from supabase import Client
+from pydantic import ValidationError
+from app.config import settings
+from app.models.schemas import RequisicaoPonto, PerfilUsuario
+from app.services.clock_service import ServicoPonto
+from typing import AsyncIterator, Dict, Optional, Tuple
+import json
+import zlib
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Início obrigatório do corpo (formato e versão)
+ASSINATURA_LOTE = b"PONTO\x01"
+
+# Tamanho máximo do cabeçalho JSON de um quadro (bytes)
+TAMANHO_MAXIMO_CABECALHO = 4096
+
+
+class LeitorLote:
+    """
+    Leitura incremental de um lote binário de registros offline
+
+    Formato do corpo (opcionalmente comprimido com gzip):
+
+        "PONTO\\x01"
+        repetido por registro:
+            u32 big-endian: tamanho do cabeçalho
+            cabeçalho JSON UTF-8: {"tipo_ponto", "latitude", "longitude", "tamanho_foto"}
+            tamanho_foto bytes da foto JPEG (ausente se tamanho_foto = 0)
+
+    O corpo é descomprimido em blocos de TAMANHO_BLOCO e só o quadro atual
+    fica na memória, então o consumo não depende do tamanho do lote.
+    """
+
+    TAMANHO_BLOCO = 64 * 1024
+
+    def __init__(self, fluxo: AsyncIterator[bytes], comprimido: bool = False):
+        self._fluxo = fluxo.__aiter__()
+        self._comprimido = comprimido
+        self._descompressor = zlib.decompressobj(16 + zlib.MAX_WBITS) if comprimido else None
+        self._pendente = b""  # Entrada comprimida ainda não descomprimida
+        self._buffer = bytearray()
+        self._fim_do_corpo = False
+
+    async def _proximo_bloco(self) -> Optional[bytes]:
+        """Próximo bloco do corpo da requisição, ou None no fim"""
+        while not self._fim_do_corpo:
+            try:
+                bloco = await self._fluxo.__anext__()
+            except StopAsyncIteration:
+                self._fim_do_corpo = True
+                break
+            if bloco:
+                return bloco
+        return None
+
+    async def _abastecer(self) -> bool:
+        """Acrescentar dados ao buffer; False se o corpo terminou"""
+        if not self._comprimido:
+            bloco = await self._proximo_bloco()
+            if bloco is None:
+                return False
+            self._buffer += bloco
+            return True
+
+        while True:
+            if not self._pendente:
+                bloco = await self._proximo_bloco()
+                if bloco is None:
+                    return False
+                self._pendente = bloco
+
+            try:
+                dados = self._descompressor.decompress(self._pendente, self.TAMANHO_BLOCO)
+            except zlib.error:
+                raise ValueError("Lote inválido: conteúdo gzip corrompido")
+            self._pendente = self._descompressor.unconsumed_tail
+
+            if self._descompressor.eof:
+                # Membros gzip concatenados: continuar com um novo descompressor
+                self._pendente = self._descompressor.unused_data + self._pendente
+                self._descompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+
+            if dados:
+                self._buffer += dados
+                return True
+
+    async def ler_exato(self, tamanho: int) -> bytes:
+        """
+        Ler exatamente `tamanho` bytes do lote
+
+        Raises:
+            ValueError: Se o corpo terminar antes
+        """
+        while len(self._buffer) < tamanho:
+            if not await self._abastecer():
+                raise ValueError("Lote inválido: corpo truncado")
+
+        dados = bytes(self._buffer[:tamanho])
+        del self._buffer[:tamanho]
+        return dados
+
+    async def terminou(self) -> bool:
+        """Verificar se não há mais quadros"""
+        while not self._buffer:
+            if not await self._abastecer():
+                return True
+        return False
+
+    async def quadros(self) -> AsyncIterator[Tuple[Dict, Optional[bytes]]]:
+        """
+        Percorrer os quadros do lote
+
+        Yields:
+            Tupla (cabeçalho sem tamanho_foto, bytes da foto ou None)
+
+        Raises:
+            ValueError: Se a assinatura ou algum quadro for inválido
+        """
+        if await self.ler_exato(len(ASSINATURA_LOTE)) != ASSINATURA_LOTE:
+            raise ValueError("Lote inválido: assinatura desconhecida")
+
+        while not await self.terminou():
+            tamanho_cabecalho = int.from_bytes(await self.ler_exato(4), "big")
+            if not 0 < tamanho_cabecalho <= TAMANHO_MAXIMO_CABECALHO:
+                raise ValueError("Lote inválido: tamanho de cabeçalho fora do limite")
+
+            try:
+                cabecalho = json.loads(await self.ler_exato(tamanho_cabecalho))
+            except (UnicodeDecodeError, json.JSONDecodeError):
+                raise ValueError("Lote inválido: cabeçalho não é JSON")
+            if not isinstance(cabecalho, dict):
+                raise ValueError("Lote inválido: cabeçalho não é um objeto")
+
+            tamanho_foto = cabecalho.pop("tamanho_foto", 0)
+            if not isinstance(tamanho_foto, int) or not 0 <= tamanho_foto <= settings.sincronizacao_lote_max_foto_bytes:
+                raise ValueError("Lote inválido: tamanho de foto fora do limite")
+
+            foto = await self.ler_exato(tamanho_foto) if tamanho_foto else None
+            yield cabecalho, foto
+
+
+class ServicoLoteOffline:
+    """Sincronização de registros offline enviados como lote binário"""
+
+    @staticmethod
+    async def sincronizar(
+        supabase: Client,
+        usuario: PerfilUsuario,
+        fluxo: AsyncIterator[bytes],
+        comprimido: bool = False
+    ) -> Dict:
+        """
+        Registrar os pontos de um lote binário à medida que os quadros chegam
+
+        Cada quadro é registrado antes de o próximo ser lido. Se o lote for
+        interrompido por um quadro inválido, os quadros anteriores continuam
+        registrados e o erro é incluído na resposta: o cliente pode descartar
+        da fila os primeiros quantidade_sincronizada + quantidade_falhas.
+
+        Args:
+            supabase: Cliente Supabase
+            usuario: Perfil do usuário
+            fluxo: Corpo da requisição em blocos
+            comprimido: Corpo comprimido com gzip (Content-Encoding)
+
+        Returns:
+            Dicionário com resultados da sincronização
+
+        Raises:
+            ValueError: Se o corpo não começar com a assinatura do formato
+        """
+        sincronizados = 0
+        falhas = 0
+        erros = []
+
+        quadros = LeitorLote(fluxo, comprimido).quadros()
+
+        try:
+            async for cabecalho, foto in quadros:
+                if sincronizados + falhas >= settings.sincronizacao_lote_max_registros:
+                    erros.append(f"Lote interrompido: limite de {settings.sincronizacao_lote_max_registros} registros")
+                    break
+
+                tipo = cabecalho.get("tipo_ponto")
+                try:
+                    requisicao = RequisicaoPonto(**cabecalho)
+                    await ServicoPonto.registrar_ponto(supabase, usuario, requisicao, foto_bytes=foto)
+                    sincronizados += 1
+                except ValidationError as e:
+                    falhas += 1
+                    erros.append(f"{tipo}: registro inválido ({e.error_count()} erro(s) de validação)")
+                except Exception as e:
+                    falhas += 1
+                    erros.append(f"{tipo}: {str(e)}")
+                    logger.error(f"Falha ao sincronizar registro: {str(e)}")
+
+        except ValueError as e:
+            if sincronizados + falhas == 0 and not erros:
+                raise
+            erros.append(f"Lote interrompido: {str(e)}")
+        finally:
+            await quadros.aclose()
+
+        logger.info(
+            "Lote offline do usuário %s: %s sincronizados, %s falhas",
+            usuario.id, sincronizados, falhas
+        )
+
+        return {
+            "quantidade_sincronizada": sincronizados,
+            "quantidade_falhas": falhas,
+            "erros": erros
+        }
@@ -0,0 +1,256 @@
+from supabase import Client
+from app.config import settings
+from app.models.schemas import PerfilUsuario
+from app.services.cache_service import ServicoCache, registrar_tipo
+from typing import Dict, List, Optional, Sequence, Tuple
+import base64
+import hashlib
+import json
+import secrets
+import time as relogio
+import uuid
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Campos de perfil que podem ser projetados na listagem
+CAMPOS_PERFIL = tuple(PerfilUsuario.model_fields)
+
+# Colunas sempre lidas para montar o cursor (ordenação por nome e id)
+CAMPOS_CURSOR = ("nome_completo", "id")
+
+# Perfis em cache são gravados como (PerfilUsuario, versão)
+registrar_tipo(PerfilUsuario)
+
+
+class ServicoPerfis:
+    """
+    Listagem paginada de perfis, versão em memória dos perfis por empresa e
+    cache de curta duração do perfil do usuário autenticado
+
+    Toda escrita em perfis feita pelo backend incrementa a versão da empresa
+    (e a global, usada pela listagem de super admin). O ETag da listagem é
+    derivado dessa versão, do cache que a guarda e dos parâmetros, de modo
+    que uma listagem inalterada é confirmada com 304 sem consultar o banco.
+    Para limitar o efeito de escritas feitas fora do alcance do cache, o
+    ETag também muda a cada CACHE_PERFIS_TTL_SEGUNDOS. Perfis em cache
+    guardam a versão da empresa em que foram lidos e são relidos quando ela
+    muda. Versões e perfis ficam no ServicoCache.
+    """
+
+    ESCOPO_GLOBAL = "*"
+    PREFIXO_VERSAO = "perfis:versao:"
+    PREFIXO_PERFIL = "perfil:"
+
+    @staticmethod
+    def versao(empresa_id: Optional[str] = None) -> int:
+        """Versão atual dos perfis da empresa (None = todas as empresas)"""
+        chave = ServicoPerfis.PREFIXO_VERSAO + (str(empresa_id) if empresa_id else ServicoPerfis.ESCOPO_GLOBAL)
+        cache = ServicoCache.cache()
+
+        versao = cache.obter(chave)
+        if versao is None:
+            # Base aleatória: uma versão descartada pelo cache não volta a um valor já emitido
+            versao = cache.atualizar(chave, lambda atual: atual if atual is not None else secrets.randbits(32))
+
+        return versao
+
+    @staticmethod
+    def marcar_alteracao(empresa_id: str) -> None:
+        """
+        Registrar que os perfis da empresa mudaram
+
+        Args:
+            empresa_id: ID da empresa cujo perfil foi criado, alterado ou removido
+        """
+        for escopo in (str(empresa_id), ServicoPerfis.ESCOPO_GLOBAL):
+            ServicoPerfis.versao(escopo)
+            ServicoCache.cache().atualizar(ServicoPerfis.PREFIXO_VERSAO + escopo, lambda atual: atual + 1)
+
+    @staticmethod
+    def obter_perfil(supabase: Client, usuario_id: str) -> Optional[PerfilUsuario]:
+        """
+        Obter perfil do usuário, usando o cache quando possível
+
+        Args:
+            supabase: Cliente Supabase
+            usuario_id: ID do usuário autenticado
+
+        Returns:
+            Perfil ou None se não existir
+        """
+        chave = ServicoPerfis.PREFIXO_PERFIL + str(usuario_id)
+        cache = ServicoCache.cache()
+
+        em_cache = cache.obter(chave)
+        if em_cache is not None and em_cache[1] == ServicoPerfis.versao(em_cache[0].empresa_id):
+            return em_cache[0]
+
+        resposta = supabase.table("perfis").select("*").eq("id", str(usuario_id)).limit(1).execute()
+        if not resposta.data:
+            cache.remover(chave)
+            return None
+
+        perfil = PerfilUsuario(**resposta.data[0])
+        cache.definir(chave, (perfil, ServicoPerfis.versao(perfil.empresa_id)), settings.cache_perfil_usuario_ttl_segundos)
+
+        return perfil
+
+    @staticmethod
+    def precarregar_perfis(supabase: Client, usuario_ids: Sequence[str], tamanho_lote: int = 200) -> int:
+        """
+        Colocar em cache os perfis informados (aquecimento)
+
+        Args:
+            supabase: Cliente Supabase (service key)
+            usuario_ids: IDs dos usuários
+            tamanho_lote: IDs por consulta
+
+        Returns:
+            Quantidade de perfis carregados
+        """
+        ids = [str(usuario_id) for usuario_id in usuario_ids]
+        cache = ServicoCache.cache()
+        total = 0
+
+        for inicio in range(0, len(ids), tamanho_lote):
+            resposta = supabase.table("perfis")\
+                .select("*")\
+                .in_("id", ids[inicio:inicio + tamanho_lote])\
+                .execute()
+            for linha in resposta.data:
+                perfil = PerfilUsuario(**linha)
+                cache.definir(
+                    ServicoPerfis.PREFIXO_PERFIL + str(perfil.id),
+                    (perfil, ServicoPerfis.versao(perfil.empresa_id)),
+                    settings.cache_perfil_usuario_ttl_segundos
+                )
+            total += len(resposta.data)
+
+        return total
+
+    @staticmethod
+    def etag(empresa_id: Optional[str], parametros: Sequence) -> str:
+        """
+        ETag fraco da listagem
+
+        Args:
+            empresa_id: Empresa listada (None = todas)
+            parametros: Parâmetros que alteram o conteúdo (cursor, limite, campos, busca)
+
+        Returns:
+            Valor do cabeçalho ETag
+        """
+        janela = int(relogio.time() // max(settings.cache_perfis_ttl_segundos, 1))
+        chave = json.dumps([empresa_id, list(parametros)], default=str)
+        resumo = hashlib.sha1(chave.encode()).hexdigest()[:16]
+        return f'W/"{ServicoCache.cache().identificador}-{ServicoPerfis.versao(empresa_id)}-{janela}-{resumo}"'
+
+    @staticmethod
+    def validar_campos(campos: Optional[str]) -> Tuple[str, ...]:
+        """
+        Validar projeção pedida na listagem
+
+        Args:
+            campos: Nomes separados por vírgula (None = todos)
+
+        Returns:
+            Campos pedidos, na ordem de CAMPOS_PERFIL
+
+        Raises:
+            ValueError: Se algum campo não existir
+        """
+        if not campos:
+            return CAMPOS_PERFIL
+
+        pedidos = {campo.strip() for campo in campos.split(",") if campo.strip()}
+        desconhecidos = pedidos - set(CAMPOS_PERFIL)
+        if desconhecidos:
+            raise ValueError(f"Campos inválidos: {', '.join(sorted(desconhecidos))}")
+
+        return tuple(campo for campo in CAMPOS_PERFIL if campo in pedidos)
+
+    @staticmethod
+    def codificar_cursor(nome_completo: str, usuario_id: str) -> str:
+        """Cursor opaco apontando para depois do perfil informado"""
+        bruto = json.dumps([nome_completo, usuario_id], ensure_ascii=False).encode()
+        return base64.urlsafe_b64encode(bruto).decode().rstrip("=")
+
+    @staticmethod
+    def decodificar_cursor(cursor: str) -> Tuple[str, str]:
+        """
+        Decodificar cursor recebido do cliente
+
+        Raises:
+            ValueError: Se o cursor for inválido
+        """
+        try:
+            bruto = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+            nome_completo, usuario_id = json.loads(bruto)
+            str(uuid.UUID(usuario_id))
+            return str(nome_completo), usuario_id
+        except Exception:
+            raise ValueError("Cursor inválido")
+
+    @staticmethod
+    def _literal(valor: str) -> str:
+        """Valor entre aspas para filtros or=() do PostgREST"""
+        return '"' + valor.replace("\\", "\\\\").replace('"', '\\"') + '"'
+
+    @staticmethod
+    def listar(
+        supabase: Client,
+        empresa_id: Optional[str],
+        campos: Tuple[str, ...],
+        limite: int,
+        cursor: Optional[str] = None,
+        busca: Optional[str] = None
+    ) -> Tuple[List[Dict], Optional[str]]:
+        """
+        Listar perfis em ordem de nome, uma página por vez
+
+        Args:
+            supabase: Cliente Supabase
+            empresa_id: Empresa a listar (None = todas, super admin)
+            campos: Campos a retornar (validados por validar_campos)
+            limite: Tamanho da página
+            cursor: Cursor devolvido pela página anterior
+            busca: Trecho do nome ou do código do funcionário (sem diferenciar maiúsculas)
+
+        Returns:
+            Tupla (perfis projetados, cursor da próxima página ou None)
+
+        Raises:
+            ValueError: Se o cursor for inválido
+        """
+        colunas = list(campos) + [campo for campo in CAMPOS_CURSOR if campo not in campos]
+
+        consulta = supabase.table("perfis").select(",".join(colunas))
+
+        if empresa_id:
+            consulta = consulta.eq("empresa_id", str(empresa_id))
+
+        if busca:
+            padrao = ServicoPerfis._literal(f"*{busca}*")
+            consulta = consulta.or_(f"nome_completo.ilike.{padrao},codigo_funcionario.ilike.{padrao}")
+
+        if cursor:
+            nome, ultimo_id = ServicoPerfis.decodificar_cursor(cursor)
+            nome = ServicoPerfis._literal(nome)
+            consulta = consulta.or_(f"nome_completo.gt.{nome},and(nome_completo.eq.{nome},id.gt.{ultimo_id})")
+
+        # Uma linha a mais indica se há próxima página
+        resposta = consulta\
+            .order("nome_completo")\
+            .order("id")\
+            .limit(limite + 1)\
+            .execute()
+
+        linhas = resposta.data
+        proximo_cursor = None
+
+        if len(linhas) > limite:
+            linhas = linhas[:limite]
+            proximo_cursor = ServicoPerfis.codificar_cursor(linhas[-1]["nome_completo"], linhas[-1]["id"])
+
+        return [{campo: linha.get(campo) for campo in campos} for linha in linhas], proximo_cursor
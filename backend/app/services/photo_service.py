@@ -1,8 +1,10 @@
+import asyncio
 import base64
 import hashlib
-from datetime import datetime
-from typing import Optional
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional
 from supabase import Client
+from app.config import settings
 import logging
 
 logger = logging.getLogger(__name__)
@@ -13,6 +15,12 @@ class ServicoFoto:
     
     NOME_BUCKET = "fotos-ponto"
     
+    # Objetos por página na listagem do Storage
+    TAMANHO_LISTAGEM = 1000
+    
+    # URLs por filtro in() ao limpar referências (limite de tamanho da query string)
+    TAMANHO_LOTE_REFERENCIAS = 100
+    
     @staticmethod
     async def fazer_upload_foto(
         supabase: Client,
@@ -42,6 +50,34 @@ class ServicoFoto:
             # Decodificar base64 para bytes
             bytes_foto = base64.b64decode(foto_base64)
             
+        except Exception as e:
+            logger.error(f"Erro ao decodificar a foto: {str(e)}")
+            return None
+        
+        return await ServicoFoto.enviar_foto(supabase, usuario_id, empresa_id, bytes_foto, tipo_ponto)
+    
+    @staticmethod
+    async def enviar_foto(
+        supabase: Client,
+        usuario_id: str,
+        empresa_id: str,
+        bytes_foto: bytes,
+        tipo_ponto: str
+    ) -> Optional[str]:
+        """
+        Fazer upload dos bytes de uma foto JPEG e retornar URL pública
+        
+        Args:
+            supabase: Cliente Supabase
+            usuario_id: ID do usuário
+            empresa_id: ID da empresa (para organizar arquivos)
+            bytes_foto: Conteúdo da foto
+            tipo_ponto: Tipo do evento de ponto
+        
+        Returns:
+            URL pública da foto enviada ou None se o upload falhar
+        """
+        try:
             # Gerar nome de arquivo único
             timestamp = datetime.utcnow().strftime("%Y%m%d_%H%M%S")
             # Criar hash da foto para unicidade
@@ -58,7 +94,7 @@ class ServicoFoto:
             # Obter URL pública
             url_publica = supabase.storage.from_(ServicoFoto.NOME_BUCKET).get_public_url(nome_arquivo)
             
-            logger.info(f"Foto enviada com sucesso: {nome_arquivo}")
+            logger.info("Foto enviada com sucesso: %s", nome_arquivo)
             return url_publica
             
         except Exception as e:
@@ -90,9 +126,191 @@ class ServicoFoto:
             # Deletar do storage
             supabase.storage.from_(ServicoFoto.NOME_BUCKET).remove([nome_arquivo])
             
-            logger.info(f"Foto deletada com sucesso: {nome_arquivo}")
+            logger.info("Foto deletada com sucesso: %s", nome_arquivo)
             return True
             
         except Exception as e:
             logger.error(f"Erro ao deletar foto: {str(e)}")
             return False
+    
+    @staticmethod
+    def listar_pastas(supabase: Client, prefixo: str) -> List[str]:
+        """
+        Listar subpastas de uma pasta do bucket (ex.: funcionários de uma empresa)
+        
+        Args:
+            supabase: Cliente Supabase
+            prefixo: Pasta no bucket
+        
+        Returns:
+            Nomes das subpastas
+        """
+        bucket = supabase.storage.from_(ServicoFoto.NOME_BUCKET)
+        pastas = []
+        offset = 0
+        
+        while True:
+            pagina = bucket.list(prefixo, {"limit": ServicoFoto.TAMANHO_LISTAGEM, "offset": offset})
+            pastas.extend(item["name"] for item in pagina if not item.get("id"))
+            
+            if len(pagina) < ServicoFoto.TAMANHO_LISTAGEM:
+                return pastas
+            offset += ServicoFoto.TAMANHO_LISTAGEM
+    
+    @staticmethod
+    def listar_objetos_antigos(supabase: Client, prefixo: str, antes_de: datetime) -> List[Dict]:
+        """
+        Listar objetos de uma pasta criados antes da data informada
+        
+        A listagem é ordenada por data de criação e para na primeira página
+        que já alcança objetos mais novos que o limite.
+        
+        Args:
+            supabase: Cliente Supabase
+            prefixo: Pasta no bucket ("{empresa_id}/{usuario_id}")
+            antes_de: Data limite (com fuso)
+        
+        Returns:
+            Objetos expirados (dicionários do Storage com name, created_at e metadata)
+        """
+        bucket = supabase.storage.from_(ServicoFoto.NOME_BUCKET)
+        expirados = []
+        offset = 0
+        
+        while True:
+            pagina = bucket.list(prefixo, {
+                "limit": ServicoFoto.TAMANHO_LISTAGEM,
+                "offset": offset,
+                "sortBy": {"column": "created_at", "order": "asc"}
+            })
+            
+            for objeto in pagina:
+                if not objeto.get("id") or not objeto.get("created_at"):
+                    continue  # Subpasta
+                criado_em = datetime.fromisoformat(objeto["created_at"].replace("Z", "+00:00"))
+                if criado_em >= antes_de:
+                    return expirados
+                expirados.append(objeto)
+            
+            if len(pagina) < ServicoFoto.TAMANHO_LISTAGEM:
+                return expirados
+            offset += ServicoFoto.TAMANHO_LISTAGEM
+    
+    @staticmethod
+    async def limpar_fotos_antigas(
+        supabase: Client,
+        empresa_id: str,
+        antes_de: datetime,
+        simular: bool = False,
+        usuario_id: Optional[str] = None,
+        progresso: Optional[Callable[[float], None]] = None,
+        limpar_referencias: bool = True
+    ) -> Dict:
+        """
+        Remover fotos de ponto anteriores à data limite
+        
+        Percorre as pastas dos funcionários com concorrência limitada
+        (FOTOS_CONCORRENCIA). Para cada lote de até FOTOS_LOTE_REMOCAO objetos,
+        limpa foto_url dos registros que apontam para eles e remove os objetos
+        com uma única chamada. Se a remoção falhar, os objetos continuam no
+        bucket sem referência e são removidos na próxima execução.
+        
+        Args:
+            supabase: Cliente Supabase (service key)
+            empresa_id: ID da empresa
+            antes_de: Remover fotos criadas antes desta data
+            simular: Apenas contar o que seria removido
+            usuario_id: Restringir a um funcionário (opcional)
+            progresso: Callback com a fração de pastas processadas
+            limpar_referencias: Limpar foto_url dos registros (dispensável se os registros também serão removidos)
+        
+        Returns:
+            Métricas da limpeza
+        """
+        if antes_de.tzinfo is None:
+            antes_de = antes_de.replace(tzinfo=timezone.utc)
+        
+        bucket = supabase.storage.from_(ServicoFoto.NOME_BUCKET)
+        
+        if usuario_id:
+            prefixos = [f"{empresa_id}/{usuario_id}"]
+        else:
+            pastas = await asyncio.to_thread(ServicoFoto.listar_pastas, supabase, str(empresa_id))
+            prefixos = [f"{empresa_id}/{pasta}" for pasta in pastas]
+        
+        metricas = {
+            "simulacao": simular,
+            "antes_de": antes_de.isoformat(),
+            "pastas": len(prefixos),
+            "objetos_expirados": 0,
+            "bytes_expirados": 0,
+            "objetos_removidos": 0,
+            "registros_atualizados": 0,
+            "falhas": 0
+        }
+        
+        semaforo = asyncio.Semaphore(max(settings.fotos_concorrencia, 1))
+        tamanho_lote = max(settings.fotos_lote_remocao, 1)
+        concluidas = [0]
+        
+        async def processar(prefixo: str) -> None:
+            async with semaforo:
+                try:
+                    objetos = await asyncio.to_thread(ServicoFoto.listar_objetos_antigos, supabase, prefixo, antes_de)
+                except Exception as e:
+                    logger.error(f"Erro ao listar fotos de {prefixo}: {str(e)}")
+                    metricas["falhas"] += 1
+                    objetos = []
+                
+                metricas["objetos_expirados"] += len(objetos)
+                metricas["bytes_expirados"] += sum((objeto.get("metadata") or {}).get("size", 0) for objeto in objetos)
+                
+                caminhos = [f"{prefixo}/{objeto['name']}" for objeto in objetos]
+                
+                for inicio in range(0, 0 if simular else len(caminhos), tamanho_lote):
+                    lote = caminhos[inicio:inicio + tamanho_lote]
+                    try:
+                        if limpar_referencias:
+                            metricas["registros_atualizados"] += await asyncio.to_thread(
+                                ServicoFoto._limpar_referencias, supabase, empresa_id, lote
+                            )
+                        await asyncio.to_thread(bucket.remove, lote)
+                        metricas["objetos_removidos"] += len(lote)
+                    except Exception as e:
+                        logger.error(f"Erro ao remover lote de fotos de {prefixo}: {str(e)}")
+                        metricas["falhas"] += len(lote)
+            
+            concluidas[0] += 1
+            if progresso:
+                progresso(concluidas[0] / len(prefixos))
+        
+        await asyncio.gather(*(processar(prefixo) for prefixo in prefixos))
+        
+        logger.info(
+            "Limpeza de fotos da empresa %s: %s expiradas, %s removidas (simulação=%s)",
+            empresa_id, metricas["objetos_expirados"], metricas["objetos_removidos"], simular
+        )
+        
+        return metricas
+    
+    @staticmethod
+    def _limpar_referencias(supabase: Client, empresa_id: str, caminhos: List[str]) -> int:
+        """
+        Limpar foto_url dos registros que apontam para os objetos informados
+        
+        Returns:
+            Quantidade de registros atualizados
+        """
+        bucket = supabase.storage.from_(ServicoFoto.NOME_BUCKET)
+        urls = [bucket.get_public_url(caminho) for caminho in caminhos]
+        atualizados = 0
+        
+        for inicio in range(0, len(urls), ServicoFoto.TAMANHO_LOTE_REFERENCIAS):
+            resposta = supabase.table("registros_ponto")\
+                .update({"foto_url": None})\
+                .eq("empresa_id", str(empresa_id))\
+                .in_("foto_url", urls[inicio:inicio + ServicoFoto.TAMANHO_LOTE_REFERENCIAS])\
+                .execute()
+            atualizados += len(resposta.data or [])
+        
+        return atualizados
@@ -0,0 +1,231 @@
+from supabase import Client
+from app.config import settings
+from app.models.enums import EstadoPresenca, TipoPonto
+from app.services.fuso_service import ServicoFuso
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+import threading
+import time as relogio
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Estado em que cada tipo de registro deixa o funcionário
+ESTADO_POR_TIPO = {
+    TipoPonto.ENTRADA.value: EstadoPresenca.TRABALHANDO,
+    TipoPonto.FIM_INTERVALO.value: EstadoPresenca.TRABALHANDO,
+    TipoPonto.INICIO_INTERVALO.value: EstadoPresenca.INTERVALO,
+    TipoPonto.SAIDA.value: EstadoPresenca.AUSENTE
+}
+
+
+class ServicoPresenca:
+    """
+    Índice em memória de quem está trabalhando, em intervalo ou ausente
+
+    Mantém, por empresa, o estado atual de cada funcionário e o momento do
+    registro que o levou a esse estado. É atualizado a cada registro de
+    ponto gravado neste processo, reconstruído ao iniciar a partir do último
+    registro de cada funcionário (função SQL ultimos_registros_ponto) e
+    recarregado por empresa a cada PRESENCA_RECARGA_SEGUNDOS para absorver
+    escritas de outros processos.
+
+    A reconstrução pode rodar em outra thread (aquecimento) enquanto o event
+    loop registra pontos: o índice só é lido e alterado sob _lock, e as
+    alterações feitas durante uma reconstrução são reaplicadas sobre o
+    índice novo antes da troca.
+    """
+
+    FUNCAO_ULTIMOS_REGISTROS = "ultimos_registros_ponto"
+    TAMANHO_PAGINA = 1000
+
+    # empresa_id -> usuario_id -> (estado, desde)
+    _indice: Dict[str, Dict[str, Tuple[EstadoPresenca, datetime]]] = {}
+
+    # empresa_id -> instante (monotônico) da próxima recarga
+    _recarregar_em: Dict[str, float] = {}
+
+    _lock = threading.Lock()
+    _reconstrucoes_ativas = 0
+    # Alterações feitas durante reconstruções: (empresa_id, usuario_id, estado ou None se removido, momento)
+    _diario: List[Tuple[str, str, Optional[EstadoPresenca], Optional[datetime]]] = []
+
+    @staticmethod
+    def _aplicar(
+        indice: Dict[str, Dict[str, Tuple[EstadoPresenca, datetime]]],
+        empresa_id: str,
+        usuario_id: str,
+        estado: Optional[EstadoPresenca],
+        momento: Optional[datetime]
+    ) -> None:
+        """Aplicar uma alteração ao índice (chamar com o lock)"""
+        if estado is None:
+            usuarios = indice.get(empresa_id)
+            if usuarios is not None:
+                usuarios.pop(usuario_id, None)
+            return
+
+        usuarios = indice.setdefault(empresa_id, {})
+        atual = usuarios.get(usuario_id)
+
+        # Registros sincronizados do modo offline podem chegar fora de ordem
+        if atual is None or atual[1] <= momento:
+            usuarios[usuario_id] = (estado, momento)
+
+    @staticmethod
+    def _alterar(empresa_id: str, usuario_id: str, estado: Optional[EstadoPresenca], momento: Optional[datetime]) -> None:
+        """Aplicar alteração ao índice atual, anotando-a se houver reconstrução em andamento"""
+        with ServicoPresenca._lock:
+            ServicoPresenca._aplicar(ServicoPresenca._indice, empresa_id, usuario_id, estado, momento)
+            if ServicoPresenca._reconstrucoes_ativas:
+                ServicoPresenca._diario.append((empresa_id, usuario_id, estado, momento))
+
+    @staticmethod
+    def reconstruir(supabase: Client, empresa_id: Optional[str] = None) -> int:
+        """
+        Reconstruir o índice a partir do último registro de cada funcionário
+
+        Args:
+            supabase: Cliente Supabase (service key)
+            empresa_id: Empresa a recarregar (None = todas, em uma única consulta paginada)
+
+        Returns:
+            Quantidade de funcionários indexados
+        """
+        parametros = {"p_empresa_id": str(empresa_id)} if empresa_id else {}
+        novo: Dict[str, Dict[str, Tuple[EstadoPresenca, datetime]]] = {}
+
+        with ServicoPresenca._lock:
+            ServicoPresenca._reconstrucoes_ativas += 1
+            posicao_diario = len(ServicoPresenca._diario)
+
+        try:
+            ServicoPresenca._ler_ultimos(supabase, parametros, novo)
+            recarregar_em = relogio.monotonic() + settings.presenca_recarga_segundos
+
+            with ServicoPresenca._lock:
+                # Pontos registrados enquanto a leitura acontecia não podem se perder na troca
+                for alteracao in ServicoPresenca._diario[posicao_diario:]:
+                    if not empresa_id or alteracao[0] == str(empresa_id):
+                        ServicoPresenca._aplicar(novo, *alteracao)
+
+                if empresa_id:
+                    empresa_id = str(empresa_id)
+                    ServicoPresenca._indice[empresa_id] = novo.get(empresa_id, {})
+                    ServicoPresenca._recarregar_em[empresa_id] = recarregar_em
+                else:
+                    ServicoPresenca._indice = novo
+                    ServicoPresenca._recarregar_em = {empresa: recarregar_em for empresa in novo}
+        finally:
+            with ServicoPresenca._lock:
+                ServicoPresenca._reconstrucoes_ativas -= 1
+                if not ServicoPresenca._reconstrucoes_ativas:
+                    ServicoPresenca._diario = []
+
+        total = sum(len(usuarios) for usuarios in novo.values())
+        logger.info("Índice de presença reconstruído: %s funcionários", total)
+
+        return total
+
+    @staticmethod
+    def _ler_ultimos(supabase: Client, parametros: Dict, novo: Dict[str, Dict[str, Tuple[EstadoPresenca, datetime]]]) -> None:
+        """Ler o último registro de cada funcionário em páginas, preenchendo novo"""
+        inicio = 0
+
+        while True:
+            resposta = supabase.rpc(ServicoPresenca.FUNCAO_ULTIMOS_REGISTROS, parametros)\
+                .order("usuario_id")\
+                .range(inicio, inicio + ServicoPresenca.TAMANHO_PAGINA - 1)\
+                .execute()
+
+            for linha in resposta.data:
+                estado = ESTADO_POR_TIPO.get(linha["tipo_registro"])
+                if estado is None:
+                    continue
+                desde = datetime.fromisoformat(linha["timestamp"].replace("Z", "+00:00"))
+                novo.setdefault(str(linha["empresa_id"]), {})[str(linha["usuario_id"])] = (estado, desde)
+
+            if len(resposta.data) < ServicoPresenca.TAMANHO_PAGINA:
+                return
+            inicio += ServicoPresenca.TAMANHO_PAGINA
+
+    @staticmethod
+    def registrar(empresa_id: str, usuario_id: str, tipo_registro: str, momento: Optional[datetime] = None) -> None:
+        """
+        Atualizar o estado do funcionário após um registro de ponto
+
+        Args:
+            empresa_id: ID da empresa
+            usuario_id: ID do usuário
+            tipo_registro: Tipo do registro gravado
+            momento: Timestamp do registro (padrão: agora)
+        """
+        estado = ESTADO_POR_TIPO.get(tipo_registro)
+        if estado is None:
+            return
+
+        momento = momento or datetime.now(timezone.utc)
+        if momento.tzinfo is None:
+            momento = momento.replace(tzinfo=timezone.utc)
+
+        ServicoPresenca._alterar(str(empresa_id), str(usuario_id), estado, momento)
+
+    @staticmethod
+    def remover(empresa_id: str, usuario_id: str) -> None:
+        """Remover funcionário do índice (perfil excluído)"""
+        ServicoPresenca._alterar(str(empresa_id), str(usuario_id), None, None)
+
+    @staticmethod
+    def descartar(empresa_id: str) -> None:
+        """Descartar o índice da empresa (recarregado na próxima consulta)"""
+        with ServicoPresenca._lock:
+            ServicoPresenca._indice.pop(str(empresa_id), None)
+            ServicoPresenca._recarregar_em.pop(str(empresa_id), None)
+
+    @staticmethod
+    def em_jornada(limite: Optional[int] = None) -> List[str]:
+        """IDs dos funcionários trabalhando ou em intervalo, em todas as empresas (cópia do índice)"""
+        with ServicoPresenca._lock:
+            usuarios = [
+                usuario_id
+                for por_usuario in ServicoPresenca._indice.values()
+                for usuario_id, (estado, _) in por_usuario.items()
+                if estado != EstadoPresenca.AUSENTE
+            ]
+        return usuarios if limite is None else usuarios[:max(limite, 0)]
+
+    @staticmethod
+    def listar(
+        supabase: Client,
+        empresa_id: str
+    ) -> List[Tuple[str, EstadoPresenca, datetime]]:
+        """
+        Situação atual dos funcionários da empresa
+
+        Jornadas abertas há mais de ServicoFuso.DURACAO_MAXIMA_SESSAO (saída
+        esquecida) são informadas como ausentes.
+
+        Args:
+            supabase: Cliente Supabase (service key), usado se a empresa precisar ser recarregada
+            empresa_id: ID da empresa
+
+        Returns:
+            Lista de (usuario_id, estado, desde) dos funcionários com algum registro
+        """
+        empresa_id = str(empresa_id)
+
+        if ServicoPresenca._recarregar_em.get(empresa_id, 0.0) <= relogio.monotonic():
+            ServicoPresenca.reconstruir(supabase, empresa_id)
+
+        limite = datetime.now(timezone.utc) - ServicoFuso.DURACAO_MAXIMA_SESSAO
+        resultado = []
+
+        with ServicoPresenca._lock:
+            usuarios = list(ServicoPresenca._indice.get(empresa_id, {}).items())
+
+        for usuario_id, (estado_atual, desde) in usuarios:
+            if estado_atual != EstadoPresenca.AUSENTE and desde < limite:
+                estado_atual = EstadoPresenca.AUSENTE
+            resultado.append((usuario_id, estado_atual, desde))
+
+        return resultado
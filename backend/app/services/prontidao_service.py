@@ -0,0 +1,133 @@
+from app.config import settings
+from app.supabase_client import obter_supabase
+from app.services.jornada_service import ServicoJornada
+from app.services.perfil_service import ServicoPerfis
+from app.services.presenca_service import ServicoPresenca
+from typing import Dict, Optional
+import asyncio
+import time as relogio
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class ServicoProntidao:
+    """
+    Aquecimento do worker e verificação de prontidão (/ready)
+
+    O aquecimento cria os clientes Supabase, abre as conexões HTTP do pool
+    com uma consulta leve em cada um, reconstrói o índice de presença e
+    pré-carrega as jornadas das empresas ativas e os perfis de quem está em
+    jornada. O worker só é informado como pronto depois do aquecimento e de
+    uma verificação recente (em cache) da latência do Supabase.
+    """
+
+    _aquecido: bool = False
+    _tarefa: Optional[asyncio.Task] = None
+
+    # Última verificação do Supabase: (ok, latência em ms, instante monotônico)
+    _verificacao: Optional[tuple] = None
+
+    @staticmethod
+    def iniciar() -> None:
+        """Disparar o aquecimento em segundo plano (chamado no startup)"""
+        if ServicoProntidao._tarefa is None or ServicoProntidao._tarefa.done():
+            ServicoProntidao._tarefa = asyncio.create_task(ServicoProntidao._aquecer_ate_concluir())
+
+    @staticmethod
+    def encerrar() -> None:
+        """Cancelar aquecimento ainda em andamento (chamado no shutdown)"""
+        if ServicoProntidao._tarefa is not None:
+            ServicoProntidao._tarefa.cancel()
+            ServicoProntidao._tarefa = None
+
+    @staticmethod
+    async def _aquecer_ate_concluir() -> None:
+        """Repetir o aquecimento até conseguir (Supabase indisponível no deploy)"""
+        while True:
+            try:
+                resumo = await asyncio.to_thread(ServicoProntidao.aquecer)
+                ServicoProntidao._aquecido = True
+                logger.info(
+                    "Aquecimento concluído: %s empresas, %s funcionários no índice, %s perfis",
+                    resumo["jornadas"], resumo["presenca"], resumo["perfis"]
+                )
+                return
+            except Exception as e:
+                logger.error(f"Falha no aquecimento, nova tentativa em instantes: {str(e)}")
+                await asyncio.sleep(max(settings.aquecimento_intervalo_retentativa_segundos, 1))
+
+    @staticmethod
+    def aquecer() -> Dict[str, int]:
+        """
+        Executar o aquecimento (síncrono; rodar fora do event loop)
+
+        Returns:
+            Quantidades carregadas: jornadas, presenca, perfis
+
+        Raises:
+            Exception: Erros do Supabase (a chamada é repetida por iniciar)
+        """
+        # Criar os dois clientes e abrir as conexões do pool
+        for usar_service_key in (False, True):
+            cliente = obter_supabase(usar_service_key=usar_service_key)
+            cliente.table("empresas").select("id").limit(1).execute()
+
+        supabase = obter_supabase(usar_service_key=True)
+
+        jornadas = ServicoJornada.precarregar(supabase)
+        presenca = ServicoPresenca.reconstruir(supabase)
+
+        # Perfis de quem está em jornada: são os próximos a registrar ponto
+        em_jornada = ServicoPresenca.em_jornada(settings.aquecimento_max_perfis)
+        try:
+            perfis = ServicoPerfis.precarregar_perfis(supabase, em_jornada)
+        except Exception as e:
+            # Cache opcional: perfis são carregados na primeira requisição de cada um
+            logger.warning(f"Falha ao pré-carregar perfis: {str(e)}")
+            perfis = 0
+
+        return {"jornadas": jornadas, "presenca": presenca, "perfis": perfis}
+
+    @staticmethod
+    async def verificar() -> Dict:
+        """
+        Situação de prontidão do worker
+
+        A consulta ao Supabase é refeita no máximo a cada
+        PRONTIDAO_CACHE_SEGUNDOS, de modo que sondas frequentes do balanceador
+        não geram carga.
+
+        Returns:
+            Dicionário com pronto, aquecido, supabase_ok e latencia_ms
+        """
+        agora = relogio.monotonic()
+        verificacao = ServicoProntidao._verificacao
+
+        if verificacao is None or agora - verificacao[2] >= settings.prontidao_cache_segundos:
+            inicio = relogio.perf_counter()
+            try:
+                await asyncio.to_thread(
+                    lambda: obter_supabase().table("empresas").select("id").limit(1).execute()
+                )
+                ok = True
+            except Exception as e:
+                logger.warning(f"Verificação de prontidão falhou: {str(e)}")
+                ok = False
+            latencia_ms = round((relogio.perf_counter() - inicio) * 1000, 1)
+            verificacao = (ok, latencia_ms, agora)
+            ServicoProntidao._verificacao = verificacao
+
+        supabase_ok, latencia_ms, _ = verificacao
+        pronto = (
+            ServicoProntidao._aquecido
+            and supabase_ok
+            and latencia_ms <= settings.prontidao_latencia_maxima_ms
+        )
+
+        return {
+            "pronto": pronto,
+            "aquecido": ServicoProntidao._aquecido,
+            "supabase_ok": supabase_ok,
+            "latencia_ms": latencia_ms
+        }
@@ -1,8 +1,11 @@
 from supabase import Client
 from app.models.schemas import PerfilUsuario, RelatorioFuncionario, RegistroTempo, RegistroPonto
+from app.services.jornada_service import ServicoJornada, JornadaEmpresa
+from app.services.fuso_service import ServicoFuso
+from app.services.replica_service import ServicoReplica
+from app.services.clock_service import ServicoPonto
 from datetime import datetime, timedelta
-from typing import List, Dict
-from collections import defaultdict
+from typing import AsyncIterator, Callable, List, Dict, Optional, Tuple
 import logging
 
 logger = logging.getLogger(__name__)
@@ -31,33 +34,132 @@ class ServicoRelatorio:
             Espelho de ponto completo
         """
         # Buscar perfil do usuário
-        perfil_response = supabase.table("perfis")\
-            .select("*")\
-            .eq("id", usuario_id)\
-            .single()\
-            .execute()
+        perfil = await ServicoReplica.ler_perfil(supabase, usuario_id)
         
-        if not perfil_response.data:
+        if not perfil:
             raise ValueError(f"Usuário {usuario_id} não encontrado")
         
-        usuario = PerfilUsuario(**perfil_response.data)
+        usuario = PerfilUsuario(**perfil)
         
-        # Buscar registros de ponto do período
-        registros_response = supabase.table("registros_ponto")\
-            .select("*")\
-            .eq("usuario_id", usuario_id)\
-            .gte("timestamp", data_inicio.isoformat())\
-            .lte("timestamp", data_fim.isoformat())\
-            .order("timestamp")\
-            .execute()
+        # Jornada compilada da empresa (em cache)
+        jornada = await ServicoJornada.obter_jornada(supabase, str(usuario.empresa_id))
         
-        registros = [RegistroPonto(**r) for r in registros_response.data]
+        # Buscar registros de ponto do período (datas sem fuso estão no horário da empresa),
+        # com folga no fim para jornadas que atravessam a meia-noite
+        inicio_utc, fim_utc = ServicoFuso.limites_periodo_utc(data_inicio, data_fim, jornada.fuso_horario)
+        linhas = await ServicoReplica.ler_registros_usuario(
+            supabase,
+            usuario_id,
+            inicio_utc,
+            fim_utc
+        )
         
-        # Agrupar registros por dia
-        registros_por_dia = defaultdict(list)
-        for registro in registros:
-            data = registro.timestamp.date().isoformat()
-            registros_por_dia[data].append(registro)
+        return ServicoRelatorio.montar_relatorio(
+            str(usuario.id),
+            usuario.nome_completo,
+            linhas,
+            jornada,
+            data_inicio,
+            data_fim
+        )
+    
+    @staticmethod
+    async def gerar_espelhos_empresa(
+        supabase: Client,
+        empresa_id: str,
+        data_inicio: datetime,
+        data_fim: datetime,
+        progresso: Optional[Callable[[float], None]] = None
+    ) -> AsyncIterator[RelatorioFuncionario]:
+        """
+        Gera os espelhos de ponto de todos os funcionários da empresa
+        
+        Lê os registros do período uma única vez, em páginas ordenadas por
+        funcionário, e entrega cada espelho assim que os registros do
+        funcionário terminam; só os registros de um funcionário ficam na
+        memória. Funcionários sem registros recebem espelho vazio.
+        
+        Args:
+            supabase: Cliente Supabase
+            empresa_id: ID da empresa
+            data_inicio: Data inicial do período
+            data_fim: Data final do período
+            progresso: Callback com a fração de funcionários processados
+        
+        Yields:
+            Espelhos de ponto (funcionários com registros primeiro, em ordem de ID)
+        """
+        jornada = await ServicoJornada.obter_jornada(supabase, str(empresa_id))
+        perfis = await ServicoReplica.ler_perfis_empresa(supabase, str(empresa_id))
+        nomes = {perfil["id"]: perfil["nome_completo"] for perfil in perfis}
+        
+        def avancar() -> None:
+            if progresso:
+                progresso(1 - len(nomes) / len(perfis))
+        
+        inicio_utc, fim_utc = ServicoFuso.limites_periodo_utc(data_inicio, data_fim, jornada.fuso_horario)
+        
+        async def funcionarios() -> AsyncIterator[Tuple[str, List[Dict]]]:
+            """Registros agrupados por funcionário, na ordem das páginas"""
+            atual, linhas = None, []
+            async for pagina in ServicoReplica.paginar_registros_empresa(supabase, str(empresa_id), inicio_utc, fim_utc):
+                for linha in pagina:
+                    if linha["usuario_id"] != atual:
+                        if linhas:
+                            yield atual, linhas
+                        atual, linhas = linha["usuario_id"], []
+                    linhas.append(linha)
+            if linhas:
+                yield atual, linhas
+        
+        async for usuario_id, linhas in funcionarios():
+            nome = nomes.pop(usuario_id, None)
+            if nome is None:
+                continue  # Perfil removido depois do registro
+            avancar()
+            yield ServicoRelatorio.montar_relatorio(usuario_id, nome, linhas, jornada, data_inicio, data_fim)
+        
+        # Funcionários sem registros no período
+        for usuario_id, nome in list(nomes.items()):
+            del nomes[usuario_id]
+            avancar()
+            yield ServicoRelatorio.montar_relatorio(usuario_id, nome, [], jornada, data_inicio, data_fim)
+    
+    @staticmethod
+    def montar_relatorio(
+        usuario_id: str,
+        nome_usuario: str,
+        linhas: List[Dict],
+        jornada: JornadaEmpresa,
+        data_inicio: datetime,
+        data_fim: datetime
+    ) -> RelatorioFuncionario:
+        """
+        Monta o espelho de ponto a partir dos registros do funcionário
+        
+        Args:
+            usuario_id: ID do funcionário
+            nome_usuario: Nome completo do funcionário
+            linhas: Linhas de registros_ponto do período (com a folga de MARGEM_SESSAO), em ordem cronológica
+            jornada: Jornada compilada da empresa
+            data_inicio: Data inicial do período
+            data_fim: Data final do período
+        
+        Returns:
+            Espelho de ponto completo
+        """
+        registros = [RegistroPonto(**ServicoPonto.linha_para_resposta(r)) for r in linhas]
+        
+        # Agrupar registros pelo dia local da jornada
+        tabela_fuso = jornada.tabela_fuso
+        inicio_periodo = tabela_fuso.data_local(data_inicio)
+        fim_periodo = tabela_fuso.data_local(data_fim)
+        registros_por_dia = ServicoFuso.agrupar_por_dia_local(
+            registros,
+            [registro.timestamp for registro in registros],
+            [registro.tipo_ponto.value for registro in registros],
+            tabela_fuso
+        )
         
         # Processar cada dia
         entradas = []
@@ -65,7 +167,10 @@ class ServicoRelatorio:
         total_horas_extras = 0.0
         
         for data, registros_dia in sorted(registros_por_dia.items()):
-            entrada_dia = ServicoRelatorio._processar_dia(registros_dia)
+            if not inicio_periodo <= data <= fim_periodo:
+                continue
+            
+            entrada_dia = ServicoRelatorio._processar_dia(registros_dia, jornada)
             entradas.append(entrada_dia)
             if entrada_dia.total_horas:
                 horas = float(entrada_dia.total_horas.replace("h", "").replace(",", "."))
@@ -75,8 +180,8 @@ class ServicoRelatorio:
                 total_horas_extras += horas_extras
         
         return RelatorioFuncionario(
-            usuario_id=usuario.id,
-            nome_usuario=usuario.nome_completo,
+            usuario_id=usuario_id,
+            nome_usuario=nome_usuario,
             inicio_periodo=data_inicio.isoformat(),
             fim_periodo=data_fim.isoformat(),
             registros=entradas,
@@ -85,12 +190,13 @@ class ServicoRelatorio:
         )
     
     @staticmethod
-    def _processar_dia(registros: List[RegistroPonto]) -> RegistroTempo:
+    def _processar_dia(registros: List[RegistroPonto], jornada: JornadaEmpresa) -> RegistroTempo:
         """
         Processa registros de um único dia
         
         Args:
-            registros: Lista de registros do dia
+            registros: Lista de registros da jornada do dia, em ordem cronológica
+            jornada: Jornada compilada da empresa
         
         Returns:
             Entrada do espelho de ponto para o dia
@@ -98,7 +204,7 @@ class ServicoRelatorio:
         if not registros:
             return RegistroTempo(data="", entrada=None, saida=None)
         
-        data = registros[0].timestamp.date().isoformat()
+        data = jornada.tabela_fuso.data_local(registros[0].timestamp).isoformat()
         entrada = None
         saida = None
         duracao_intervalo = 0
@@ -128,9 +234,9 @@ class ServicoRelatorio:
             total_horas_num = total_minutos / 60
             total_horas = f"{total_horas_num:.2f}h"
             
-            # Calcular horas extras (acima de 8h)
-            if total_horas_num > 8:
-                horas_extras_num = total_horas_num - 8
+            # Calcular horas extras (acima da jornada diária)
+            if total_horas_num > jornada.jornada_diaria_horas:
+                horas_extras_num = total_horas_num - jornada.jornada_diaria_horas
                 horas_extras = f"{horas_extras_num:.2f}h"
         
         foto_url = None
@@ -167,29 +273,16 @@ class ServicoRelatorio:
             Lista de registros com informações do usuário
         """
         # Buscar registros com join manual (Supabase não suporta joins complexos)
-        registros_response = supabase.table("registros_ponto")\
-            .select("*")\
-            .eq("empresa_id", empresa_id)\
-            .gte("timestamp", data_inicio.isoformat())\
-            .lte("timestamp", data_fim.isoformat())\
-            .order("timestamp", desc=True)\
-            .execute()
+        registros = await ServicoReplica.ler_registros_empresa(supabase, empresa_id, data_inicio, data_fim)
         
         # Buscar informações dos usuários
-        usuarios_ids = list(set([r["usuario_id"] for r in registros_response.data]))
-        usuarios_map = {}
-        
-        if usuarios_ids:
-            usuarios_response = supabase.table("perfis")\
-                .select("id, nome_completo, email")\
-                .in_("id", usuarios_ids)\
-                .execute()
-            
-            usuarios_map = {u["id"]: u for u in usuarios_response.data}
+        usuarios_ids = list(set([r["usuario_id"] for r in registros]))
+        usuarios = await ServicoReplica.ler_perfis(supabase, usuarios_ids)
+        usuarios_map = {u["id"]: u for u in usuarios}
         
         # Combinar dados
         resultado = []
-        for registro in registros_response.data:
+        for registro in registros:
             usuario = usuarios_map.get(registro["usuario_id"], {})
             resultado.append({
                 **registro,
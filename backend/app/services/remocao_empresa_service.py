@@ -0,0 +1,250 @@
+from supabase import Client
+from postgrest.types import ReturnMethod
+from app.config import settings
+from app.services.photo_service import ServicoFoto
+from app.services.jornada_service import ServicoJornada
+from app.services.estatisticas_service import ServicoEstatisticas
+from app.services.presenca_service import ServicoPresenca
+from app.services.perfil_service import ServicoPerfis
+from app.services.replica_service import ServicoReplica
+from app.services.geocerca_service import ServicoGeocerca
+from datetime import datetime, timezone
+from typing import Callable, Dict, Optional
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class ServicoRemocaoEmpresa:
+    """
+    Remoção de uma empresa inteira em etapas retomáveis
+
+    Etapas, nesta ordem: fotos do Storage, registros de ponto (em lotes por
+    faixa de timestamp), usuários (conta de Auth, que remove o perfil em
+    cascata) e a própria empresa. O progresso fica em empresas_remocao após
+    cada lote; uma nova execução continua da etapa registrada.
+    """
+
+    TABELA = "empresas_remocao"
+    ETAPAS = ("fotos", "registros", "usuarios", "empresa", "concluida")
+
+    @staticmethod
+    async def obter_progresso(supabase: Client, empresa_id: str) -> Optional[Dict]:
+        """
+        Obter ponto de controle da remoção
+
+        Args:
+            supabase: Cliente Supabase (service key)
+            empresa_id: ID da empresa
+
+        Returns:
+            Linha de empresas_remocao ou None se a remoção nunca foi iniciada
+        """
+        resposta = supabase.table(ServicoRemocaoEmpresa.TABELA)\
+            .select("*")\
+            .eq("empresa_id", str(empresa_id))\
+            .limit(1)\
+            .execute()
+
+        return resposta.data[0] if resposta.data else None
+
+    @staticmethod
+    async def remover(
+        supabase: Client,
+        empresa_id: str,
+        solicitado_por: Optional[str] = None,
+        progresso: Optional[Callable[[float], None]] = None
+    ) -> Dict:
+        """
+        Remover (ou continuar removendo) a empresa e todos os seus dados
+
+        Args:
+            supabase: Cliente Supabase (service key)
+            empresa_id: ID da empresa
+            solicitado_por: ID do super admin que pediu a remoção
+            progresso: Callback com a fração concluída
+
+        Returns:
+            Ponto de controle final
+        """
+        empresa_id = str(empresa_id)
+        progresso = progresso or (lambda fracao: None)
+
+        estado = await ServicoRemocaoEmpresa.obter_progresso(supabase, empresa_id)
+        if estado is None:
+            estado = supabase.table(ServicoRemocaoEmpresa.TABELA)\
+                .insert({"empresa_id": empresa_id, "solicitado_por": solicitado_por})\
+                .execute().data[0]
+
+        if estado["etapa"] == "concluida":
+            return estado
+
+        # Empresa inativa durante a remoção
+        supabase.table("empresas").update({"ativa": False}).eq("id", empresa_id).execute()
+
+        total_etapas = len(ServicoRemocaoEmpresa.ETAPAS) - 1
+
+        def avancar(fracao_etapa: float) -> None:
+            indice = ServicoRemocaoEmpresa.ETAPAS.index(estado["etapa"])
+            progresso((indice + fracao_etapa) / total_etapas)
+
+        def salvar(**campos) -> None:
+            campos["atualizado_em"] = datetime.now(timezone.utc).isoformat()
+            supabase.table(ServicoRemocaoEmpresa.TABELA)\
+                .update(campos)\
+                .eq("empresa_id", empresa_id)\
+                .execute()
+            estado.update(campos)
+
+        if estado["etapa"] == "fotos":
+            metricas = await ServicoFoto.limpar_fotos_antigas(
+                supabase,
+                empresa_id,
+                datetime.now(timezone.utc),
+                progresso=avancar,
+                limpar_referencias=False
+            )
+            if metricas["falhas"]:
+                raise RuntimeError(f"{metricas['falhas']} fotos não puderam ser removidas; execute a remoção novamente")
+            salvar(fotos_removidas=estado["fotos_removidas"] + metricas["objetos_removidos"], etapa="registros")
+
+        if estado["etapa"] == "registros":
+            await ServicoRemocaoEmpresa._remover_registros(supabase, empresa_id, estado, salvar, avancar)
+            salvar(etapa="usuarios")
+
+        if estado["etapa"] == "usuarios":
+            await ServicoRemocaoEmpresa._remover_usuarios(supabase, empresa_id, estado, salvar, avancar)
+            salvar(etapa="empresa")
+
+        if estado["etapa"] == "empresa":
+            supabase.table("empresas").delete().eq("id", empresa_id).execute()
+            salvar(etapa="concluida", concluido_em=datetime.now(timezone.utc).isoformat())
+
+        ServicoJornada.invalidar(empresa_id)
+        ServicoEstatisticas.invalidar(empresa_id)
+        ServicoPresenca.descartar(empresa_id)
+        ServicoPerfis.marcar_alteracao(empresa_id)
+        ServicoReplica.remover_empresa(empresa_id)
+        ServicoGeocerca.descartar(empresa_id)
+
+        progresso(1.0)
+        logger.info(
+            "Empresa removida: %s (fotos=%s, registros=%s, usuarios=%s)",
+            empresa_id, estado["fotos_removidas"], estado["registros_removidos"], estado["usuarios_removidos"]
+        )
+
+        return estado
+
+    @staticmethod
+    async def _remover_registros(
+        supabase: Client,
+        empresa_id: str,
+        estado: Dict,
+        salvar: Callable,
+        avancar: Callable[[float], None]
+    ) -> None:
+        """
+        Remover registros de ponto em lotes de ~REMOCAO_LOTE_REGISTROS
+
+        Cada lote é um DELETE por faixa de timestamp (até o timestamp do
+        N-ésimo registro mais antigo), o que mantém a requisição pequena e
+        cada transação limitada.
+        """
+        tamanho_lote = max(settings.remocao_lote_registros, 1)
+
+        contagem = supabase.table("registros_ponto")\
+            .select("id", count="exact")\
+            .eq("empresa_id", empresa_id)\
+            .limit(1)\
+            .execute()
+        total = max(contagem.count or 0, 1)
+        removidos = 0
+
+        while True:
+            limite = supabase.table("registros_ponto")\
+                .select("timestamp")\
+                .eq("empresa_id", empresa_id)\
+                .order("timestamp")\
+                .range(tamanho_lote - 1, tamanho_lote - 1)\
+                .execute()
+
+            consulta = supabase.table("registros_ponto")\
+                .delete(count="exact", returning=ReturnMethod.minimal)\
+                .eq("empresa_id", empresa_id)
+
+            if limite.data:
+                consulta = consulta.lte("timestamp", limite.data[0]["timestamp"])
+
+            resposta = await asyncio.to_thread(consulta.execute)
+            quantidade = resposta.count or 0
+            removidos += quantidade
+
+            salvar(registros_removidos=estado["registros_removidos"] + quantidade)
+            avancar(min(removidos / total, 1.0))
+
+            if not limite.data:
+                return
+
+    @staticmethod
+    async def _remover_usuarios(
+        supabase: Client,
+        empresa_id: str,
+        estado: Dict,
+        salvar: Callable,
+        avancar: Callable[[float], None]
+    ) -> None:
+        """
+        Remover contas de Auth dos usuários da empresa (perfis caem em cascata)
+
+        Processa os perfis em páginas por id, com chamadas ao Auth em paralelo
+        limitadas por IMPORTACAO_CONCORRENCIA. Perfis cuja conta não existe
+        mais no Auth são removidos diretamente; outras falhas interrompem a
+        etapa, que é retomada na próxima execução.
+
+        Raises:
+            RuntimeError: Se alguma conta não puder ser removida do Auth
+        """
+        semaforo = asyncio.Semaphore(max(settings.importacao_concorrencia, 1))
+        tamanho_pagina = max(settings.remocao_lote_usuarios, 1)
+        ultimo_id = None
+
+        async def remover_conta(usuario_id: str) -> str:
+            async with semaforo:
+                try:
+                    await asyncio.to_thread(supabase.auth.admin.delete_user, usuario_id)
+                    return "removida"
+                except Exception as e:
+                    if getattr(e, "status", None) == 404:
+                        return "inexistente"
+                    logger.warning(f"Falha ao remover conta {usuario_id} do Auth: {str(e)}")
+                    return "falhou"
+
+        while True:
+            consulta = supabase.table("perfis")\
+                .select("id")\
+                .eq("empresa_id", empresa_id)
+
+            if ultimo_id:
+                consulta = consulta.gt("id", ultimo_id)
+
+            pagina = consulta.order("id").limit(tamanho_pagina).execute().data
+            if not pagina:
+                break
+
+            ids = [perfil["id"] for perfil in pagina]
+            resultados = await asyncio.gather(*(remover_conta(usuario_id) for usuario_id in ids))
+
+            # Perfil sem conta no Auth não cai em cascata: remover diretamente
+            sem_conta = [usuario_id for usuario_id, resultado in zip(ids, resultados) if resultado == "inexistente"]
+            if sem_conta:
+                supabase.table("perfis").delete(returning=ReturnMethod.minimal).in_("id", sem_conta).execute()
+
+            falhas = resultados.count("falhou")
+            salvar(usuarios_removidos=estado["usuarios_removidos"] + len(ids) - falhas)
+            avancar(0.5)
+
+            if falhas:
+                raise RuntimeError(f"{falhas} contas não puderam ser removidas do Auth; execute a remoção novamente")
+
+            ultimo_id = ids[-1]
@@ -0,0 +1,574 @@
+from supabase import Client
+from app.config import settings
+from app.arquivos import diretorio_privado
+from contextvars import ContextVar
+from datetime import datetime, timedelta, timezone
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+import asyncio
+import os
+import sqlite3
+import threading
+import time as relogio
+import uuid
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Colunas espelhadas de cada tabela
+COLUNAS_REPLICA = {
+    "registros_ponto": (
+        "id", "usuario_id", "empresa_id", "tipo_registro", "timestamp",
+        "latitude", "longitude", "foto_url", "sincronizado_em", "criado_em"
+    ),
+}
+
+# Colunas de data gravadas em formato UTC fixo, comparáveis como texto
+COLUNAS_DATA = ("timestamp", "sincronizado_em", "criado_em")
+
+# Menor UUID: início do cursor quando só o criado_em é conhecido
+UUID_MINIMO = "00000000-0000-0000-0000-000000000000"
+
+# Origem dos dados lidos na requisição atual: ("replica", defasagem) ou ("primario", 0)
+_fonte_dados: ContextVar[Optional[Tuple[str, float]]] = ContextVar("fonte_dados", default=None)
+
+
+class ServicoReplica:
+    """
+    Espelho local (SQLite) de registros_ponto para relatórios
+
+    Um worker por host (eleito por lease no próprio arquivo) copia as linhas
+    novas a cada REPLICA_INTERVALO_SEGUNDOS, por cursor em (criado_em, id),
+    relendo uma janela de REPLICA_SOBREPOSICAO_SEGUNDOS para pegar transações
+    confirmadas fora de ordem. Alterações e remoções não aparecem no cursor:
+    remoções feitas pelo backend são aplicadas diretamente e o espelho é
+    recarregado por completo a cada REPLICA_RECARGA_COMPLETA_HORAS.
+
+    As leituras de registros (ler_registros_*, paginar_registros_empresa)
+    usam o espelho quando ele está habilitado e com defasagem até
+    REPLICA_DEFASAGEM_MAXIMA_SEGUNDOS; caso contrário consultam o Supabase.
+    Perfis são sempre lidos do Supabase: funcionários recém-cadastrados e
+    edições de perfil precisam aparecer nos relatórios na hora. A origem e a defasagem ficam disponíveis
+    para os cabeçalhos da resposta (cabecalhos).
+    """
+
+    TAMANHO_PAGINA = 1000
+
+    _local = threading.local()
+    _id_worker = uuid.uuid4().hex
+    _tarefa: Optional[asyncio.Task] = None
+
+    # ---- Armazenamento -------------------------------------------------
+
+    @staticmethod
+    def caminho() -> str:
+        """Arquivo do espelho"""
+        return settings.replica_caminho or os.path.join(diretorio_privado(), "replica.sqlite3")
+
+    @staticmethod
+    def _conexao() -> sqlite3.Connection:
+        """Conexão da thread atual, criando o esquema na primeira vez"""
+        conexao = getattr(ServicoReplica._local, "conexao", None)
+        if conexao is None:
+            conexao = sqlite3.connect(ServicoReplica.caminho(), timeout=10, isolation_level=None)
+            conexao.row_factory = sqlite3.Row
+            conexao.execute("PRAGMA journal_mode=WAL")
+            conexao.execute("PRAGMA synchronous=NORMAL")
+            ServicoReplica._criar_esquema(conexao)
+            ServicoReplica._local.conexao = conexao
+        return conexao
+
+    @staticmethod
+    def _criar_esquema(conexao: sqlite3.Connection, sufixo: str = "") -> None:
+        """Criar tabelas espelhadas (sufixo usado na recarga completa) e de controle"""
+        conexao.execute(
+            f"CREATE TABLE IF NOT EXISTS registros_ponto{sufixo} ("
+            "id TEXT PRIMARY KEY, usuario_id TEXT NOT NULL, empresa_id TEXT NOT NULL, "
+            "tipo_registro TEXT NOT NULL, timestamp TEXT NOT NULL, latitude REAL, longitude REAL, "
+            "foto_url TEXT, sincronizado_em TEXT, criado_em TEXT)"
+        )
+        conexao.execute(
+            f"CREATE INDEX IF NOT EXISTS idx_registros{sufixo}_usuario_timestamp "
+            f"ON registros_ponto{sufixo}(usuario_id, timestamp)"
+        )
+        conexao.execute(
+            f"CREATE INDEX IF NOT EXISTS idx_registros{sufixo}_empresa_timestamp "
+            f"ON registros_ponto{sufixo}(empresa_id, timestamp)"
+        )
+        conexao.execute(
+            f"CREATE INDEX IF NOT EXISTS idx_registros{sufixo}_empresa_usuario_timestamp "
+            f"ON registros_ponto{sufixo}(empresa_id, usuario_id, timestamp, id)"
+        )
+
+        if not sufixo:
+            # Perfis não são mais espelhados: descartar a cópia de versões anteriores
+            conexao.execute("DROP TABLE IF EXISTS perfis")
+            conexao.execute("DROP TABLE IF EXISTS perfis_recarga")
+            conexao.execute(
+                "CREATE TABLE IF NOT EXISTS replica_estado ("
+                "tabela TEXT PRIMARY KEY, cursor_criado_em TEXT, cursor_id TEXT, "
+                "sincronizado_em REAL, recarregado_em REAL)"
+            )
+            conexao.execute(
+                "CREATE TABLE IF NOT EXISTS replica_lider ("
+                "id INTEGER PRIMARY KEY CHECK (id = 1), worker TEXT NOT NULL, ate REAL NOT NULL)"
+            )
+
+    @staticmethod
+    def normalizar_data(valor) -> Optional[str]:
+        """Data ISO (ou datetime) em UTC com microssegundos, comparável como texto"""
+        if valor is None:
+            return None
+        if isinstance(valor, str):
+            valor = datetime.fromisoformat(valor.replace("Z", "+00:00"))
+        if valor.tzinfo is None:
+            valor = valor.replace(tzinfo=timezone.utc)
+        return valor.astimezone(timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.%f+00:00")
+
+    # ---- Sincronização -------------------------------------------------
+
+    @staticmethod
+    def iniciar() -> None:
+        """Disparar a sincronização periódica (chamado no startup, se habilitada)"""
+        if settings.replica_habilitada and (ServicoReplica._tarefa is None or ServicoReplica._tarefa.done()):
+            ServicoReplica._tarefa = asyncio.create_task(ServicoReplica._sincronizar_periodicamente())
+
+    @staticmethod
+    def encerrar() -> None:
+        """Parar a sincronização periódica (chamado no shutdown)"""
+        if ServicoReplica._tarefa is not None:
+            ServicoReplica._tarefa.cancel()
+            ServicoReplica._tarefa = None
+
+    @staticmethod
+    async def _sincronizar_periodicamente() -> None:
+        """Laço de sincronização em segundo plano"""
+        from app.supabase_client import obter_supabase
+
+        while True:
+            try:
+                await asyncio.to_thread(ServicoReplica.sincronizar, obter_supabase(usar_service_key=True))
+            except Exception as e:
+                logger.error(f"Falha ao sincronizar réplica: {str(e)}")
+            await asyncio.sleep(max(settings.replica_intervalo_segundos, 1))
+
+    @staticmethod
+    def sincronizar(supabase: Client) -> Optional[Dict[str, int]]:
+        """
+        Copiar para o espelho as linhas novas (ou tudo, se a recarga completa venceu)
+
+        Args:
+            supabase: Cliente Supabase (service key)
+
+        Returns:
+            Linhas copiadas por tabela, ou None se outro worker detém o lease
+        """
+        conexao = ServicoReplica._conexao()
+        if not ServicoReplica._obter_lease(conexao):
+            return None
+
+        copiadas = {}
+        for tabela in COLUNAS_REPLICA:
+            estado = conexao.execute("SELECT * FROM replica_estado WHERE tabela = ?", (tabela,)).fetchone()
+            recarregado_em = estado["recarregado_em"] if estado else None
+
+            if recarregado_em is None or relogio.time() - recarregado_em >= settings.replica_recarga_completa_horas * 3600:
+                copiadas[tabela] = ServicoReplica._recarregar_tabela(supabase, conexao, tabela)
+            else:
+                copiadas[tabela] = ServicoReplica._copiar_novas(supabase, conexao, tabela, estado)
+
+        return copiadas
+
+    @staticmethod
+    def _obter_lease(conexao: sqlite3.Connection) -> bool:
+        """Tomar ou renovar o lease de sincronização deste worker"""
+        agora = relogio.time()
+        duracao = max(settings.replica_intervalo_segundos, 1) * 3
+        cursor = conexao.execute(
+            "INSERT INTO replica_lider (id, worker, ate) VALUES (1, ?, ?) "
+            "ON CONFLICT(id) DO UPDATE SET worker = excluded.worker, ate = excluded.ate "
+            "WHERE replica_lider.worker = excluded.worker OR replica_lider.ate < ?",
+            (ServicoReplica._id_worker, agora + duracao, agora)
+        )
+        return cursor.rowcount > 0
+
+    @staticmethod
+    def _linha(tabela: str, linha: Dict) -> Tuple:
+        """Valores de uma linha do Supabase na ordem das colunas do espelho"""
+        return tuple(
+            ServicoReplica.normalizar_data(linha.get(coluna)) if coluna in COLUNAS_DATA else linha.get(coluna)
+            for coluna in COLUNAS_REPLICA[tabela]
+        )
+
+    @staticmethod
+    def _gravar(conexao: sqlite3.Connection, tabela: str, linhas: List[Dict], destino: Optional[str] = None) -> None:
+        """Inserir ou substituir linhas no espelho"""
+        colunas = COLUNAS_REPLICA[tabela]
+        conexao.executemany(
+            f"INSERT OR REPLACE INTO {destino or tabela} ({', '.join(colunas)}) "
+            f"VALUES ({', '.join('?' for _ in colunas)})",
+            [ServicoReplica._linha(tabela, linha) for linha in linhas]
+        )
+
+    @staticmethod
+    def _copiar_novas(supabase: Client, conexao: sqlite3.Connection, tabela: str, estado: sqlite3.Row) -> int:
+        """Copiar linhas com (criado_em, id) após o cursor, menos a janela de sobreposição"""
+        criado_em, ultimo_id = None, UUID_MINIMO
+        if estado["cursor_criado_em"]:
+            inicio = datetime.fromisoformat(estado["cursor_criado_em"]) - timedelta(seconds=settings.replica_sobreposicao_segundos)
+            criado_em = ServicoReplica.normalizar_data(inicio)
+
+        total = 0
+        while True:
+            consulta = supabase.table(tabela).select(", ".join(COLUNAS_REPLICA[tabela]))
+            if criado_em:
+                consulta = consulta.or_(f"criado_em.gt.{criado_em},and(criado_em.eq.{criado_em},id.gt.{ultimo_id})")
+            else:
+                consulta = consulta.not_.is_("criado_em", "null")
+
+            pagina = consulta.order("criado_em").order("id").limit(ServicoReplica.TAMANHO_PAGINA).execute().data
+            if not pagina:
+                break
+
+            criado_em = ServicoReplica.normalizar_data(pagina[-1]["criado_em"])
+            ultimo_id = pagina[-1]["id"]
+
+            conexao.execute("BEGIN IMMEDIATE")
+            try:
+                ServicoReplica._gravar(conexao, tabela, pagina)
+                conexao.execute(
+                    "INSERT INTO replica_estado (tabela, cursor_criado_em, cursor_id, recarregado_em) VALUES (?, ?, ?, ?) "
+                    "ON CONFLICT(tabela) DO UPDATE SET cursor_criado_em = excluded.cursor_criado_em, "
+                    "cursor_id = excluded.cursor_id",
+                    (tabela, criado_em, ultimo_id, estado["recarregado_em"])
+                )
+                conexao.execute("COMMIT")
+            except Exception:
+                conexao.execute("ROLLBACK")
+                raise
+
+            total += len(pagina)
+            if len(pagina) < ServicoReplica.TAMANHO_PAGINA:
+                break
+
+        conexao.execute("UPDATE replica_estado SET sincronizado_em = ? WHERE tabela = ?", (relogio.time(), tabela))
+        return total
+
+    @staticmethod
+    def _recarregar_tabela(supabase: Client, conexao: sqlite3.Connection, tabela: str) -> int:
+        """Copiar a tabela inteira (por id) para uma tabela nova e trocá-la pela atual"""
+        inicio = relogio.time()
+        temporaria = f"{tabela}_recarga"
+        conexao.execute(f"DROP TABLE IF EXISTS {temporaria}")
+        ServicoReplica._criar_esquema(conexao, "_recarga")
+        # Só a tabela recarregada é trocada; a outra criada pelo esquema é descartada
+        for outra in COLUNAS_REPLICA:
+            if outra != tabela:
+                conexao.execute(f"DROP TABLE IF EXISTS {outra}_recarga")
+
+        cursor_criado_em, cursor_id = None, None
+        ultimo_id = None
+        total = 0
+
+        while True:
+            consulta = supabase.table(tabela).select(", ".join(COLUNAS_REPLICA[tabela]))
+            if ultimo_id:
+                consulta = consulta.gt("id", ultimo_id)
+            pagina = consulta.order("id").limit(ServicoReplica.TAMANHO_PAGINA).execute().data
+            if not pagina:
+                break
+
+            ServicoReplica._gravar(conexao, tabela, pagina, destino=temporaria)
+            ultimo_id = pagina[-1]["id"]
+            total += len(pagina)
+
+            for linha in pagina:
+                criado_em = ServicoReplica.normalizar_data(linha.get("criado_em"))
+                if criado_em and (cursor_criado_em is None or (criado_em, linha["id"]) > (cursor_criado_em, cursor_id)):
+                    cursor_criado_em, cursor_id = criado_em, linha["id"]
+
+            if len(pagina) < ServicoReplica.TAMANHO_PAGINA:
+                break
+
+        conexao.execute("BEGIN IMMEDIATE")
+        try:
+            conexao.execute(f"DROP TABLE {tabela}")
+            conexao.execute(f"ALTER TABLE {temporaria} RENAME TO {tabela}")
+            # Índices mantêm o nome da tabela de recarga; recriar com os nomes definitivos
+            for indice in conexao.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = ? AND name LIKE '%\\_recarga\\_%' ESCAPE '\\'",
+                (tabela,)
+            ).fetchall():
+                conexao.execute(f"DROP INDEX {indice['name']}")
+            ServicoReplica._criar_esquema(conexao)
+            conexao.execute(
+                "INSERT INTO replica_estado (tabela, cursor_criado_em, cursor_id, sincronizado_em, recarregado_em) "
+                "VALUES (?, ?, ?, ?, ?) ON CONFLICT(tabela) DO UPDATE SET "
+                "cursor_criado_em = excluded.cursor_criado_em, cursor_id = excluded.cursor_id, "
+                "sincronizado_em = excluded.sincronizado_em, recarregado_em = excluded.recarregado_em",
+                # Defasagem contada do início da cópia: linhas criadas durante ela vêm na próxima rodada
+                (tabela, cursor_criado_em, cursor_id, inicio, relogio.time())
+            )
+            conexao.execute("COMMIT")
+        except Exception:
+            conexao.execute("ROLLBACK")
+            raise
+
+        logger.info("Réplica recarregada: %s (%s linhas)", tabela, total)
+        return total
+
+    @staticmethod
+    def remover_usuario(usuario_id: str) -> None:
+        """Remover do espelho os registros do usuário"""
+        if not settings.replica_habilitada:
+            return
+        conexao = ServicoReplica._conexao()
+        conexao.execute("DELETE FROM registros_ponto WHERE usuario_id = ?", (str(usuario_id),))
+
+    @staticmethod
+    def remover_empresa(empresa_id: str) -> None:
+        """Remover do espelho os registros da empresa"""
+        if not settings.replica_habilitada:
+            return
+        conexao = ServicoReplica._conexao()
+        conexao.execute("DELETE FROM registros_ponto WHERE empresa_id = ?", (str(empresa_id),))
+
+    # ---- Leitura -------------------------------------------------------
+
+    @staticmethod
+    def defasagem() -> Optional[float]:
+        """Segundos desde a sincronização mais antiga entre as tabelas (None se nunca sincronizou)"""
+        tabelas = tuple(COLUNAS_REPLICA)
+        linhas = ServicoReplica._conexao().execute(
+            f"SELECT sincronizado_em FROM replica_estado WHERE tabela IN ({', '.join('?' for _ in tabelas)})",
+            tabelas
+        ).fetchall()
+        if len(linhas) < len(COLUNAS_REPLICA) or any(linha["sincronizado_em"] is None for linha in linhas):
+            return None
+        return max(relogio.time() - min(linha["sincronizado_em"] for linha in linhas), 0.0)
+
+    @staticmethod
+    def _defasagem_utilizavel() -> Optional[float]:
+        """Defasagem atual se o espelho pode ser usado nas leituras, senão None"""
+        if not settings.replica_habilitada:
+            return None
+        try:
+            defasagem = ServicoReplica.defasagem()
+        except sqlite3.Error as e:
+            logger.warning(f"Réplica indisponível: {str(e)}")
+            return None
+        if defasagem is None or defasagem > settings.replica_defasagem_maxima_segundos:
+            return None
+        return defasagem
+
+    @staticmethod
+    def _marcar_fonte(defasagem: Optional[float]) -> None:
+        """Registrar a origem da leitura (a maior defasagem da requisição prevalece)"""
+        atual = _fonte_dados.get()
+        if defasagem is not None:
+            anterior = atual[1] if atual and atual[0] == "replica" else 0.0
+            _fonte_dados.set(("replica", max(defasagem, anterior)))
+        elif atual is None:
+            _fonte_dados.set(("primario", 0.0))
+
+    @staticmethod
+    def cabecalhos() -> Dict[str, str]:
+        """Cabeçalhos com a origem e a defasagem dos dados lidos nesta requisição"""
+        fonte, defasagem = _fonte_dados.get() or ("primario", 0.0)
+        return {"X-Fonte-Dados": fonte, "X-Defasagem-Segundos": f"{defasagem:.0f}"}
+
+    @staticmethod
+    def _consultar(sql: str, parametros: Tuple) -> List[Dict]:
+        """Executar consulta no espelho e devolver dicionários"""
+        return [dict(linha) for linha in ServicoReplica._conexao().execute(sql, parametros).fetchall()]
+
+    @staticmethod
+    async def ler_perfil(supabase: Client, usuario_id: str) -> Optional[Dict]:
+        """
+        Perfil do usuário (sempre do Supabase)
+
+        Returns:
+            Linha de perfis ou None se não existir
+        """
+        ServicoReplica._marcar_fonte(None)
+        linhas = supabase.table("perfis").select("*").eq("id", str(usuario_id)).limit(1).execute().data
+
+        return linhas[0] if linhas else None
+
+    @staticmethod
+    async def ler_ids_perfis_empresa(supabase: Client, empresa_id: str) -> List[str]:
+        """IDs dos perfis da empresa, em ordem (sempre do Supabase)"""
+        linhas = await ServicoReplica.ler_perfis_empresa(supabase, empresa_id, colunas="id")
+        return [linha["id"] for linha in linhas]
+
+    @staticmethod
+    async def ler_registros_usuario(
+        supabase: Client,
+        usuario_id: str,
+        inicio: datetime,
+        fim: datetime
+    ) -> List[Dict]:
+        """
+        Registros do usuário entre inicio e fim (inclusive), em ordem cronológica
+
+        Args:
+            supabase: Cliente Supabase
+            usuario_id: ID do usuário
+            inicio: Início (com fuso)
+            fim: Fim (com fuso)
+
+        Returns:
+            Linhas de registros_ponto
+        """
+        defasagem = ServicoReplica._defasagem_utilizavel()
+        ServicoReplica._marcar_fonte(defasagem)
+
+        if defasagem is not None:
+            return await asyncio.to_thread(
+                ServicoReplica._consultar,
+                "SELECT * FROM registros_ponto WHERE usuario_id = ? AND timestamp >= ? AND timestamp <= ? "
+                "ORDER BY timestamp",
+                (str(usuario_id), ServicoReplica.normalizar_data(inicio), ServicoReplica.normalizar_data(fim))
+            )
+
+        return supabase.table("registros_ponto")\
+            .select("*")\
+            .eq("usuario_id", str(usuario_id))\
+            .gte("timestamp", inicio.isoformat())\
+            .lte("timestamp", fim.isoformat())\
+            .order("timestamp")\
+            .execute().data
+
+    @staticmethod
+    async def ler_registros_empresa(
+        supabase: Client,
+        empresa_id: str,
+        inicio: datetime,
+        fim: datetime
+    ) -> List[Dict]:
+        """
+        Registros da empresa entre inicio e fim (inclusive), do mais recente ao mais antigo
+
+        Args:
+            supabase: Cliente Supabase
+            empresa_id: ID da empresa
+            inicio: Início
+            fim: Fim
+
+        Returns:
+            Linhas de registros_ponto
+        """
+        defasagem = ServicoReplica._defasagem_utilizavel()
+        ServicoReplica._marcar_fonte(defasagem)
+
+        if defasagem is not None:
+            return await asyncio.to_thread(
+                ServicoReplica._consultar,
+                "SELECT * FROM registros_ponto WHERE empresa_id = ? AND timestamp >= ? AND timestamp <= ? "
+                "ORDER BY timestamp DESC",
+                (str(empresa_id), ServicoReplica.normalizar_data(inicio), ServicoReplica.normalizar_data(fim))
+            )
+
+        return supabase.table("registros_ponto")\
+            .select("*")\
+            .eq("empresa_id", str(empresa_id))\
+            .gte("timestamp", inicio.isoformat())\
+            .lte("timestamp", fim.isoformat())\
+            .order("timestamp", desc=True)\
+            .execute().data
+
+    @staticmethod
+    async def ler_perfis(supabase: Client, usuario_ids: List[str], colunas: str = "id, nome_completo, email") -> List[Dict]:
+        """Perfis pelos IDs (sempre do Supabase)"""
+        if not usuario_ids:
+            return []
+
+        ServicoReplica._marcar_fonte(None)
+        return supabase.table("perfis").select(colunas).in_("id", [str(u) for u in usuario_ids]).execute().data
+
+    @staticmethod
+    async def ler_perfis_empresa(supabase: Client, empresa_id: str, colunas: str = "id, nome_completo") -> List[Dict]:
+        """Todos os perfis da empresa em ordem de id, lidos em páginas (sempre do Supabase)"""
+        ServicoReplica._marcar_fonte(None)
+
+        linhas = []
+        while True:
+            pagina = supabase.table("perfis")\
+                .select(colunas)\
+                .eq("empresa_id", str(empresa_id))\
+                .order("id")\
+                .range(len(linhas), len(linhas) + ServicoReplica.TAMANHO_PAGINA - 1)\
+                .execute().data or []
+            linhas.extend(pagina)
+            if len(pagina) < ServicoReplica.TAMANHO_PAGINA:
+                return linhas
+
+    @staticmethod
+    async def paginar_registros_empresa(
+        supabase: Client,
+        empresa_id: str,
+        inicio: datetime,
+        fim: datetime
+    ) -> AsyncIterator[List[Dict]]:
+        """
+        Registros da empresa entre inicio e fim (inclusive) em páginas,
+        ordenados por (usuario_id, timestamp, id)
+
+        As páginas seguem por cursor nessa ordem (sem OFFSET, que reordenaria
+        o período a cada página). A origem (espelho ou Supabase) é escolhida
+        uma vez, no início.
+
+        Args:
+            supabase: Cliente Supabase
+            empresa_id: ID da empresa
+            inicio: Início (com fuso)
+            fim: Fim (com fuso)
+
+        Yields:
+            Páginas de até TAMANHO_PAGINA linhas de registros_ponto
+        """
+        defasagem = ServicoReplica._defasagem_utilizavel()
+        ServicoReplica._marcar_fonte(defasagem)
+        cursor: Optional[Tuple[str, str, str]] = None
+
+        while True:
+            if defasagem is not None:
+                sql = "SELECT * FROM registros_ponto WHERE empresa_id = ? AND timestamp >= ? AND timestamp <= ?"
+                parametros: Tuple = (
+                    str(empresa_id),
+                    ServicoReplica.normalizar_data(inicio),
+                    ServicoReplica.normalizar_data(fim)
+                )
+                if cursor:
+                    sql += " AND (usuario_id, timestamp, id) > (?, ?, ?)"
+                    parametros += cursor
+                pagina = await asyncio.to_thread(
+                    ServicoReplica._consultar,
+                    sql + " ORDER BY usuario_id, timestamp, id LIMIT ?",
+                    parametros + (ServicoReplica.TAMANHO_PAGINA,)
+                )
+            else:
+                consulta = supabase.table("registros_ponto")\
+                    .select("*")\
+                    .eq("empresa_id", str(empresa_id))\
+                    .gte("timestamp", inicio.isoformat())\
+                    .lte("timestamp", fim.isoformat())
+                if cursor:
+                    usuario_id, timestamp, registro_id = cursor
+                    consulta = consulta.or_(
+                        f"usuario_id.gt.{usuario_id},"
+                        f"and(usuario_id.eq.{usuario_id},timestamp.gt.{timestamp}),"
+                        f"and(usuario_id.eq.{usuario_id},timestamp.eq.{timestamp},id.gt.{registro_id})"
+                    )
+                pagina = consulta\
+                    .order("usuario_id")\
+                    .order("timestamp")\
+                    .order("id")\
+                    .limit(ServicoReplica.TAMANHO_PAGINA)\
+                    .execute().data or []
+
+            if pagina:
+                yield pagina
+            if len(pagina) < ServicoReplica.TAMANHO_PAGINA:
+                return
+            ultima = pagina[-1]
+            cursor = (ultima["usuario_id"], ultima["timestamp"], ultima["id"])
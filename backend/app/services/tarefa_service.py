@@ -0,0 +1,586 @@
+from supabase import Client
+from app.config import settings
+from app.arquivos import diretorio_privado
+from app.models.enums import StatusTarefa, TipoTarefa
+from app.models.schemas import RespostaTarefa
+from app.services.folha_service import ServicoFolha
+from app.services.exportacao_service import ServicoExportacao
+from app.services.relatorio_service import ServicoRelatorio
+from app.services.photo_service import ServicoFoto
+from app.services.remocao_empresa_service import ServicoRemocaoEmpresa
+from app.services.anomalia_service import ServicoAnomalias
+from app.services.importacao_service import ServicoImportacao
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Awaitable, BinaryIO, Callable, Deque, Dict, List, Optional, Tuple
+import asyncio
+import json
+import logging
+import os
+import threading
+import uuid
+
+try:
+    import fcntl
+except ImportError:  # Sem flock (Windows): tarefas de outros processos são consideradas vivas
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+
+# Assinatura dos produtores de artefatos:
+# (supabase, empresa_id, parametros, arquivo de saída, callback de progresso) -> (media type, nome do arquivo)
+Produtor = Callable[[Client, str, Dict, BinaryIO, Callable[[float], None]], Awaitable[Tuple[str, str]]]
+
+
+class ServicoTarefas:
+    """
+    Execução de relatórios longos em segundo plano
+
+    As tarefas rodam em um pool local limitado de threads (cada uma com seu
+    próprio event loop), com limite de tarefas simultâneas por empresa. O estado
+    de cada tarefa e seu artefato ficam em disco, de modo que qualquer worker do
+    mesmo host consegue consultar o progresso e servir o download até a expiração.
+
+    Cada processo gera em iniciar() um id de instância, gravado nas tarefas
+    que submete, e mantém travado (flock) o arquivo instancias/<id>.lock
+    enquanto vive. Uma tarefa pendente ou em execução cuja instância não
+    segura mais a trava foi interrompida, mesmo que o PID tenha sido
+    reutilizado após um reinício do container.
+    """
+
+    _executor: Optional[ThreadPoolExecutor] = None
+    _lock = threading.Lock()
+    _fila: Deque[Tuple[Dict, Client]] = deque()  # Tarefas aguardando vaga
+    _em_execucao: Dict[str, int] = {}  # empresa_id -> tarefas em execução
+    _pendentes: Dict[str, int] = {}  # empresa_id -> tarefas na fila ou em execução
+    _produtores: Dict[TipoTarefa, Produtor] = {}
+    _instancia: Optional[str] = None  # Id deste processo, gerado em iniciar()
+    _trava_instancia = None  # Arquivo travado enquanto o processo vive
+
+    @staticmethod
+    def diretorio() -> Path:
+        """Diretório onde ficam metadados e artefatos das tarefas"""
+        base = settings.tarefas_diretorio or os.path.join(diretorio_privado(), "tarefas")
+        caminho = Path(base)
+        caminho.mkdir(parents=True, exist_ok=True)
+        return caminho
+
+    @staticmethod
+    def registrar_produtor(tipo: TipoTarefa):
+        """Decorator para registrar a função que gera o artefato de um tipo de tarefa"""
+        def decorator(funcao: Produtor) -> Produtor:
+            ServicoTarefas._produtores[tipo] = funcao
+            return funcao
+        return decorator
+
+    @staticmethod
+    def iniciar() -> None:
+        """Criar o pool de workers, marcar tarefas interrompidas e limpar expiradas"""
+        with ServicoTarefas._lock:
+            if ServicoTarefas._executor is None:
+                ServicoTarefas._executor = ThreadPoolExecutor(
+                    max_workers=settings.tarefas_max_workers,
+                    thread_name_prefix="tarefa"
+                )
+            if ServicoTarefas._instancia is None:
+                ServicoTarefas._registrar_instancia()
+
+        # Tarefas de instâncias que não existem mais nunca vão terminar
+        for meta in ServicoTarefas._todas():
+            if meta["status"] in (StatusTarefa.PENDENTE.value, StatusTarefa.EXECUTANDO.value) \
+                    and not ServicoTarefas._instancia_ativa(meta.get("instancia")):
+                ServicoTarefas._finalizar(meta, StatusTarefa.FALHOU, "Tarefa interrompida pelo reinício do servidor")
+
+        ServicoTarefas.limpar_expiradas()
+
+    @staticmethod
+    def encerrar() -> None:
+        """Encerrar o pool de workers (tarefas na fila são descartadas)"""
+        with ServicoTarefas._lock:
+            executor = ServicoTarefas._executor
+            ServicoTarefas._executor = None
+            ServicoTarefas._fila.clear()
+
+        if executor:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    @staticmethod
+    def submeter(
+        supabase: Client,
+        empresa_id: str,
+        usuario_id: str,
+        tipo: TipoTarefa,
+        parametros: Dict,
+        unica: bool = False
+    ) -> Dict:
+        """
+        Submeter uma tarefa para execução em segundo plano
+
+        Args:
+            supabase: Cliente Supabase usado pela tarefa
+            empresa_id: Empresa dona da tarefa
+            usuario_id: Usuário que submeteu
+            tipo: Tipo da tarefa
+            parametros: Parâmetros do produtor (serializáveis em JSON)
+            unica: Se já houver tarefa deste tipo pendente ou em execução para a empresa, devolvê-la em vez de criar outra
+
+        Returns:
+            Metadados da tarefa criada (ou da já ativa, com unica)
+
+        Raises:
+            ValueError: Se o tipo não tiver produtor ou a empresa exceder o limite de tarefas pendentes
+        """
+        if tipo not in ServicoTarefas._produtores:
+            raise ValueError(f"Tipo de tarefa não suportado: {tipo.value}")
+
+        if ServicoTarefas._executor is None:
+            ServicoTarefas.iniciar()
+
+        ServicoTarefas.limpar_expiradas()
+
+        meta = {
+            "id": str(uuid.uuid4()),
+            "empresa_id": str(empresa_id),
+            "usuario_id": str(usuario_id),
+            "tipo": tipo.value,
+            "parametros": parametros,
+            "status": StatusTarefa.PENDENTE.value,
+            "progresso": 0.0,
+            "mensagem": None,
+            "criado_em": datetime.utcnow().isoformat(),
+            "iniciado_em": None,
+            "concluido_em": None,
+            "expira_em": None,
+            "media_type": None,
+            "nome_arquivo": None,
+            "instancia": ServicoTarefas._instancia
+        }
+
+        with ServicoTarefas._lock:
+            if unica:
+                ativa = ServicoTarefas.obter_ativa(meta["empresa_id"], tipo)
+                if ativa:
+                    return ativa
+
+            pendentes = ServicoTarefas._pendentes.get(meta["empresa_id"], 0)
+            if pendentes >= settings.tarefas_max_pendentes_por_empresa:
+                raise ValueError("Limite de tarefas pendentes da empresa atingido. Aguarde a conclusão das atuais.")
+
+            ServicoTarefas._pendentes[meta["empresa_id"]] = pendentes + 1
+            ServicoTarefas._salvar(meta)
+            ServicoTarefas._fila.append((meta, supabase))
+
+        logger.info("Tarefa submetida: id=%s, tipo=%s, empresa=%s", meta['id'], tipo.value, empresa_id)
+
+        ServicoTarefas._despachar()
+
+        return meta
+
+    @staticmethod
+    def obter(tarefa_id: str) -> Optional[Dict]:
+        """Metadados de uma tarefa (None se não existir ou tiver expirado)"""
+        try:
+            uuid.UUID(tarefa_id)
+        except ValueError:
+            return None
+
+        meta = ServicoTarefas._ler(ServicoTarefas.diretorio() / f"{tarefa_id}.json")
+        if meta and ServicoTarefas._expirada(meta):
+            ServicoTarefas._remover(meta)
+            return None
+        return meta
+
+    @staticmethod
+    def listar(empresa_id: str) -> List[Dict]:
+        """Tarefas não expiradas da empresa, das mais recentes para as mais antigas"""
+        ServicoTarefas.limpar_expiradas()
+        tarefas = [meta for meta in ServicoTarefas._todas() if meta["empresa_id"] == str(empresa_id)]
+        return sorted(tarefas, key=lambda meta: meta["criado_em"], reverse=True)
+
+    @staticmethod
+    def obter_ativa(empresa_id: str, tipo: TipoTarefa) -> Optional[Dict]:
+        """Tarefa do tipo pendente ou em execução para a empresa (em uma instância viva), se houver"""
+        for meta in ServicoTarefas._todas():
+            if meta["empresa_id"] == str(empresa_id) \
+                    and meta["tipo"] == tipo.value \
+                    and meta["status"] in (StatusTarefa.PENDENTE.value, StatusTarefa.EXECUTANDO.value) \
+                    and ServicoTarefas._instancia_ativa(meta.get("instancia")):
+                return meta
+        return None
+
+    @staticmethod
+    def para_resposta(meta: Dict) -> RespostaTarefa:
+        """Converter metadados da tarefa em resposta da API"""
+        concluida = meta["status"] == StatusTarefa.CONCLUIDA.value
+        return RespostaTarefa(
+            id=meta["id"],
+            tipo=meta["tipo"],
+            status=meta["status"],
+            progresso=meta["progresso"],
+            mensagem=meta.get("mensagem"),
+            criado_em=meta["criado_em"],
+            iniciado_em=meta.get("iniciado_em"),
+            concluido_em=meta.get("concluido_em"),
+            expira_em=meta.get("expira_em"),
+            url_download=f"/tarefas/{meta['id']}/download" if concluida else None
+        )
+
+    @staticmethod
+    def caminho_artefato(meta: Dict) -> Path:
+        """Caminho do artefato gerado pela tarefa"""
+        return ServicoTarefas.diretorio() / f"{meta['id']}.artefato"
+
+    @staticmethod
+    def limpar_expiradas() -> int:
+        """
+        Remover metadados e artefatos de tarefas expiradas
+
+        Returns:
+            Quantidade de tarefas removidas
+        """
+        removidas = 0
+        for meta in ServicoTarefas._todas():
+            if ServicoTarefas._expirada(meta):
+                ServicoTarefas._remover(meta)
+                removidas += 1
+        return removidas
+
+    # ------------------------------------------------------------------
+    # Agendamento e execução
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _despachar() -> None:
+        """Enviar ao pool as tarefas da fila cuja empresa ainda tem vaga"""
+        with ServicoTarefas._lock:
+            executor = ServicoTarefas._executor
+            if executor is None:
+                return
+
+            ocupados = sum(ServicoTarefas._em_execucao.values())
+            restantes: Deque[Tuple[Dict, Client]] = deque()
+
+            while ServicoTarefas._fila:
+                meta, supabase = ServicoTarefas._fila.popleft()
+                empresa_id = meta["empresa_id"]
+                em_execucao = ServicoTarefas._em_execucao.get(empresa_id, 0)
+
+                if ocupados >= settings.tarefas_max_workers or em_execucao >= settings.tarefas_max_por_empresa:
+                    restantes.append((meta, supabase))
+                    continue
+
+                ServicoTarefas._em_execucao[empresa_id] = em_execucao + 1
+                ocupados += 1
+                executor.submit(ServicoTarefas._executar, meta, supabase)
+
+            ServicoTarefas._fila = restantes
+
+    @staticmethod
+    def _executar(meta: Dict, supabase: Client) -> None:
+        """Executar uma tarefa em uma thread do pool"""
+        produtor = ServicoTarefas._produtores[TipoTarefa(meta["tipo"])]
+        caminho = ServicoTarefas.caminho_artefato(meta)
+        ultimo_progresso = [0.0]
+
+        def progresso(fracao: float) -> None:
+            fracao = min(max(fracao, 0.0), 1.0)
+            # Gravar em disco no máximo a cada 1% de avanço
+            if fracao - ultimo_progresso[0] >= 0.01:
+                ultimo_progresso[0] = fracao
+                meta["progresso"] = round(fracao, 3)
+                ServicoTarefas._salvar(meta)
+
+        try:
+            meta["status"] = StatusTarefa.EXECUTANDO.value
+            meta["iniciado_em"] = datetime.utcnow().isoformat()
+            ServicoTarefas._salvar(meta)
+
+            with open(caminho, "wb") as arquivo:
+                media_type, nome_arquivo = asyncio.run(
+                    produtor(supabase, meta["empresa_id"], meta["parametros"], arquivo, progresso)
+                )
+
+            meta["media_type"] = media_type
+            meta["nome_arquivo"] = nome_arquivo
+            meta["progresso"] = 1.0
+            ServicoTarefas._finalizar(meta, StatusTarefa.CONCLUIDA)
+
+            logger.info("Tarefa concluída: id=%s, tipo=%s", meta['id'], meta['tipo'])
+
+        except Exception as e:
+            logger.error(f"Erro ao executar tarefa {meta['id']}: {str(e)}")
+            caminho.unlink(missing_ok=True)
+            ServicoTarefas._finalizar(meta, StatusTarefa.FALHOU, str(e))
+
+        finally:
+            with ServicoTarefas._lock:
+                empresa_id = meta["empresa_id"]
+                ServicoTarefas._em_execucao[empresa_id] = ServicoTarefas._em_execucao.get(empresa_id, 1) - 1
+                ServicoTarefas._pendentes[empresa_id] = ServicoTarefas._pendentes.get(empresa_id, 1) - 1
+
+            ServicoTarefas._despachar()
+
+    # ------------------------------------------------------------------
+    # Persistência dos metadados
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _finalizar(meta: Dict, status_final: StatusTarefa, mensagem: Optional[str] = None) -> None:
+        """Marcar tarefa como concluída ou falha e definir a expiração"""
+        agora = datetime.utcnow()
+        meta["status"] = status_final.value
+        meta["mensagem"] = mensagem
+        meta["concluido_em"] = agora.isoformat()
+        meta["expira_em"] = (agora + timedelta(hours=settings.tarefas_expiracao_horas)).isoformat()
+        ServicoTarefas._salvar(meta)
+
+    @staticmethod
+    def _salvar(meta: Dict) -> None:
+        """Gravar metadados de forma atômica (arquivo temporário + rename)"""
+        destino = ServicoTarefas.diretorio() / f"{meta['id']}.json"
+        temporario = destino.with_suffix(f".{threading.get_ident()}.tmp")
+        temporario.write_text(json.dumps(meta), encoding="utf-8")
+        os.replace(temporario, destino)
+
+    @staticmethod
+    def _ler(caminho: Path) -> Optional[Dict]:
+        """Ler metadados de uma tarefa"""
+        try:
+            return json.loads(caminho.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+
+    @staticmethod
+    def _todas() -> List[Dict]:
+        """Metadados de todas as tarefas em disco"""
+        tarefas = []
+        for caminho in ServicoTarefas.diretorio().glob("*.json"):
+            meta = ServicoTarefas._ler(caminho)
+            if meta:
+                tarefas.append(meta)
+        return tarefas
+
+    @staticmethod
+    def _expirada(meta: Dict) -> bool:
+        """Indica se a tarefa já passou da data de expiração"""
+        return bool(meta.get("expira_em")) and datetime.fromisoformat(meta["expira_em"]) < datetime.utcnow()
+
+    @staticmethod
+    def _remover(meta: Dict) -> None:
+        """Apagar metadados e artefato da tarefa"""
+        ServicoTarefas.caminho_artefato(meta).unlink(missing_ok=True)
+        (ServicoTarefas.diretorio() / f"{meta['id']}.json").unlink(missing_ok=True)
+
+    @staticmethod
+    def _caminho_instancia(instancia: str) -> Path:
+        """Arquivo de trava da instância"""
+        diretorio = ServicoTarefas.diretorio() / "instancias"
+        diretorio.mkdir(exist_ok=True)
+        return diretorio / f"{instancia}.lock"
+
+    @staticmethod
+    def _registrar_instancia() -> None:
+        """Gerar o id deste processo e travar seu arquivo pelo resto da execução"""
+        instancia = uuid.uuid4().hex
+        if fcntl is not None:
+            trava = open(ServicoTarefas._caminho_instancia(instancia), "w")
+            fcntl.flock(trava, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            ServicoTarefas._trava_instancia = trava
+        ServicoTarefas._instancia = instancia
+
+    @staticmethod
+    def _instancia_ativa(instancia: Optional[str]) -> bool:
+        """Indica se o processo que criou a tarefa ainda está em execução"""
+        if not instancia:
+            return False
+        if instancia == ServicoTarefas._instancia:
+            return True
+        if fcntl is None:
+            return True
+
+        caminho = ServicoTarefas._caminho_instancia(instancia)
+        try:
+            trava = open(caminho, "r")
+        except FileNotFoundError:
+            return False
+
+        with trava:
+            try:
+                fcntl.flock(trava, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                return True
+            # A trava é liberada quando o processo termina: a instância morreu
+            caminho.unlink(missing_ok=True)
+            return False
+
+
+# ============================================================================
+# Produtores de artefatos
+# ============================================================================
+
+@ServicoTarefas.registrar_produtor(TipoTarefa.EXPORTACAO_FOLHA)
+async def _produzir_exportacao_folha(
+    supabase: Client,
+    empresa_id: str,
+    parametros: Dict,
+    arquivo: BinaryIO,
+    progresso: Callable[[float], None]
+) -> Tuple[str, str]:
+    """Folha de toda a empresa em CSV, JSON, Parquet ou Arrow IPC"""
+    inicio = datetime.fromisoformat(parametros["data_inicio"])
+    fim = datetime.fromisoformat(parametros["data_fim"])
+    formato = parametros.get("formato", "csv").lower()
+
+    dados = await ServicoFolha.exportar_folha_empresa(
+        supabase,
+        empresa_id,
+        inicio,
+        fim,
+        progresso=lambda fracao: progresso(fracao * 0.95)
+    )
+
+    nome_base = f"folha_{empresa_id}_{inicio.strftime('%Y%m%d')}_{fim.strftime('%Y%m%d')}"
+
+    if ServicoExportacao.formato_suportado(formato):
+        media_type, extensao = ServicoExportacao.FORMATOS_COLUNARES[formato]
+        arquivo.write(ServicoExportacao.serializar(ServicoExportacao.tabela_folha(dados), formato))
+        return media_type, f"{nome_base}.{extensao}"
+
+    if formato == "csv":
+        arquivo.write(ServicoExportacao.folha_csv(dados).encode("utf-8"))
+        return "text/csv", f"{nome_base}.csv"
+
+    arquivo.write(json.dumps({"dados": [item.model_dump(mode="json") for item in dados]}).encode("utf-8"))
+    return "application/json", f"{nome_base}.json"
+
+
+@ServicoTarefas.registrar_produtor(TipoTarefa.EXPORTACAO_REGISTROS)
+async def _produzir_exportacao_registros(
+    supabase: Client,
+    empresa_id: str,
+    parametros: Dict,
+    arquivo: BinaryIO,
+    progresso: Callable[[float], None]
+) -> Tuple[str, str]:
+    """Registros de ponto brutos da empresa em Parquet ou Arrow IPC"""
+    inicio = datetime.fromisoformat(parametros["data_inicio"])
+    fim = datetime.fromisoformat(parametros["data_fim"])
+    formato = parametros.get("formato", "parquet").lower()
+
+    if not ServicoExportacao.formato_suportado(formato):
+        raise ValueError("Formato inválido. Use parquet ou arrow")
+
+    linhas = await ServicoExportacao.obter_registros_brutos(supabase, empresa_id, inicio, fim)
+    progresso(0.8)
+
+    media_type, extensao = ServicoExportacao.FORMATOS_COLUNARES[formato]
+    arquivo.write(ServicoExportacao.serializar(ServicoExportacao.tabela_registros(linhas), formato))
+
+    return media_type, f"registros_{empresa_id}_{inicio.strftime('%Y%m%d')}_{fim.strftime('%Y%m%d')}.{extensao}"
+
+
+@ServicoTarefas.registrar_produtor(TipoTarefa.ESPELHOS_PONTO)
+async def _produzir_espelhos_ponto(
+    supabase: Client,
+    empresa_id: str,
+    parametros: Dict,
+    arquivo: BinaryIO,
+    progresso: Callable[[float], None]
+) -> Tuple[str, str]:
+    """Espelhos de ponto de todos os funcionários da empresa (NDJSON, um por linha)"""
+    inicio = datetime.fromisoformat(parametros["data_inicio"])
+    fim = datetime.fromisoformat(parametros["data_fim"])
+
+    async for espelho in ServicoRelatorio.gerar_espelhos_empresa(supabase, empresa_id, inicio, fim, progresso):
+        arquivo.write(espelho.model_dump_json().encode("utf-8") + b"\n")
+
+    return "application/x-ndjson", f"espelhos_{empresa_id}_{inicio.strftime('%Y%m%d')}_{fim.strftime('%Y%m%d')}.ndjson"
+
+
+@ServicoTarefas.registrar_produtor(TipoTarefa.LIMPEZA_FOTOS)
+async def _produzir_limpeza_fotos(
+    supabase: Client,
+    empresa_id: str,
+    parametros: Dict,
+    arquivo: BinaryIO,
+    progresso: Callable[[float], None]
+) -> Tuple[str, str]:
+    """Remoção das fotos de ponto fora do prazo de retenção (relatório JSON com as métricas)"""
+    antes_de = datetime.fromisoformat(parametros["antes_de"])
+
+    metricas = await ServicoFoto.limpar_fotos_antigas(
+        supabase,
+        empresa_id,
+        antes_de,
+        simular=parametros.get("simular", True),
+        usuario_id=parametros.get("usuario_id"),
+        progresso=progresso
+    )
+
+    arquivo.write(json.dumps(metricas).encode("utf-8"))
+
+    return "application/json", f"limpeza_fotos_{empresa_id}_{antes_de.strftime('%Y%m%d')}.json"
+
+
+@ServicoTarefas.registrar_produtor(TipoTarefa.REMOCAO_EMPRESA)
+async def _produzir_remocao_empresa(
+    supabase: Client,
+    empresa_id: str,
+    parametros: Dict,
+    arquivo: BinaryIO,
+    progresso: Callable[[float], None]
+) -> Tuple[str, str]:
+    """Remoção da empresa e de todos os seus dados (relatório JSON com o ponto de controle final)"""
+    estado = await ServicoRemocaoEmpresa.remover(
+        supabase,
+        empresa_id,
+        solicitado_por=parametros.get("solicitado_por"),
+        progresso=progresso
+    )
+
+    arquivo.write(json.dumps(estado, default=str).encode("utf-8"))
+
+    return "application/json", f"remocao_empresa_{empresa_id}.json"
+
+
+@ServicoTarefas.registrar_produtor(TipoTarefa.ANALISE_ANOMALIAS)
+async def _produzir_analise_anomalias(
+    supabase: Client,
+    empresa_id: str,
+    parametros: Dict,
+    arquivo: BinaryIO,
+    progresso: Callable[[float], None]
+) -> Tuple[str, str]:
+    """Análise de anomalias do período (achados gravados em anomalias_ponto; relatório JSON com o resumo)"""
+    inicio = datetime.fromisoformat(parametros["data_inicio"])
+    fim = datetime.fromisoformat(parametros["data_fim"])
+
+    resumo = await ServicoAnomalias.analisar_empresa(supabase, empresa_id, inicio, fim, progresso=progresso)
+
+    arquivo.write(json.dumps(resumo).encode("utf-8"))
+
+    return "application/json", f"anomalias_{empresa_id}_{inicio.strftime('%Y%m%d')}_{fim.strftime('%Y%m%d')}.json"
+
+
+@ServicoTarefas.registrar_produtor(TipoTarefa.IMPORTACAO_USUARIOS)
+async def _produzir_importacao_usuarios(
+    supabase: Client,
+    empresa_id: str,
+    parametros: Dict,
+    arquivo: BinaryIO,
+    progresso: Callable[[float], None]
+) -> Tuple[str, str]:
+    """Importação em lote de funcionários (relatório JSON no formato de RespostaImportacao)"""
+    validas = ServicoImportacao.retirar_lote(parametros["lote"])
+    if validas is None:
+        raise ValueError("Linhas da importação não estão mais disponíveis; envie o arquivo novamente")
+
+    resultados = list(parametros.get("invalidas", []))
+    resultados += await ServicoImportacao.importar(supabase, validas, progresso=progresso)
+
+    arquivo.write(ServicoImportacao.resumir(resultados).model_dump_json().encode("utf-8"))
+
+    return "application/json", f"importacao_usuarios_{datetime.utcnow().strftime('%Y%m%d%H%M%S')}.json"
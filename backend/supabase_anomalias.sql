@@ -0,0 +1,42 @@
+-- ============================================================================
+-- ANOMALIAS DE PONTO - Executar após o schema principal
+-- ============================================================================
+-- Achados da análise em lote dos registros de ponto (registros duplicados,
+-- deslocamentos impossíveis, intervalos não fechados e saídas ausentes).
+-- Cada análise substitui os achados do período analisado.
+-- ============================================================================
+
+CREATE TABLE IF NOT EXISTS anomalias_ponto (
+    id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+    empresa_id UUID NOT NULL REFERENCES empresas(id) ON DELETE CASCADE,
+    usuario_id UUID NOT NULL REFERENCES perfis(id) ON DELETE CASCADE,
+    registro_id UUID NOT NULL REFERENCES registros_ponto(id) ON DELETE CASCADE,
+    tipo TEXT NOT NULL CHECK (tipo IN ('registro_duplicado', 'deslocamento_impossivel', 'intervalo_nao_fechado', 'saida_ausente')),
+    timestamp TIMESTAMPTZ NOT NULL,
+    detalhes JSONB NOT NULL DEFAULT '{}'::jsonb,
+    criado_em TIMESTAMPTZ DEFAULT NOW()
+);
+
+CREATE INDEX IF NOT EXISTS idx_anomalias_empresa_timestamp
+    ON anomalias_ponto(empresa_id, timestamp DESC);
+
+COMMENT ON TABLE anomalias_ponto IS 'Achados da análise de anomalias nos registros de ponto';
+COMMENT ON COLUMN anomalias_ponto.timestamp IS 'Timestamp do registro em que a anomalia foi encontrada';
+
+
+-- ============================================================================
+-- RLS - escrita apenas pelo backend (service key)
+-- ============================================================================
+
+ALTER TABLE anomalias_ponto ENABLE ROW LEVEL SECURITY;
+
+CREATE POLICY "admin_empresa_ver_anomalias_empresa"
+    ON anomalias_ponto FOR SELECT
+    USING (
+        EXISTS (
+            SELECT 1 FROM perfis
+            WHERE perfis.id = auth.uid()
+            AND perfis.empresa_id = anomalias_ponto.empresa_id
+            AND perfis.funcao IN ('company_admin', 'super_admin')
+        )
+    );
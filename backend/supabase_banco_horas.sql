@@ -0,0 +1,75 @@
+-- ============================================================================
+-- BANCO DE HORAS - Executar após o schema principal
+-- ============================================================================
+-- Saldo acumulado por funcionário (mantido de forma incremental pelo backend)
+-- e lançamentos diários que o compõem.
+-- ============================================================================
+
+CREATE TABLE IF NOT EXISTS banco_horas (
+    usuario_id UUID PRIMARY KEY REFERENCES perfis(id) ON DELETE CASCADE,
+    empresa_id UUID NOT NULL REFERENCES empresas(id) ON DELETE CASCADE,
+    saldo_minutos INTEGER NOT NULL DEFAULT 0,
+    ultimo_dia_fechado DATE NOT NULL,
+    atualizado_em TIMESTAMPTZ DEFAULT NOW()
+);
+
+CREATE INDEX IF NOT EXISTS idx_banco_horas_empresa ON banco_horas(empresa_id);
+
+COMMENT ON TABLE banco_horas IS 'Saldo do banco de horas por funcionário';
+COMMENT ON COLUMN banco_horas.ultimo_dia_fechado IS 'Último dia já incluído no saldo; fechamentos seguintes começam no dia seguinte';
+
+
+CREATE TABLE IF NOT EXISTS banco_horas_lancamentos (
+    id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+    usuario_id UUID NOT NULL REFERENCES perfis(id) ON DELETE CASCADE,
+    empresa_id UUID NOT NULL REFERENCES empresas(id) ON DELETE CASCADE,
+    data DATE NOT NULL,
+    trabalhado_minutos INTEGER NOT NULL,
+    esperado_minutos INTEGER NOT NULL,
+    saldo_minutos INTEGER NOT NULL,
+    criado_em TIMESTAMPTZ DEFAULT NOW(),
+    UNIQUE (usuario_id, data)
+);
+
+CREATE INDEX IF NOT EXISTS idx_banco_horas_lancamentos_empresa_data
+    ON banco_horas_lancamentos(empresa_id, data);
+
+COMMENT ON TABLE banco_horas_lancamentos IS 'Lançamentos diários do banco de horas (trabalhado - esperado)';
+
+
+-- ============================================================================
+-- RLS - escrita apenas pelo backend (service key)
+-- ============================================================================
+
+ALTER TABLE banco_horas ENABLE ROW LEVEL SECURITY;
+ALTER TABLE banco_horas_lancamentos ENABLE ROW LEVEL SECURITY;
+
+CREATE POLICY "funcionario_ver_proprio_banco_horas"
+    ON banco_horas FOR SELECT
+    USING (auth.uid() = usuario_id);
+
+CREATE POLICY "admin_empresa_ver_banco_horas_empresa"
+    ON banco_horas FOR SELECT
+    USING (
+        EXISTS (
+            SELECT 1 FROM perfis
+            WHERE perfis.id = auth.uid()
+            AND perfis.empresa_id = banco_horas.empresa_id
+            AND perfis.funcao IN ('company_admin', 'super_admin')
+        )
+    );
+
+CREATE POLICY "funcionario_ver_proprios_lancamentos"
+    ON banco_horas_lancamentos FOR SELECT
+    USING (auth.uid() = usuario_id);
+
+CREATE POLICY "admin_empresa_ver_lancamentos_empresa"
+    ON banco_horas_lancamentos FOR SELECT
+    USING (
+        EXISTS (
+            SELECT 1 FROM perfis
+            WHERE perfis.id = auth.uid()
+            AND perfis.empresa_id = banco_horas_lancamentos.empresa_id
+            AND perfis.funcao IN ('company_admin', 'super_admin')
+        )
+    );
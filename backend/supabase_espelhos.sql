@@ -0,0 +1,11 @@
+-- ============================================================================
+-- ESPELHOS DE PONTO EM LOTE - Executar após o schema principal
+-- ============================================================================
+-- /relatorios/empresa/espelhos-ponto (e a tarefa espelhos_ponto) lê os
+-- registros do período em páginas ordenadas por (usuario_id, timestamp, id),
+-- com cursor nessa ordem. O índice abaixo atende o filtro por empresa e a
+-- ordenação sem ordenar o período inteiro a cada página.
+-- ============================================================================
+
+CREATE INDEX IF NOT EXISTS idx_registros_empresa_usuario_timestamp
+    ON registros_ponto(empresa_id, usuario_id, timestamp, id);
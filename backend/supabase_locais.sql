@@ -0,0 +1,56 @@
+-- ============================================================================
+-- LOCAIS DA EMPRESA (GEOCERCA) - Executar após o schema principal
+-- ============================================================================
+-- Locais onde o ponto pode ser registrado (centro + raio). Empresas sem
+-- locais ativos não têm validação de localização. Cada registro guarda o
+-- local em que foi feito.
+-- ============================================================================
+
+CREATE TABLE IF NOT EXISTS locais_empresa (
+    id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+    empresa_id UUID NOT NULL REFERENCES empresas(id) ON DELETE CASCADE,
+    nome TEXT NOT NULL,
+    latitude NUMERIC(10, 7) NOT NULL CHECK (latitude BETWEEN -90 AND 90),
+    longitude NUMERIC(10, 7) NOT NULL CHECK (longitude BETWEEN -180 AND 180),
+    raio_metros INTEGER NOT NULL CHECK (raio_metros > 0),
+    ativo BOOLEAN NOT NULL DEFAULT TRUE,
+    criado_em TIMESTAMPTZ DEFAULT NOW()
+);
+
+CREATE INDEX IF NOT EXISTS idx_locais_empresa_empresa ON locais_empresa(empresa_id, id);
+
+COMMENT ON TABLE locais_empresa IS 'Locais permitidos para registro de ponto (geocerca circular)';
+COMMENT ON COLUMN locais_empresa.raio_metros IS 'Distância máxima do centro, em metros';
+
+ALTER TABLE registros_ponto
+    ADD COLUMN IF NOT EXISTS local_id UUID REFERENCES locais_empresa(id) ON DELETE SET NULL;
+
+COMMENT ON COLUMN registros_ponto.local_id IS 'Local da empresa em que o ponto foi registrado (NULL sem geocerca)';
+
+
+-- ============================================================================
+-- RLS - escrita apenas pelo backend (service key)
+-- ============================================================================
+
+ALTER TABLE locais_empresa ENABLE ROW LEVEL SECURITY;
+
+-- Funcionários leem os locais da própria empresa (validação no registro de ponto)
+CREATE POLICY "usuario_ver_locais_empresa"
+    ON locais_empresa FOR SELECT
+    USING (
+        EXISTS (
+            SELECT 1 FROM perfis
+            WHERE perfis.id = auth.uid()
+            AND perfis.empresa_id = locais_empresa.empresa_id
+        )
+    );
+
+CREATE POLICY "super_admin_ver_todos_locais"
+    ON locais_empresa FOR SELECT
+    USING (
+        EXISTS (
+            SELECT 1 FROM perfis
+            WHERE perfis.id = auth.uid()
+            AND perfis.funcao = 'super_admin'
+        )
+    );
@@ -0,0 +1,31 @@
+-- ============================================================================
+-- ÍNDICE DE PRESENÇA - Executar após o schema principal
+-- ============================================================================
+-- Último registro de ponto de cada funcionário em uma única consulta, usado
+-- pelo backend para reconstruir o índice de presença ao iniciar.
+-- ============================================================================
+
+CREATE OR REPLACE FUNCTION ultimos_registros_ponto(p_empresa_id UUID DEFAULT NULL)
+RETURNS TABLE (
+    usuario_id UUID,
+    empresa_id UUID,
+    tipo_registro TEXT,
+    "timestamp" TIMESTAMPTZ
+) AS $$
+    SELECT DISTINCT ON (r.usuario_id)
+        r.usuario_id,
+        r.empresa_id,
+        r.tipo_registro,
+        r.timestamp
+    FROM registros_ponto r
+    WHERE p_empresa_id IS NULL OR r.empresa_id = p_empresa_id
+    ORDER BY r.usuario_id, r.timestamp DESC;
+$$ LANGUAGE sql STABLE SECURITY DEFINER;
+
+-- Apenas o backend (service key) consulta todas as empresas
+REVOKE ALL ON FUNCTION ultimos_registros_ponto(UUID) FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION ultimos_registros_ponto(UUID) TO service_role;
+
+-- DISTINCT ON percorre idx_registros_usuario_timestamp (usuario_id, timestamp DESC)
+CREATE INDEX IF NOT EXISTS idx_registros_usuario_timestamp
+    ON registros_ponto(usuario_id, timestamp DESC);
@@ -0,0 +1,25 @@
+-- ============================================================================
+-- REMOÇÃO DE EMPRESAS (OFFBOARDING) - Executar após o schema principal
+-- ============================================================================
+-- Ponto de controle da remoção em etapas de uma empresa. Permite retomar
+-- a remoção de onde parou se o processo for interrompido.
+-- ============================================================================
+
+CREATE TABLE IF NOT EXISTS empresas_remocao (
+    empresa_id UUID PRIMARY KEY,
+    etapa TEXT NOT NULL DEFAULT 'fotos'
+        CHECK (etapa IN ('fotos', 'registros', 'usuarios', 'empresa', 'concluida')),
+    fotos_removidas INTEGER NOT NULL DEFAULT 0,
+    registros_removidos BIGINT NOT NULL DEFAULT 0,
+    usuarios_removidos INTEGER NOT NULL DEFAULT 0,
+    solicitado_por UUID,
+    iniciado_em TIMESTAMPTZ DEFAULT NOW(),
+    atualizado_em TIMESTAMPTZ DEFAULT NOW(),
+    concluido_em TIMESTAMPTZ
+);
+
+-- Sem FK para empresas: o ponto de controle sobrevive à remoção da empresa
+COMMENT ON TABLE empresas_remocao IS 'Progresso da remoção em etapas de empresas (fotos, registros, usuários, empresa)';
+
+-- Escrita e leitura apenas pelo backend (service key)
+ALTER TABLE empresas_remocao ENABLE ROW LEVEL SECURITY;
@@ -0,0 +1,13 @@
+-- ============================================================================
+-- RÉPLICA DE RELATÓRIOS - Executar após o schema principal
+-- ============================================================================
+-- O backend copia registros_ponto e perfis para um espelho local (SQLite)
+-- lendo as linhas novas por cursor em (criado_em, id). Os índices abaixo
+-- permitem essa leitura incremental sem varrer as tabelas.
+-- ============================================================================
+
+CREATE INDEX IF NOT EXISTS idx_registros_criado_em_id
+    ON registros_ponto(criado_em, id);
+
+CREATE INDEX IF NOT EXISTS idx_perfis_criado_em_id
+    ON perfis(criado_em, id);
@@ -0,0 +1,36 @@
+-- ============================================================================
+-- SINCRONIZAÇÃO INCREMENTAL (DELTA) - Executar após o schema principal
+-- ============================================================================
+-- atualizado_em muda a cada INSERT/UPDATE do registro (por exemplo, quando a
+-- retenção de fotos limpa foto_url). O endpoint /ponto/registros/delta
+-- devolve os registros do usuário por cursor em (atualizado_em, id).
+-- ============================================================================
+
+ALTER TABLE registros_ponto
+    ADD COLUMN IF NOT EXISTS atualizado_em TIMESTAMPTZ;
+
+UPDATE registros_ponto
+    SET atualizado_em = COALESCE(criado_em, timestamp)
+    WHERE atualizado_em IS NULL;
+
+ALTER TABLE registros_ponto
+    ALTER COLUMN atualizado_em SET DEFAULT NOW(),
+    ALTER COLUMN atualizado_em SET NOT NULL;
+
+COMMENT ON COLUMN registros_ponto.atualizado_em IS 'Última inserção ou alteração do registro (cursor da sincronização incremental)';
+
+CREATE OR REPLACE FUNCTION registros_ponto_marcar_atualizacao()
+RETURNS TRIGGER AS $$
+BEGIN
+    NEW.atualizado_em := clock_timestamp();
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_registros_ponto_atualizado_em ON registros_ponto;
+CREATE TRIGGER trg_registros_ponto_atualizado_em
+    BEFORE INSERT OR UPDATE ON registros_ponto
+    FOR EACH ROW EXECUTE FUNCTION registros_ponto_marcar_atualizacao();
+
+CREATE INDEX IF NOT EXISTS idx_registros_usuario_atualizado_em
+    ON registros_ponto(usuario_id, atualizado_em, id);
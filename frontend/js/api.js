@@ -91,6 +91,7 @@ class ApiClient {
     logout() {
         localStorage.removeItem(CONFIG.STORAGE_KEYS.TOKEN);
         localStorage.removeItem(CONFIG.STORAGE_KEYS.USUARIO);
+        localStorage.removeItem(CONFIG.STORAGE_KEYS.CURSOR_HISTORICO);
         window.location.reload();
     }
 
@@ -143,6 +144,20 @@ class ApiClient {
         });
     }
 
+    /**
+     * Obter registros criados ou alterados desde o cursor
+     */
+    async obterRegistrosDelta(cursor = null, dias = CONFIG.HISTORICO_DIAS) {
+        const params = new URLSearchParams({ dias });
+        if (cursor) {
+            params.set('cursor', cursor);
+        }
+
+        return await this.request(`/ponto/registros/delta?${params}`, {
+            method: 'GET'
+        });
+    }
+
     /**
      * Sincronizar registros offline
      */
@@ -153,6 +168,59 @@ class ApiClient {
         });
     }
 
+    /**
+     * Sincronizar registros offline em lote binário (fotos em bytes, corpo gzip)
+     *
+     * Corpo: "PONTO\x01" e, por registro, u32 big-endian com o tamanho do
+     * cabeçalho JSON, o cabeçalho e os bytes da foto (tamanho_foto).
+     */
+    async sincronizarRegistrosLote(registros) {
+        const codificador = new TextEncoder();
+        const partes = [codificador.encode('PONTO\x01')];
+
+        for (const registro of registros) {
+            const foto = registro.photo_base64
+                ? this.base64ParaBytes(registro.photo_base64)
+                : new Uint8Array(0);
+
+            const cabecalho = codificador.encode(JSON.stringify({
+                tipo_ponto: registro.clock_type,
+                latitude: registro.latitude,
+                longitude: registro.longitude,
+                tamanho_foto: foto.length
+            }));
+
+            const tamanho = new Uint8Array(4);
+            new DataView(tamanho.buffer).setUint32(0, cabecalho.length);
+            partes.push(tamanho, cabecalho, foto);
+        }
+
+        const corpo = await new Response(
+            new Blob(partes).stream().pipeThrough(new CompressionStream('gzip'))
+        ).blob();
+
+        return await this.request('/ponto/sincronizar/lote', {
+            method: 'POST',
+            body: corpo,
+            headers: {
+                'Content-Type': 'application/octet-stream',
+                'Content-Encoding': 'gzip'
+            }
+        });
+    }
+
+    /**
+     * Converter foto em Base64 (com ou sem prefixo data URI) para bytes
+     */
+    base64ParaBytes(base64) {
+        const binario = atob(base64.includes(',') ? base64.split(',')[1] : base64);
+        const bytes = new Uint8Array(binario.length);
+        for (let i = 0; i < binario.length; i++) {
+            bytes[i] = binario.charCodeAt(i);
+        }
+        return bytes;
+    }
+
     /**
      * Obter espelho de ponto
      */
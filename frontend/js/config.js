@@ -12,9 +12,13 @@ const CONFIG = {
     STORAGE_KEYS: {
         TOKEN: 'ponto_token',
         USUARIO: 'ponto_usuario',
-        REGISTROS_OFFLINE: 'ponto_registros_offline'
+        REGISTROS_OFFLINE: 'ponto_registros_offline',
+        CURSOR_HISTORICO: 'ponto_cursor_historico'
     },
 
+    // Histórico local de registros (sincronização incremental)
+    HISTORICO_DIAS: 30,
+
     // Configurações de cache
     CACHE_VERSION: 'v1',
     CACHE_NAME: 'controle-ponto-v1',
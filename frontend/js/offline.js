@@ -5,7 +5,7 @@
 class OfflineManager {
     constructor() {
         this.dbName = 'PontoOfflineDB';
-        this.dbVersion = 1;
+        this.dbVersion = 2;
         this.db = null;
     }
 
@@ -35,6 +35,12 @@ class OfflineManager {
                     objectStore.createIndex('timestamp', 'timestamp', { unique: false });
                     objectStore.createIndex('sincronizado', 'sincronizado', { unique: false });
                 }
+
+                // Cópia local do histórico do servidor (por id do registro)
+                if (!db.objectStoreNames.contains('historico')) {
+                    const historico = db.createObjectStore('historico', { keyPath: 'id' });
+                    historico.createIndex('timestamp', 'timestamp', { unique: false });
+                }
             };
         });
     }
@@ -140,6 +146,132 @@ class OfflineManager {
         });
     }
 
+    /**
+     * Atualizar o histórico local com os registros alterados desde o último cursor
+     *
+     * Registros repetidos entre respostas são mesclados por id. O cursor fica
+     * no localStorage junto com o id do usuário; se o usuário mudou, o
+     * histórico é refeito do zero.
+     */
+    async atualizarHistorico(usuarioId) {
+        if (!this.db) {
+            await this.inicializar();
+        }
+
+        let estado = null;
+        try {
+            estado = JSON.parse(localStorage.getItem(CONFIG.STORAGE_KEYS.CURSOR_HISTORICO));
+        } catch (error) {
+            estado = null;
+        }
+
+        let cursor = estado && estado.usuario_id === usuarioId ? estado.cursor : null;
+        if (!cursor) {
+            await this.executarNoHistorico('readwrite', store => store.clear());
+        }
+
+        let temMais = true;
+        while (temMais) {
+            const resposta = await api.obterRegistrosDelta(cursor);
+
+            await this.executarNoHistorico('readwrite', store => {
+                resposta.registros.forEach(registro => store.put(registro));
+            });
+
+            cursor = resposta.cursor;
+            temMais = resposta.tem_mais;
+            localStorage.setItem(
+                CONFIG.STORAGE_KEYS.CURSOR_HISTORICO,
+                JSON.stringify({ usuario_id: usuarioId, cursor })
+            );
+        }
+
+        await this.podarHistorico();
+    }
+
+    /**
+     * Obter os registros mais recentes do histórico local
+     */
+    async obterHistorico(limite = 10) {
+        if (!this.db) {
+            await this.inicializar();
+        }
+
+        return new Promise((resolve, reject) => {
+            const transaction = this.db.transaction(['historico'], 'readonly');
+            const index = transaction.objectStore('historico').index('timestamp');
+            const request = index.openCursor(null, 'prev');
+            const registros = [];
+
+            request.onsuccess = (event) => {
+                const cursor = event.target.result;
+                if (cursor && registros.length < limite) {
+                    registros.push(cursor.value);
+                    cursor.continue();
+                } else {
+                    resolve(registros);
+                }
+            };
+
+            request.onerror = () => reject(request.error);
+        });
+    }
+
+    /**
+     * Remover do histórico local registros mais antigos que CONFIG.HISTORICO_DIAS
+     */
+    async podarHistorico() {
+        const limite = new Date(Date.now() - CONFIG.HISTORICO_DIAS * 24 * 60 * 60 * 1000).toISOString();
+
+        await this.executarNoHistorico('readwrite', store => {
+            const request = store.index('timestamp').openCursor(IDBKeyRange.upperBound(limite, true));
+            request.onsuccess = (event) => {
+                const cursor = event.target.result;
+                if (cursor) {
+                    cursor.delete();
+                    cursor.continue();
+                }
+            };
+        });
+    }
+
+    /**
+     * Executar operações no store do histórico em uma transação
+     */
+    executarNoHistorico(modo, operacao) {
+        return new Promise((resolve, reject) => {
+            const transaction = this.db.transaction(['historico'], modo);
+            operacao(transaction.objectStore('historico'));
+
+            transaction.oncomplete = () => resolve();
+            transaction.onerror = () => reject(transaction.error);
+        });
+    }
+
+    /**
+     * Enviar registros offline como lote binário
+     *
+     * O servidor registra os quadros em ordem; se o lote for interrompido,
+     * apenas os primeiros (sincronizados + falhas) saem da fila.
+     */
+    async sincronizarLote(registros) {
+        const resultado = await api.sincronizarRegistrosLote(registros);
+        const processados = resultado.quantidade_sincronizada + resultado.quantidade_falhas;
+
+        for (const registro of registros.slice(0, processados)) {
+            await this.marcarComoSincronizado(registro.id);
+        }
+
+        await this.limparRegistrosSincronizados();
+
+        return {
+            sucesso: true,
+            quantidade: resultado.quantidade_sincronizada,
+            falhas: resultado.quantidade_falhas,
+            mensagem: `${resultado.quantidade_sincronizada} registro(s) sincronizado(s)`
+        };
+    }
+
     /**
      * Sincronizar registros offline com o servidor
      */
@@ -151,6 +283,11 @@ class OfflineManager {
                 return { sucesso: true, quantidade: 0, mensagem: 'Nenhum registro para sincronizar' };
             }
 
+            // Lote binário (fotos em bytes, gzip) quando o navegador comprime streams
+            if (typeof CompressionStream !== 'undefined') {
+                return await this.sincronizarLote(registros);
+            }
+
             // Formatr registros para o formato esperado pela API
             const registrosParaEnviar = registros.map(r => ({
                 clock_type: r.clock_type,
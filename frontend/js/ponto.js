@@ -78,15 +78,36 @@ class GerenciadorPonto {
             UI.atualizarUltimoRegistro(ultimoRegistro);
             UI.configurarBotoesPonto(ultimoRegistro);
 
-            // Carregar histórico
-            const registros = await api.obterMeusRegistros(7);
-            UI.renderizarRegistros(registros);
+            // Carregar histórico (incremental, com cópia local para uso offline)
+            UI.renderizarRegistros(await this.carregarHistorico());
 
         } catch (error) {
             console.error('Erro ao carregar dados:', error);
         }
     }
 
+    /**
+     * Atualizar o histórico local pelo cursor e ler os registros mais recentes
+     */
+    async carregarHistorico() {
+        try {
+            try {
+                const usuario = api.getUsuarioAtual();
+                await offlineManager.atualizarHistorico(usuario ? usuario.id : null);
+            } catch (error) {
+                // Sem conexão: mostrar a última cópia local
+                console.warn('Histórico não atualizado:', error);
+            }
+
+            return await offlineManager.obterHistorico(10);
+
+        } catch (error) {
+            // IndexedDB indisponível
+            console.warn('Histórico local indisponível:', error);
+            return await api.obterMeusRegistros(7);
+        }
+    }
+
     /**
      * Iniciar processo de registro
      */
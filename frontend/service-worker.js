@@ -83,6 +83,12 @@ self.addEventListener('fetch', (event) => {
         return;
     }
 
+    // Sincronização incremental: sempre na rede (a cópia offline fica no IndexedDB)
+    if (url.pathname.endsWith('/ponto/registros/delta')) {
+        event.respondWith(fetch(request));
+        return;
+    }
+
     // Estratégia: Network First para chamadas à API
     if (request.url.includes('/api/') || request.url.includes(':8000')) {
         event.respondWith(networkFirst(request));